@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Per-call cost of Api methods with and without the schema cache.
+
+Usage: python benchmarks/bench_api_schema.py [number]
+
+"uncached" drops the compiled schema before each call,
+as it was before schemas were memoized.
+"""
+from __future__ import print_function
+import sys
+import timeit
+
+from roulier.carriers.laposte.laposte_api import LaposteApi
+from roulier.carriers.dpd.dpd_api import DpdApi
+from roulier.carriers.dummy.dummy_api import DummyApi
+from roulier.carriers.geodis.geodis_api_ws import GeodisApiWs
+from roulier.carriers.geodis.geodis_api_edi import GeodisApiEdi
+from roulier.carriers.geodis.geodis_api_find_localite_ws import (
+    GeodisApiFindLocaliteWs)
+from roulier.carriers.geodis.geodis_api_rest_ws import (
+    GeodisApiTracking, GeodisApiTrackingList)
+
+APIS = (
+    LaposteApi, DpdApi, DummyApi, GeodisApiWs, GeodisApiEdi,
+    GeodisApiFindLocaliteWs, GeodisApiTracking, GeodisApiTrackingList,
+)
+
+
+def bench(api_class, number):
+    api = api_class()
+    data = api.api_values()
+    calls = {
+        'api_schema': lambda: api.api_schema(),
+        'validate': lambda: api.validate(data),
+        'errors': lambda: api.errors(data),
+        'normalize': lambda: api.normalize(data),
+        'api_values': lambda: api.api_values(),
+    }
+    for name, call in sorted(calls.items()):
+        def uncached():
+            api_class.invalidate_schema()
+            call()
+        after = timeit.timeit(call, number=number) / number
+        before = timeit.timeit(uncached, number=number) / number
+        print('%-24s %-10s uncached %8.1f us  cached %8.1f us  x%.1f' % (
+            api_class.__name__, name,
+            before * 1e6, after * 1e6, before / after))
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for api_class in APIS:
+        bench(api_class, number)
+
+
+if __name__ == '__main__':
+    main()
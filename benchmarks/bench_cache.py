@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""Labels per second converted from png to zpl, with caches.
+
+Usage: python benchmarks/bench_cache.py [number]
+
+Same label as bench_zpl.py, printed again and again (reprints):
+"none" converts it each time, "lru" and "disk" are the caches
+of roulier.cache (hashing the png and a lookup per label).
+"""
+from __future__ import print_function
+import shutil
+import sys
+import tempfile
+import timeit
+
+from bench_zpl import label_png
+from roulier.cache import DiskCache, LRUCache
+from roulier.ws_tools import png_to_zpl
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    png = label_png()
+    directory = tempfile.mkdtemp()
+    try:
+        caches = [
+            ('none', None), ('lru', LRUCache()),
+            ('disk', DiskCache(directory))]
+        for name, cache in caches:
+            png_to_zpl(png, True, cache=cache)
+            duration = timeit.timeit(
+                lambda: png_to_zpl(png, True, cache=cache),
+                number=number) / number
+            print('%-4s %10.1f labels/s' % (name, 1 / duration))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Peak memory and time writing a Geodis deposit slip (edi).
+
+Usage: python3 benchmarks/bench_edi.py [shipments]
+
+(python 3: peak memory is measured with tracemalloc)
+
+"get_edi" builds the shipments, then the whole interchange
+in memory, "write_edi" writes it to a file while shipments
+are generated (like rows read from a database cursor),
+"processes" does the same with shipments encoded by 4 processes
+(peak memory of this process only).
+"""
+from __future__ import print_function
+from copy import deepcopy
+from datetime import datetime
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from roulier.carriers.geodis.geodis import Geodis
+
+ADDRESS = {
+    'name': u'Hélène Côté', 'street1': '35 b Rue Montgolfier',
+    'street2': 'Bat C', 'city': 'Villeurbanne', 'country': 'FR',
+    'zip': '69100', 'phone': '0600000000', 'siret': '123'}
+
+
+def header():
+    data = Geodis().api('edi')
+    data['service'].update({
+        'depositId': 'D1', 'depositDate': datetime(2019, 1, 1),
+        'customerId': 'C1', 'interchangeSender': 'S',
+        'interchangeRecipient': 'R'})
+    data['agency_address'].update(ADDRESS)
+    data['from_address'].update(ADDRESS)
+    shipment = data['shipments'][0]
+    shipment.update({'product': 'MES', 'reference1': 'order'})
+    shipment['to_address'].update(ADDRESS)
+    return data
+
+
+def shipments(data, count):
+    for i in range(count):
+        shipment = deepcopy(data['shipments'][0])
+        shipment['shippingId'] = 'X%s' % i
+        shipment['parcels'] = [
+            {'weight': 1.5, 'barcode': 'B%s-%s' % (i, j)} for j in range(2)]
+        yield shipment
+
+
+def with_get_edi(data, count, path):
+    data = dict(data, shipments=list(shipments(data, count)))
+    edi = Geodis().get_edi(data)
+    with open(path, 'w') as edi_file:
+        edi_file.write(edi)
+
+
+def with_write_edi(data, count, path):
+    data = dict(data, shipments=shipments(data, count))
+    with open(path, 'w') as edi_file:
+        Geodis().write_edi(data, edi_file)
+
+
+def with_processes(data, count, path):
+    data = dict(data, shipments=shipments(data, count))
+    with open(path, 'w') as edi_file:
+        Geodis().write_edi(data, edi_file, max_parcels=5000, processes=4)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    data = header()
+    handle, path = tempfile.mkstemp()
+    os.close(handle)
+    try:
+        for func in (with_get_edi, with_write_edi, with_processes):
+            tracemalloc.start()
+            start = time.time()
+            func(data, count, path)
+            duration = time.time() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print('%-10s %d shipments  peak %7d KiB  %6.2f s  %d KiB' % (
+                func.__name__[len('with_'):], count, peak // 1024,
+                duration, os.path.getsize(path) // 1024))
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
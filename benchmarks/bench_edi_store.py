@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Time to write a Geodis deposit slip at cutoff.
+
+Usage: python3 benchmarks/bench_edi_store.py [shipments]
+
+"get_edi" validates and encodes every shipment at cutoff,
+"store" writes the deposit from a GeodisEdiStore where shipments
+were added during the day (by waves of 50, time of "add").
+"""
+from __future__ import print_function
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from bench_edi import header, shipments
+from roulier.carriers.geodis.geodis import Geodis
+from roulier.carriers.geodis.geodis_edi_store import GeodisEdiStore
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    data = header()
+    directory = tempfile.mkdtemp()
+    try:
+        start = time.time()
+        edi = Geodis().get_edi(dict(data, shipments=list(
+            shipments(data, count))))
+        print('get_edi %d shipments  %6.2f s  %d KiB' % (
+            count, time.time() - start, len(edi) // 1024))
+
+        path = os.path.join(directory, 'deposit.edi')
+        store = GeodisEdiStore(os.path.join(directory, 'deposit.sqlite'))
+        wave = []
+        start = time.time()
+        for shipment in shipments(data, count):
+            wave.append(shipment)
+            if len(wave) == 50:
+                store.add(dict(data, shipments=wave))
+                wave = []
+        if wave:
+            store.add(dict(data, shipments=wave))
+        added = time.time() - start
+        start = time.time()
+        with open(path, 'w') as sink:
+            store.write(data, sink)
+        print('store   %d shipments  %6.2f s  %d KiB  (add %.2f s)' % (
+            count, time.time() - start, os.path.getsize(path) // 1024,
+            added))
+        store.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
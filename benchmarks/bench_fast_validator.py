@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Per-call cost of Api methods with cerberus and with the fast validator.
+
+Usage: python benchmarks/bench_fast_validator.py [number]
+
+Each Api validates its own api_values() (with defaults only,
+usually invalid: errors are reported too).
+"""
+from __future__ import print_function
+import sys
+import timeit
+
+from roulier.carriers.laposte.laposte_api import LaposteApi
+from roulier.carriers.dpd.dpd_api import DpdApi
+from roulier.carriers.dummy.dummy_api import DummyApi
+from roulier.carriers.geodis.geodis_api_ws import GeodisApiWs
+from roulier.carriers.geodis.geodis_api_edi import GeodisApiEdi
+from roulier.carriers.geodis.geodis_api_find_localite_ws import (
+    GeodisApiFindLocaliteWs)
+from roulier.carriers.geodis.geodis_api_rest_ws import (
+    GeodisApiTracking, GeodisApiTrackingList)
+
+APIS = (
+    LaposteApi, DpdApi, DummyApi, GeodisApiWs, GeodisApiEdi,
+    GeodisApiFindLocaliteWs, GeodisApiTracking, GeodisApiTrackingList,
+)
+
+
+def bench(api_class, number):
+    cerberus_api = api_class()
+    fast_api = api_class()
+    fast_api.validator_engine = 'fast'
+    data = cerberus_api.api_values()
+    for name in ('process', 'validate', 'errors', 'normalize'):
+        slow = getattr(cerberus_api, name)
+        fast = getattr(fast_api, name)
+        assert slow(data) == fast(data)
+        before = timeit.timeit(lambda: slow(data), number=number) / number
+        after = timeit.timeit(lambda: fast(data), number=number) / number
+        print('%-24s %-10s cerberus %8.1f us  fast %8.1f us  x%.1f' % (
+            api_class.__name__, name,
+            before * 1e6, after * 1e6, before / after))
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for api_class in APIS:
+        bench(api_class, number)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Time to decode a Geodis tracking list and encode its request.
+
+Usage: python benchmarks/bench_geodis_mapping.py [rows]
+
+"visit" walks the mapping schema for each row (what
+GeodisMappingOut.normalize() did), "mapper" is the compiled
+mapping (compile_mapping(): generated code). "cerberus" renames
+the request fields with cerberus (what GeodisMappingIn.normalize()
+did), "renames" with the compiled renames.
+"""
+from __future__ import print_function
+import sys
+import timeit
+
+from roulier.api import Api
+from roulier.carriers.geodis.geodis_api_rest_ws import (
+    GeodisApiTrackingList, GeodisApiTrackingListOut)
+from roulier.carriers.geodis.geodis_decoder_rest_ws import (
+    GeodisDecoderRestWs)
+
+
+def rows(number):
+    line = dict.fromkeys(
+        key for values in GeodisApiTrackingListOut().schema().values()
+        for key in values.values())
+    line['codeSituation'] = 'LIV'
+    return [dict(line, noSuivi='T%s' % i) for i in range(number)]
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    body = rows(number)
+    api = GeodisApiTrackingListOut()
+    schema = api.schema()
+    decoder = GeodisDecoderRestWs()
+    for line in body:
+        decoder.add_tracking_code(line)
+
+    def visit():
+        return [api.visit(line, schema) for line in body]
+
+    mapper = api.mapper()
+
+    def compiled():
+        return [mapper(line) for line in body]
+
+    assert visit() == compiled()
+    before = min(timeit.repeat(visit, number=1, repeat=5))
+    after = min(timeit.repeat(compiled, number=1, repeat=5))
+    print('%s rows' % number)
+    print('visit    %8.2f ms' % (before * 1e3))
+    print('mapper   %8.2f ms  x%.1f' % (after * 1e3, before / after))
+
+    tracking_list = GeodisApiTrackingList()
+    external = tracking_list.api_values()
+    external['service'].update({
+        'shippingDateStart': '2019-07-01', 'shippingDateEnd': '2019-07-31'})
+    mapping = tracking_list._interal_api()
+
+    def cerberus():
+        return Api.normalize(mapping, mapping.flat(external))
+
+    def renames():
+        return mapping.normalize(external)
+
+    assert cerberus() == renames()
+    before = min(timeit.repeat(cerberus, number=200, repeat=5)) / 200
+    after = min(timeit.repeat(renames, number=200, repeat=5)) / 200
+    print('request')
+    print('cerberus %8.3f ms' % (before * 1e3))
+    print('renames  %8.3f ms  x%.1f' % (after * 1e3, before / after))
+
+
+if __name__ == '__main__':
+    main()
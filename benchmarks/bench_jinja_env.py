@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Cost of loading a template with a new and a shared environment.
+
+Usage: python benchmarks/bench_jinja_env.py [number]
+
+A new Environment (as encoders and transports used to build on
+every call) parses and compiles the template each time (and its
+includes when rendering); the shared environment of
+roulier.jinja_env compiles them once.
+"""
+from __future__ import print_function
+import sys
+import timeit
+
+from jinja2 import Environment, PackageLoader
+
+from roulier.jinja_env import get_environment
+
+TEMPLATES = (
+    ('/carriers/laposte/templates', 'laposte_generateLabelRequest.xml'),
+    ('/carriers/dpd/templates', 'dpd_createShipmentWithLabels.xml'),
+    ('/carriers/geodis/templates', 'geodis_demandeImpressionEtiquette.xml'),
+)
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for path, name in TEMPLATES:
+        def new():
+            env = Environment(
+                loader=PackageLoader('roulier', path),
+                extensions=['jinja2.ext.with_', 'jinja2.ext.autoescape'],
+                autoescape=True)
+            return env.get_template(name)
+
+        def shared():
+            env = get_environment(path, autoescape=True)
+            return env.get_template(name)
+
+        shared()  # compile once
+        before = timeit.timeit(new, number=number) / number
+        after = timeit.timeit(shared, number=number) / number
+        print('%-40s new %8.1f us  shared %8.1f us  x%.1f' % (
+            name, before * 1e6, after * 1e6, before / after))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Time and memory spent splitting the labels of a shipment.
+
+Usage: python3 benchmarks/bench_labels.py [number]
+
+(python 3: peak memory is measured with tracemalloc)
+
+The document holds the ZPL labels of a 100 parcels shipment
+(~10 KiB each, with a graphic). "split" is what the geodis
+decoder used to do, "labels" is roulier.labels.Labels (every
+label copied, like the decoder does) and "scan" only finds
+the labels (views). The memory of the document itself is not
+counted.
+"""
+from __future__ import print_function
+import os
+import sys
+import timeit
+import tracemalloc
+import binascii
+
+from roulier.labels import Labels
+
+
+def build_document(parcels=100):
+    labels = []
+    for i in range(parcels):
+        graphic = binascii.hexlify(os.urandom(4000)).upper()
+        labels.append(
+            b'^XA^FO50,50^GFA,4000,4000,50,,' + graphic +
+            b'^FS^FO50,600^A0N,40,40^FDparcel %d^FS^XZ' % i)
+    return b'\r\n'.join(labels) + b'\r\n'
+
+
+def with_split(document):
+    labels = document.split(b'^XZ\r\n^XA')
+    return [
+        (i and b'^XA' or b'') + label +
+        (i < len(labels) - 1 and b'^XZ' or b'')
+        for i, label in enumerate(labels)]
+
+
+def with_labels(document):
+    return list(Labels(document))
+
+
+def with_scan(document):
+    labels = Labels(document)
+    return [labels.view(i) for i in range(len(labels))]
+
+
+def peak(func, document):
+    tracemalloc.start()
+    func(document)
+    result = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    document = build_document()
+    print('document %d KiB, %d labels' % (
+        len(document) // 1024, len(Labels(document))))
+    for func in (with_split, with_labels, with_scan):
+        duration = timeit.timeit(
+            lambda: func(document), number=number) / number
+        print('%-6s peak %6d KiB  %8.3f ms' % (
+            func.__name__[len('with_'):], peak(func, document) // 1024,
+            duration * 1e3))
+
+
+if __name__ == '__main__':
+    main()
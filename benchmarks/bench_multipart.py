@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Memory and time spent extracting the parts of a laposte response.
+
+Usage: python3 benchmarks/bench_multipart.py [number]
+
+(python 3: peak memory is measured with tracemalloc)
+
+The response holds a zpl label and a cn23 pdf. "email" is what
+get_parts() used to do (headers and content joined in one string,
+parsed by the email package), "parse" is roulier.multipart.parse()
+and "stream" feeds a MultipartParser with 64 KiB chunks.
+The memory of the response itself is not counted.
+"""
+from __future__ import print_function
+import email
+import os
+import sys
+import timeit
+import tracemalloc
+
+from roulier.multipart import MultipartParser, parse
+
+CONTENT_TYPE = (
+    'multipart/related; type="application/xop+xml"; boundary="uuid:b1"; '
+    'start="<root.message@cxf.apache.org>"; start-info="text/xml"')
+
+
+def build_response():
+    label = b'^XA' + os.urandom(150 * 1024) + b'^XZ'
+    pdf = b'%PDF-1.4\r\n' + os.urandom(600 * 1024) + b'\r\n%%EOF'
+    return b''.join([
+        b'\r\n--uuid:b1\r\n',
+        b'Content-Type: application/xop+xml; charset=UTF-8; '
+        b'type="text/xml"\r\n',
+        b'Content-Transfer-Encoding: binary\r\n',
+        b'Content-ID: <root.message@cxf.apache.org>\r\n\r\n',
+        b'<soap:Envelope>' + b'x' * 2000 + b'</soap:Envelope>\r\n',
+        b'--uuid:b1\r\n',
+        b'Content-Type: application/octet-stream\r\n',
+        b'Content-Transfer-Encoding: binary\r\n',
+        b'Content-ID: <label-1@cxf.apache.org>\r\n\r\n',
+        label + b'\r\n',
+        b'--uuid:b1\r\n',
+        b'Content-Type: application/pdf\r\n',
+        b'Content-Transfer-Encoding: binary\r\n',
+        b'Content-ID: <cn23-1@cxf.apache.org>\r\n\r\n',
+        pdf + b'\r\n',
+        b'--uuid:b1--\r\n',
+    ])
+
+
+def with_email(content):
+    full = ('Content-Type:%s\n' % CONTENT_TYPE).encode('utf-8') + content
+    message = email.message_from_bytes(full)
+    start = message.get_param('start').lstrip('<').rstrip('>')
+    parts = {}
+    for part in message.get_payload():
+        cid = part.get('content-Id', '').lstrip('<').rstrip('>')
+        parts[cid == start and 'start' or cid] = part.get_payload(
+            decode=True)
+    return parts
+
+
+def with_parse(content):
+    parts = parse(CONTENT_TYPE, content)
+    return dict((key, parts[key]) for key in parts)
+
+
+def with_stream(content):
+    parser = MultipartParser(CONTENT_TYPE)
+    for i in range(0, len(content), 65536):
+        parser.feed(content[i:i + 65536])
+    parts = parser.close()
+    return dict((key, parts[key]) for key in parts)
+
+
+def peak(func, content):
+    tracemalloc.start()
+    func(content)
+    result = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    content = build_response()
+    expected = with_email(content)
+    print('response %d KiB' % (len(content) // 1024))
+    for func in (with_email, with_parse, with_stream):
+        assert func(content) == expected
+        duration = timeit.timeit(
+            lambda: func(content), number=number) / number
+        print('%-6s peak %6d KiB  %8.2f ms' % (
+            func.__name__[len('with_'):], peak(func, content) // 1024,
+            duration * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Cost of removing empty tags from a laposte label request.
+
+Usage: python benchmarks/bench_remove_empty_tags.py [number]
+
+"xslt" is what remove_empty_tags() used to do on every call: read
+and compile templates/remove_empty_tags.xsl, then parse, transform
+and serialize the body. "lxml" is the current remove_empty_tags().
+"""
+from __future__ import print_function
+import os
+import sys
+import timeit
+
+from lxml import etree
+
+import roulier
+from roulier.carriers.laposte.laposte_encoder import LaposteEncoder
+from roulier.ws_tools import remove_empty_tags
+
+try:
+    unicode
+except NameError:  # python 3
+    unicode = str
+
+XSL = os.path.join(
+    os.path.dirname(roulier.__file__), 'templates', 'remove_empty_tags.xsl')
+
+
+def laposte_body():
+    data = LaposteEncoder().api()
+    data['auth']['login'] = '12345'
+    data['service']['product'] = 'COL'
+    data['service']['shippingDate'] = '2019/09/12'
+    data['parcels'][0]['weight'] = 3.4
+    for address in ('from_address', 'to_address'):
+        data[address].update({
+            'name': 'Akretion', 'street1': '35 b Rue Montgolfier',
+            'city': 'Villeurbanne', 'country': 'FR', 'zip': '69100'})
+    return LaposteEncoder().encode(data, 'generateLabelRequest')['body']
+
+
+def xslt(body):
+    with open(XSL, 'rb') as xsl:
+        transform = etree.XSLT(etree.parse(xsl))
+    return unicode(transform(etree.fromstring(body)))
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    body = laposte_body()
+    assert xslt(body) == remove_empty_tags(body)
+    before = timeit.timeit(lambda: xslt(body), number=number) / number
+    after = timeit.timeit(
+        lambda: remove_empty_tags(body), number=number) / number
+    print('xslt %8.1f us  lxml %8.1f us  x%.1f' % (
+        before * 1e6, after * 1e6, before / after))
+
+
+if __name__ == '__main__':
+    main()
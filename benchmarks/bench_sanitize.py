@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Fields per second sanitized by the profiles of roulier.sanitize.
+
+Usage: python benchmarks/bench_sanitize.py [number]
+
+The corpus is made of 20000 fields of french addresses (names,
+streets, cities: many repeat). "replace" is what the coercers
+and the EDI transport used to do (a replace per character),
+"cold" is a profile with an empty memo, "warm" a profile
+having seen the corpus once.
+"""
+from __future__ import print_function
+import random
+import sys
+import timeit
+
+from unidecode import unidecode
+
+from roulier import sanitize
+
+FIRST_NAMES = [
+    u'Hélène', u'Jérôme', u'Françoise', u'Zoé', u'Loïc', u'Gaëlle',
+    u'Benoît', u'Amélie', u'Noël', u'Céline', u'Anaïs', u'Stéphane',
+    u'Jean', u'Marie', u'Pierre', u'Élodie', u'Ève', u'Maëlys']
+LAST_NAMES = [
+    u'Côté', u'Lefèvre', u'Béranger', u'Després', u'Dupont', u'Gérard',
+    u'Mégret', u'Froment', u'Hébert', u'Lemaître', u'Müller', u"D'Arc"]
+STREETS = [
+    u'Rue de la Paix', u'Avenue des Champs-Élysées', u'Boulevard Saint-Michel',
+    u'Place de l\'Hôtel de Ville', u'Rue du Faubourg Saint-Honoré',
+    u'Quai des Célestins', u'Chemin des Écoliers', u'Impasse de l\'Église',
+    u'Allée des Châtaigniers', u'Route de Bœuf', u'Rue Montgolfier']
+CITIES = [
+    u'Paris', u'Lyon', u'Saint-Étienne', u'Besançon', u'Orléans',
+    u'Nîmes', u'Villeurbanne', u'Créteil', u'Évry-Courcouronnes',
+    u'Châlons-en-Champagne', u'Pont-à-Mousson', u'L\'Haÿ-les-Roses']
+
+
+def corpus(size=20000):
+    rand = random.Random(42)
+    fields = []
+    while len(fields) < size:
+        fields.extend([
+            u'%s %s' % (rand.choice(FIRST_NAMES), rand.choice(LAST_NAMES)),
+            u'%d %s' % (rand.randint(1, 200), rand.choice(STREETS)),
+            u'Bât %s, %de étage' % (rand.choice(u'ABCDÉ'), rand.randint(1, 9)),
+            rand.choice(CITIES),
+        ])
+    return fields[:size]
+
+
+def replace_zpl(value):
+    val = unidecode(value)
+    for ctrl in [0xFE, 0x5E, 0x1E, 0x10]:
+        val = val.replace("%c" % ctrl, "")
+    return val
+
+
+def replace_accents(value):
+    sanitized = (
+        value.replace(u"é", "e").replace(u"è", "e").replace(u"ë", "e")
+        .replace(u"ê", "e").replace(u"ô", "o").replace(u"ï", "i")
+        .replace(u"ö", "o").replace(u"à", "a").replace(u"â", "a")
+        .replace(u"ç", "c").replace(u"û", "u").replace(u"ù", "u")
+        .replace(u"É", "E").replace(u"È", "E").replace(u"Ë", "E")
+        .replace(u"Ê", "E").replace(u"Ô", "O").replace(u"Ï", "I")
+        .replace(u"Ö", "O").replace(u"À", "A").replace(u"Â", "A")
+        .replace(u"Ç", "C").replace(u"Û", "U").replace(u"Ù", "U")
+        .replace(u"œ", "oe").replace(u"Œ", "OE")
+    ).encode('ascii', 'ignore')
+    if not isinstance(sanitized, str):  # python 3
+        sanitized = sanitized.decode('ascii')
+    return sanitized
+
+
+def replace_edifact(token):
+    sanitized = (
+        token.replace("?", " ").replace("'", " ").replace("+", " ")
+        .replace(":", " ")
+    ).encode('ascii', 'ignore')
+    if not isinstance(sanitized, str):  # python 3
+        sanitized = sanitized.decode('ascii')
+    return sanitized
+
+
+def rate(func, fields, number, before=None):
+    def run():
+        if before:
+            before()
+        for field in fields:
+            func(field)
+    return len(fields) / (timeit.timeit(run, number=number) / number)
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    fields = corpus()
+    for name, replace, profile in [
+            ('zpl', replace_zpl, sanitize.ZPL),
+            ('accents', replace_accents, sanitize.ACCENTS),
+            ('edifact', replace_edifact, sanitize.EDIFACT)]:
+        assert [replace(f) for f in fields] == [profile(f) for f in fields]
+        before = rate(replace, fields, number)
+        cold = rate(profile, fields, number, profile._memo.clear)
+        warm = rate(profile, fields, number)
+        print('%-8s replace %9.0f/s  cold %9.0f/s x%.1f  '
+              'warm %9.0f/s x%.1f' % (
+                  name, before, cold, cold / before, warm, warm / before))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Latency of https requests with and without keep-alive connections.
+
+Usage: python benchmarks/bench_session.py [number]
+
+The stand-in of the carriers (roulier/tests/stand_in.py) is served
+over TLS (a self-signed certificate is generated with openssl, not
+verified: only the handshake matters here).
+"requests.post" opens a connection (TCP + TLS handshake) per request,
+"Transport.post" reuses the connections of its session.
+"""
+from __future__ import print_function
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import timeit
+
+import requests
+import urllib3
+
+from roulier.tests.stand_in import StandIn
+from roulier.transport import Transport
+
+BODY = (b'<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/'
+        b'envelope/">' + b'x' * 2000 + b'</soap:Envelope>')
+
+
+class Server(StandIn):
+    def handle_error(self, request, client_address):
+        pass  # clients closing without tls close_notify
+
+
+def make_certificate(directory):
+    cert = os.path.join(directory, 'cert.pem')
+    key = os.path.join(directory, 'key.pem')
+    subprocess.check_call([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+        '-days', '1', '-subj', '/CN=127.0.0.1',
+        '-addext', 'subjectAltName=IP:127.0.0.1',
+        '-keyout', key, '-out', cert], stderr=subprocess.PIPE)
+    return cert, key
+
+
+def start_server(cert, key):
+    server = Server(size=2000)
+    server.socket = ssl.wrap_socket(
+        server.socket, certfile=cert, keyfile=key, server_side=True)
+    return server.start()
+
+
+class BenchTransport(Transport):
+    def send(self, payload):
+        return self.post(payload)
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    directory = tempfile.mkdtemp()
+    try:
+        cert, key = make_certificate(directory)
+        server = start_server(cert, key)
+        url = 'https://127.0.0.1:%s/sls-ws/SlsServiceWS' % (
+            server.server_address[1])
+        request = {'url': url, 'headers': {}, 'data': BODY}
+
+        urllib3.disable_warnings()
+        transport = BenchTransport()
+        transport.session.verify = False
+        transport.session.trust_env = False  # else REQUESTS_CA_BUNDLE wins
+
+        def without_session():
+            requests.post(url, data=BODY, verify=False)
+
+        def with_session():
+            transport.post(request)
+
+        with_session()  # open the connection
+        before = timeit.timeit(without_session, number=number) / number
+        after = timeit.timeit(with_session, number=number) / number
+        print('requests.post  %8.2f ms' % (before * 1e3))
+        print('Transport.post %8.2f ms  x%.1f' % (after * 1e3, before / after))
+        transport.close()
+        server.shutdown()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""Speed and memory of each stage of each carrier, against baselines.
+
+Usage: python benchmarks/bench_suite.py [--save] [--threshold 0.3]
+                                        [carrier ...]
+
+Each stage runs alone on recorded inputs and responses
+(benchmarks/fixtures: <case>.json is the input of the carrier,
+<case>.http the response of its webservice), without network:
+
+    validate    Api.process(): schema validation and normalization
+    encode      encoder, templates rendered
+    soap_wrap   soap envelope of the request (prepare_request for
+                Geodis REST: the request is signed)
+    handle_200  parsing of the response (multipart, soap, json)
+    decode      decoder (labels converted, tracking mapped)
+    convert     EDI interchange of Geodis (transport)
+
+ops/s is measured with timeit, allocations (KiB at the peak of a
+call, with tracemalloc: python 3 only). They are compared to
+benchmarks/baselines.json (one baseline per python major version):
+a stage slower or allocating more than the threshold (0.3: 30%)
+makes the command fail. --save writes the current results as the
+baselines.
+
+Speeds are divided by the speed of a calibration loop before
+being compared so that baselines carry across machines; expect
+some noise anyway, run on a quiet machine.
+"""
+from __future__ import print_function
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import partial
+import argparse
+import io
+import json
+import os
+import sys
+import timeit
+
+from roulier.carriers.dpd.dpd import Dpd
+from roulier.carriers.dpd.dpd_api import DpdApi
+from roulier.carriers.dummy.dummy import Dummy
+from roulier.carriers.dummy.dummy_api import DummyApi
+from roulier.carriers.geodis.geodis import Geodis
+from roulier.carriers.geodis.geodis_api_edi import GeodisApiEdi
+from roulier.carriers.geodis.geodis_common_ws import GEODIS_INFOS
+from roulier.carriers.laposte.laposte import Laposte
+from roulier.carriers.laposte.laposte_api import LaposteApi
+
+try:
+    import tracemalloc
+except ImportError:  # python 2
+    tracemalloc = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, 'fixtures')
+BASELINES = os.path.join(HERE, 'baselines.json')
+
+# seconds a measure lasts (at least)
+DURATION = 0.2
+
+
+class Response(object):
+    """A recorded response, like a requests.Response."""
+
+    elapsed = timedelta(0)
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+
+def load_input(name):
+    with io.open(os.path.join(FIXTURES, name + '.json'),
+                 encoding='utf-8') as input_file:
+        return json.load(input_file)
+
+
+def load_response(name):
+    """Read fixtures/<name>.http: status line, headers, blank line
+    then the body (bytes as received)."""
+    with open(os.path.join(FIXTURES, name + '.http'), 'rb') as http_file:
+        head, content = http_file.read().split(b'\r\n\r\n', 1)
+    lines = head.decode('ascii').split('\r\n')
+    headers = dict(line.split(': ', 1) for line in lines[1:])
+    return Response(int(lines[0].split()[1]), headers, content)
+
+
+# case: function returning [(stage, function)], see stages()
+CASES = OrderedDict()
+
+
+def case(function):
+    CASES[function.__name__] = function
+    return function
+
+
+@case
+def laposte():
+    data = load_input('laposte')
+    carrier = Laposte()
+    encode, transport, decode = carrier.pipeline(carrier.LABEL_ACTION)
+    request = encode(data)
+    response = load_response('laposte')
+    return [
+        ('validate', partial(LaposteApi().process, data)),
+        ('encode', partial(encode, data)),
+        ('soap_wrap', partial(
+            transport.soap_wrap, request['body'], request['headers'])),
+        ('handle_200', partial(transport.handle_200, response)),
+        ('decode', partial(decode, request, transport.handle_200(response))),
+    ]
+
+
+@case
+def dpd():
+    data = load_input('dpd')
+    carrier = Dpd()
+    encode, transport, decode = carrier.pipeline(carrier.LABEL_ACTION)
+    # the png of the label is converted, not read from the cache
+    carrier.decoder.zpl_cache = None
+    request = encode(data)
+    response = load_response('dpd')
+    return [
+        ('validate', partial(DpdApi().process, data)),
+        ('encode', partial(encode, data)),
+        ('soap_wrap', partial(
+            transport.soap_wrap, request['body'], request['headers'])),
+        ('handle_200', partial(transport.handle_200, response)),
+        ('decode', partial(decode, request, transport.handle_200(response))),
+    ]
+
+
+def _geodis_ws(name, action):
+    data = load_input(name)
+    encode, transport, decode = Geodis().pipeline(action)
+    request = encode(data)
+    response = load_response(name)
+    return [
+        ('validate', partial(GEODIS_INFOS[action]['api']().process, data)),
+        ('encode', partial(encode, data)),
+        ('soap_wrap', partial(
+            transport.soap_wrap, request['body'], request['headers'],
+            request['infos'])),
+        ('handle_200', partial(transport.handle_200, response)),
+        ('decode', partial(decode, request, transport.handle_200(response))),
+    ]
+
+
+@case
+def geodis_label():
+    return _geodis_ws('geodis_label', 'demandeImpressionEtiquette')
+
+
+@case
+def geodis_find_localite():
+    return _geodis_ws('geodis_find_localite', 'findLocalite')
+
+
+@case
+def geodis_tracking_list():
+    data = load_input('geodis_tracking_list')
+    encode, transport, decode = Geodis().pipeline('trackingList')
+    request = encode(data)
+    response = load_response('geodis_tracking_list')
+    return [
+        ('validate', partial(
+            GEODIS_INFOS['trackingList']['api']().process, data)),
+        ('encode', partial(encode, data)),
+        ('soap_wrap', partial(transport.prepare_request, request)),
+        ('handle_200', partial(transport.handle_200, response)),
+        # lines are decoded in place, again and again: same result
+        ('decode', partial(decode, request, transport.handle_200(response))),
+    ]
+
+
+@case
+def geodis_edi():
+    data = load_input('geodis_edi')
+    data['service']['depositDate'] = datetime.strptime(
+        data['service']['depositDate'], '%Y-%m-%d %H:%M:%S')
+    encode, transport, decode = Geodis().pipeline('edi')
+    return [
+        ('validate', partial(GeodisApiEdi().process, data)),
+        ('encode', partial(encode, data)),
+        ('convert', partial(transport.send, encode(data))),
+    ]
+
+
+@case
+def dummy():
+    data = load_input('dummy')
+    carrier = Dummy()
+    encode, transport, decode = carrier.pipeline(carrier.LABEL_ACTION)
+    request = encode(data)
+    return [
+        ('validate', partial(DummyApi().process, data)),
+        ('encode', partial(encode, data)),
+        ('decode', partial(decode, request, transport.send(request))),
+    ]
+
+
+def stages(names=None):
+    """Yield (case, stage, function) of the cases named (all by
+    default)."""
+    for name, make in CASES.items():
+        if names and name not in names:
+            continue
+        for stage, function in make():
+            yield name, stage, function
+
+
+def ops_per_second(function):
+    """Calls per second of function (best of 5 runs of DURATION)."""
+    timer = timeit.Timer(function)
+    number = 1
+    while True:
+        seconds = timer.timeit(number)
+        if seconds >= DURATION / 5:
+            break
+        number *= 2
+    best = min([seconds] + timer.repeat(repeat=4, number=number))
+    return number / best
+
+
+def peak_kib(function):
+    """KiB allocated at the peak of a call (None on python 2)."""
+    if tracemalloc is None:
+        return None
+    function()  # warm caches
+    tracemalloc.start()
+    try:
+        function()
+        __, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024.0, 1)
+
+
+def calibration():
+    """Calls per second of a pure python loop: the speed of this
+    machine."""
+    def loop():
+        return sorted(
+            dict(('%s' % i, [i] * 3) for i in range(200)).items())
+    return ops_per_second(loop)
+
+
+def compare(result, baseline, threshold):
+    """Return the regressions of result from baseline."""
+    regressions = []
+    if result['score'] < baseline['score'] * (1 - threshold):
+        regressions.append('speed %+.0f%%' % (
+            (result['score'] / baseline['score'] - 1) * 100))
+    if result['kib'] is not None and baseline.get('kib') and (
+            result['kib'] > baseline['kib'] * (1 + threshold)):
+        regressions.append('memory %+.0f%%' % (
+            (result['kib'] / baseline['kib'] - 1) * 100))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Speed and memory of each stage of each carrier.')
+    parser.add_argument('cases', nargs='*', metavar='carrier',
+                        help='among: %s' % ', '.join(CASES))
+    parser.add_argument('--save', action='store_true',
+                        help='write the results as the baselines')
+    parser.add_argument('--threshold', type=float, default=0.3,
+                        help='regression allowed (default: 0.3)')
+    args = parser.parse_args()
+    version = 'py%s' % sys.version_info[0]
+    try:
+        with open(BASELINES) as baselines_file:
+            baselines = json.load(baselines_file)
+    except IOError:
+        baselines = {}
+    baseline = baselines.setdefault(version, {})
+
+    speed = calibration()
+    failed = []
+    print('%-22s %-10s %10s %9s  %s' % (
+        'case', 'stage', 'ops/s', 'KiB', 'baseline'))
+    for name, stage, function in stages(args.cases):
+        function()
+        ops = ops_per_second(function)
+        result = {
+            'score': round(ops / speed, 5),
+            'kib': peak_kib(function),
+        }
+        key = '%s.%s' % (name, stage)
+        previous = baseline.get(key)
+        if previous is None:
+            status = 'new'
+        else:
+            regressions = compare(result, previous, args.threshold)
+            if regressions:
+                failed.append(key)
+            status = ', '.join(regressions) or 'ok (%+.0f%%)' % (
+                (result['score'] / previous['score'] - 1) * 100)
+        print('%-22s %-10s %10.1f %9s  %s' % (
+            name, stage, ops,
+            '-' if result['kib'] is None else result['kib'], status))
+        baseline[key] = result
+
+    if args.save:
+        with open(BASELINES, 'w') as baselines_file:
+            json.dump(baselines, baselines_file, indent=1, sort_keys=True,
+                      separators=(',', ': '))
+            baselines_file.write('\n')
+        print('baselines saved to %s' % BASELINES)
+    elif failed:
+        print('regressions: %s' % ', '.join(failed))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Time of repeated Geodis tracking requests, with a cache.
+
+Usage: python benchmarks/bench_tracking_cache.py [number]
+
+The local server of bench_tracking_list.py stands in for Geodis
+(a day of 100 shipments, delivered). "no cache" sends every
+request, "GeodisTrackingCache" sends the first one only.
+"""
+from __future__ import print_function
+import sys
+import threading
+import timeit
+
+from roulier.carriers.geodis.geodis_tracking_cache import GeodisTrackingCache
+
+from bench_tracking_list import LocalGeodis, Server, Handler
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    server = Server(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    geodis = LocalGeodis()
+    geodis.url = 'http://127.0.0.1:%s/' % server.server_address[1]
+    data = geodis.api('trackingList')
+    data['auth'].update({'login': 'l', 'password': 'p'})
+    data['service'].update({
+        'shippingDateStart': '2019-07-01', 'shippingDateEnd': '2019-07-01'})
+
+    def get():
+        geodis.get_tracking_list(data)
+
+    before = timeit.timeit(get, number=number) / number
+    geodis.rest_ws.cache = GeodisTrackingCache(ttl=60)
+    after = timeit.timeit(get, number=number) / number
+    print('no cache            %8.2f ms' % (before * 1e3))
+    print('GeodisTrackingCache %8.2f ms  x%.1f' % (
+        after * 1e3, before / after))
+    print(geodis.rest_ws.cache.stats())
+    geodis.rest_ws.cache = None
+    geodis.rest_ws.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Time to get the Geodis tracking list of a month.
+
+Usage: python benchmarks/bench_tracking_list.py [rows per day]
+
+The stand-in of the carriers (roulier/tests/stand_in.py) answers
+ROWS_PER_DAY rows a day of the window and takes 50 ms plus 1 ms
+per row to answer (the search). "get_tracking_list" sends one request for
+the month, "iter_tracking_list" one per 3 days, 4 at a time.
+"first row" is the time until the caller gets a row.
+"""
+from __future__ import print_function
+from datetime import datetime, timedelta
+import json
+import sys
+import time
+
+from roulier.carriers.geodis.geodis import Geodis
+from roulier.carriers.geodis.geodis_transport_rest_ws import (
+    GeodisTransportRestWs)
+from roulier.carriers.geodis.geodis_tracking_list import shards
+from roulier.tests.stand_in import StandIn
+
+ROWS_PER_DAY = 100
+
+
+class Server(StandIn):
+    """Stand-in answering ROWS_PER_DAY rows a day of the window."""
+
+    def geodis_tracking_list(self, handler, body):
+        request = json.loads(body.decode('utf-8'))
+        rows = []
+        for day, __ in shards(
+                request['dateDepartDebut'], request['dateDepartFin'], 1):
+            for i in range(ROWS_PER_DAY):
+                rows.append(self.tracking_line('%s-%s' % (day, i), day))
+        time.sleep(0.05 + 0.001 * len(rows))
+        return self._rest(handler, body, lambda: rows)
+
+
+def measure(func, *args, **kwargs):
+    """Return (seconds to the first row, total seconds, rows)."""
+    start = time.time()
+    first = None
+    count = 0
+    for __ in func(*args, **kwargs):
+        if first is None:
+            first = time.time() - start
+        count += 1
+    return first, time.time() - start, count
+
+
+def main():
+    global ROWS_PER_DAY
+    if len(sys.argv) > 1:
+        ROWS_PER_DAY = int(sys.argv[1])
+    server = Server().start()
+    geodis = Geodis()
+    geodis.rest_ws = GeodisTransportRestWs(base_url=server.url)
+    data = geodis.api('trackingList')
+    data['auth'].update({'login': 'l', 'password': server.api_key})
+    end = datetime(2019, 7, 31)
+    data['service'].update({
+        'shippingDateStart': (end - timedelta(days=29)).strftime('%Y-%m-%d'),
+        'shippingDateEnd': end.strftime('%Y-%m-%d')})
+
+    before = measure(geodis.get_tracking_list, data)
+    after = measure(
+        geodis.iter_tracking_list, data, days=3, max_workers=4)
+    assert before[2] == after[2]
+    print('%s rows' % before[2])
+    print('                   first row    total')
+    print('get_tracking_list  %7.2f s  %7.2f s' % before[:2])
+    print('iter_tracking_list %7.2f s  %7.2f s  x%.1f' % (
+        after[0], after[1], before[1] / after[1]))
+    geodis.rest_ws.close()
+    server.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Requests of a Geodis tracking poll of many shipments.
+
+Usage: python benchmarks/bench_tracking_poller.py [shipments]
+
+Shipments of 30 days and 5 agencies are followed; between two
+polls (an hour), 2% of them change (half are delivered). Geodis
+is stood in by a transport answering in the process (no
+network: only the number of requests and the python time
+matter). "get_tracking" is a request per open shipment, like a
+fan out on every cycle.
+"""
+from __future__ import print_function
+from datetime import datetime, timedelta
+import json
+import random
+import sys
+import time
+
+from roulier.carriers.geodis.geodis import Geodis
+from roulier.carriers.geodis.geodis_api_rest_ws import (
+    GeodisApiTrackingListOut)
+from roulier.carriers.geodis.geodis_tracking_poller import (
+    GeodisTrackingPoller)
+from roulier.carriers.geodis.geodis_transport_rest_ws import (
+    GeodisTransportRestWs)
+
+LINE = dict.fromkeys(
+    key for values in GeodisApiTrackingListOut().schema().values()
+    for key in values.values())
+LINE['poids'] = 1.0
+
+
+class Response(object):
+    status_code = 200
+    elapsed = timedelta(0)
+
+    def __init__(self, text):
+        self.text = text
+
+
+class LocalTransport(GeodisTransportRestWs):
+    """Answer the shipments of the agency and dates asked for."""
+
+    def __init__(self, shipments):
+        super(LocalTransport, self).__init__()
+        # {tracking_id: [date, agency, codeSituation]}
+        self.shipments = shipments
+        self.count = self.rows = 0
+
+    def post(self, request):
+        body = json.loads(request['data'])
+        rows = [
+            dict(LINE, noSuivi=tracking_id, codeSituation=situation)
+            for tracking_id, (date, agency, situation)
+            in self.shipments.items()
+            if agency == body['codeSa'] and
+            body['dateDepartDebut'] <= date <= body['dateDepartFin']]
+        self.count += 1
+        self.rows += len(rows)
+        return Response(json.dumps({'ok': True, 'contenu': rows}))
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    random.seed(1)
+    start = datetime(2019, 7, 1)
+    shipments = {}
+    for i in range(number):
+        date = start + timedelta(days=random.randrange(30))
+        shipments['T%s' % i] = [
+            date.strftime('%Y-%m-%d'), 'A%s' % random.randrange(5), 'AAR']
+    transport = LocalTransport(shipments)
+
+    class LocalGeodis(Geodis):
+        rest_ws = transport
+
+    poller = GeodisTrackingPoller(
+        LocalGeodis(), {'login': 'l', 'password': 'p'}, min_interval=3600)
+    now = [0]
+    poller.clock = lambda: now[0]
+    for tracking_id, (date, agency, __) in shipments.items():
+        poller.add(tracking_id, date, agency)
+    print('cycle  get_tracking  poll: requests     rows  changes  seconds')
+    for cycle in range(6):
+        open_shipments = [
+            tracking_id for tracking_id, shipment in shipments.items()
+            if shipment[2] != 'LIV']
+        for tracking_id in random.sample(
+                open_shipments, len(open_shipments) // 50):
+            shipments[tracking_id][2] = random.choice(['LIV', 'CFM'])
+        transport.count = transport.rows = 0
+        begin = time.time()
+        changes = poller.poll()
+        print('%5s  %12s  %14s  %7s  %7s  %7.2f' % (
+            cycle, len(open_shipments), transport.count, transport.rows,
+            len(changes), time.time() - begin))
+        now[0] += 3600
+
+
+if __name__ == '__main__':
+    main()
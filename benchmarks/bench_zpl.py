@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Labels per second converted from png to zpl.
+
+Usage: python benchmarks/bench_zpl.py [number]
+
+The png is a 4x6 inches label at 203 dpi (like DPD's), rotated
+as DpdDecoder does. "zplgrf" is what png_to_zpl() used to do
+(png re-encoded after rotation, GRF built pixel by pixel,
+^GFA extracted from ~DG with a regex), "roulier.zpl" is the
+current png_to_zpl().
+"""
+from __future__ import print_function
+from io import BytesIO
+import base64
+import re
+import sys
+import timeit
+
+from PIL import Image, ImageDraw
+from zplgrf import GRF
+
+from roulier.ws_tools import png_to_zpl
+
+
+def label_png():
+    image = Image.new('L', (1218, 812), 255)
+    draw = ImageDraw.Draw(image)
+    for x in range(40, 700, 9):
+        draw.rectangle([x, 40, x + x % 4, 300], fill=0)
+    draw.rectangle([20, 20, 1198, 792], outline=0)
+    for y in range(350, 780, 24):
+        draw.rectangle([40, y, 40 + y % 700, y + 14], fill=0)
+    for x in range(800, 1180):
+        draw.line([x, 350, x, 780], fill=(x - 800) * 255 // 380)
+    png = BytesIO()
+    image.save(png, 'PNG')
+    return base64.b64encode(png.getvalue())
+
+
+def zplgrf_png_to_zpl(png):
+    rotated = BytesIO()
+    Image.open(BytesIO(base64.b64decode(png))).rotate(
+        90, expand=True).save(rotated, format='PNG')
+    zpl = GRF.from_image(rotated.getvalue(), 'DEMO').to_zpl_line(
+        compression=2)
+    m = re.search(r'\~DGR:DEMO.GRF,(\d+),(\d+),(.*)$', zpl)
+    return '^XA^FO00,00\n^GFA,%s,%s,%s,,%s^XZ' % (
+        m.group(1), m.group(1), m.group(2), m.group(3))
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    png = label_png()
+    assert zplgrf_png_to_zpl(png) == png_to_zpl(png, True)
+    before = timeit.timeit(
+        lambda: zplgrf_png_to_zpl(png), number=number) / number
+    after = timeit.timeit(
+        lambda: png_to_zpl(png, True), number=number) / number
+    print('zplgrf      %8.1f labels/s' % (1 / before))
+    print('roulier.zpl %8.1f labels/s  x%.1f' % (1 / after, before / after))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""Asyncio counterpart of carriers and transports.
+
+Python 3 only, requires aiohttp (pip install roulier[aio]).
+
+    from roulier import roulier
+    from roulier.aio import AioCarrier
+
+    async with AioCarrier(roulier.get('laposte')) as laposte:
+        label = await laposte.get_label(data)
+
+Requests are encoded and responses decoded by the carrier
+(see Carrier.pipeline()): only http calls are made with aiohttp,
+many calls can be made at the same time in one event loop.
+"""
+from datetime import timedelta
+import asyncio
+import logging
+
+import aiohttp
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from . import tracing
+from .transport import Transport
+
+log = logging.getLogger(__name__)
+
+try:
+    get_running_loop = asyncio.get_running_loop
+except AttributeError:  # python 3.6
+    get_running_loop = asyncio.get_event_loop
+
+
+class AioResponse(object):
+    """A read aiohttp response, like a Requests.response.
+
+    Transport.handle_response() can use it.
+    """
+
+    def __init__(self, url, status_code, headers, content, elapsed):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.elapsed = elapsed
+        self.encoding = get_encoding_from_headers(headers)
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', 'replace')
+
+
+class AioTransport(object):
+    """Send the requests of a Transport with aiohttp.
+
+    The transport builds the requests and handles the responses
+    (see Transport.prepare_request()), its cache answers first
+    (see Transport.cached_result()).
+    """
+
+    def __init__(self, transport, session):
+        self.transport = transport
+        self.session = session
+
+    async def send(self, payload):
+        """Coroutine counterpart of Transport.send()."""
+        transport = self.transport
+        result = transport.cached_result(payload)
+        if result is not None:
+            return result
+        request = transport.prepare_request(payload)
+        response = await self.post(request)
+        log.info('WS response time %s' % response.elapsed.total_seconds())
+        result = transport.handle_response(response)
+        transport.cache_result(payload, result)
+        return result
+
+    async def post(self, request):
+        """Coroutine counterpart of Transport.post()."""
+        loop = get_running_loop()
+        start = loop.time()
+        async with self.session.post(
+                request['url'], headers=request['headers'],
+                data=request['data']) as resp:
+            content = await resp.read()
+        headers = CaseInsensitiveDict()
+        for key, value in resp.headers.items():
+            if key in headers:
+                # like Requests
+                value = '%s, %s' % (headers[key], value)
+            headers[key] = value
+        return AioResponse(
+            str(resp.url), resp.status, headers, content,
+            timedelta(seconds=loop.time() - start))
+
+
+class AioCarrier(object):
+    """Run actions of a carrier in coroutines.
+
+    params:
+        carrier: a Carrier (like roulier.get('laposte'))
+        session: aiohttp.ClientSession, created (and closed)
+            by AioCarrier if not given
+        limit: max number of connections of the created session
+    """
+
+    def __init__(self, carrier, session=None, limit=100):
+        self.carrier = carrier
+        self.limit = limit
+        self._session = session
+        self._own_session = session is None
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.limit))
+        return self._session
+
+    async def close(self):
+        """Close the session if created by AioCarrier."""
+        if self._own_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def get(self, data, action):
+        """Coroutine counterpart of Carrier.get()."""
+        encode, transport, decode = self.carrier.pipeline(action)
+        carrier = type(self.carrier).__name__.lower()
+        with tracing.span('encode', carrier=carrier, action=action):
+            payload = encode(data)
+        if type(transport).prepare_request is Transport.prepare_request:
+            # no http call (like edi or dummy)
+            response = transport.send(payload)
+        else:
+            response = await AioTransport(transport, self.session).send(
+                payload)
+        with tracing.span('decode', carrier=carrier, action=action):
+            return decode(payload, response)
+
+    async def get_label(self, data):
+        """Coroutine counterpart of Carrier.get_label()."""
+        return await self.get(data, self.carrier.LABEL_ACTION)
+
+    async def get_tracking(self, data):
+        """Coroutine counterpart of get_tracking() (Geodis)."""
+        return await self.get(data, 'tracking')
@@ -1,82 +1,68 @@
 # -*- coding: utf-8 -*-
 """API interface."""
+from copy import deepcopy
 from cerberus import Validator
-from unidecode import unidecode
+from cerberus.schema import DefinitionSchema
+
+from . import tracing
+from .fast_validator import FastValidator
+from .sanitize import ACCENTS, ZPL
 
 
 class MyValidator(Validator):
     """Custom validator."""
 
+    def _normalize_default(self, mapping, schema, field):
+        """Set a copy of the default value.
+
+        Schemas are shared (see Api.api_schema()): a mutable default
+        like a list of parcels must not end up in the document.
+
+        The rule's arguments are validated against this schema:
+        {'nullable': True}
+        """
+        mapping[field] = deepcopy(schema[field]['default'])
+
     def _normalize_coerce_zpl(self, value):
         """Sanitze input for ZPL.
 
         Remove ZPL ctrl caraters
         Remove accents
+        (see roulier.sanitize.ZPL)
         """
-        if not isinstance(value, basestring):
-            return value
-
-        ctrl_cars = [
-            0xFE,  # Tilde ~
-            0x5E,  # Caret ^
-            0x1E,  # RS (^ substitution)
-            0x10,  # DLE (~ substitution)
-        ]
-        val = unidecode(value)
-        for ctrl in ctrl_cars:
-            val = val.replace("%c" % ctrl, "")
-        return val
+        return ZPL(value)
 
     def _normalize_coerce_accents(self, value):
-        """Sanitize accents for some WS."""
-        if not isinstance(value, basestring):
-            return value
-        sanitized = (
-            value
-            # quick and dirty replacement
-            # of common accentued chars in french
-            # because some ws don't handle well utf8
-            .replace(u"é", "e")
-            .replace(u"è", "e")
-            .replace(u"ë", "e")
-            .replace(u"ê", "e")
-            .replace(u"ô", "o")
-            .replace(u"ï", "i")
-            .replace(u"ö", "o")
-            .replace(u"à", "a")
-            .replace(u"â", "a")
-            .replace(u"ç", "c")
-            .replace(u"û", "u")
-            .replace(u"ù", "u")
-            .replace(u"É", "E")
-            .replace(u"È", "E")
-            .replace(u"Ë", "E")
-            .replace(u"Ê", "E")
-            .replace(u"Ô", "O")
-            .replace(u"Ï", "I")
-            .replace(u"Ö", "O")
-            .replace(u"À", "A")
-            .replace(u"Â", "A")
-            .replace(u"Ç", "C")
-            .replace(u"Û", "U")
-            .replace(u"Ù", "U")
-            .replace(u"œ", "oe")
-            .replace(u"Œ", "OE")
-        ).encode('ascii', 'ignore') # cut remaining chars
-        return sanitized
+        """Sanitize accents for some WS.
+
+        (see roulier.sanitize.ACCENTS)
+        """
+        return ACCENTS(value)
 
 
 class Api(object):
     """Define expected fields of carriers.
 
     This class should be overriden by each carrier.
+
+    The schema is built once per class and shared by every instance
+    (see api_schema()).
     """
 
+    # compiled schemas, keyed by Api class
+    _compiled_schemas = {}
+    # compiled FastValidator, keyed by Api class
+    _fast_validators = {}
+
+    # how input is validated and normalized:
+    # 'cerberus' or 'fast' (see roulier.fast_validator)
+    validator_engine = 'cerberus'
+
     def __init__(self):
         """."""
 
     def _validator(self):
-        v = MyValidator()
+        v = MyValidator(self._compiled_schema())
         v.allow_unknown = True
         # v.purge_unknown = True
         return v
@@ -154,6 +140,43 @@ class Api(object):
             'to_address': self._to_address(),
         }
 
+    @classmethod
+    def invalidate_schema(cls):
+        """Forget the compiled schema of this class and its subclasses.
+
+        Call it if a subclass changes its schemas at runtime:
+        the schema will be rebuilt on next use.
+        """
+        for cache in (Api._compiled_schemas, Api._fast_validators):
+            for klass in list(cache):
+                if issubclass(klass, cls):
+                    cache.pop(klass, None)
+
+    def _compiled_schema(self):
+        """Return the cerberus schema of this class.
+
+        Built (and checked by cerberus) on first call only.
+        """
+        klass = type(self)
+        compiled = Api._compiled_schemas.get(klass)
+        if compiled is None:
+            compiled = DefinitionSchema(MyValidator(), self._build_schema())
+            compiled = Api._compiled_schemas.setdefault(klass, compiled)
+        return compiled
+
+    def _fast_validator(self):
+        """Return the FastValidator of this class.
+
+        Compiled from api_schema() on first call only.
+        """
+        klass = type(self)
+        compiled = Api._fast_validators.get(klass)
+        if compiled is None:
+            compiled = FastValidator(
+                self.api_schema(), MyValidator(), allow_unknown=True)
+            compiled = Api._fast_validators.setdefault(klass, compiled)
+        return compiled
+
     def api_schema(self):
         """Return the expected schema of the api.
 
@@ -164,8 +187,14 @@ class Api(object):
 
         See http://docs.python-cerberus.org/en/stable/schemas.html
 
+        The returned dict is shared by all instances of the class:
+        copy it before modifying it.
         """
-        v = self._validator()
+        return self._compiled_schema().schema
+
+    def _build_schema(self):
+        """Build the schema from _schemas()."""
+        v = MyValidator()
         schemas = self._schemas()
 
         def wrap_schema(schema):
@@ -195,8 +224,10 @@ class Api(object):
 
     def errors(self, data):
         """Return validation errors."""
+        if self.validator_engine == 'fast':
+            return self._fast_validator().validated(data)[1]
         v = self._validator()
-        v.validate(data, self.api_schema())
+        v.validate(data)
         return v.errors
 
     def validate(self, data):
@@ -206,11 +237,47 @@ class Api(object):
 
         See also errors()
         """
-        return self._validator().validate(data, self.api_schema())
+        if self.validator_engine == 'fast':
+            return not self._fast_validator().validated(data)[1]
+        return self._validator().validate(data)
+
+    def process(self, data):
+        """Normalize then validate data.
+
+        Faster than validate() then normalize(): the document is
+        normalized once, the normalized document is validated.
+        Both stages have their span: 'normalize' and 'validate'.
+
+        returns: (normalized dict, None) if data is valid
+            (None, errors) otherwise, errors like errors()
+        """
+        api = type(self).__name__
+        if self.validator_engine == 'fast':
+            validator = self._fast_validator()
+            with tracing.span('normalize', api=api):
+                document, errors_list = validator.normalize(data)
+            with tracing.span('validate', api=api):
+                errors = validator.validate(document, errors_list)
+            if errors:
+                return None, errors
+            return document, None
+        v = self._validator()
+        with tracing.span('normalize', api=api):
+            document = v.normalized(data)
+        with tracing.span('validate', api=api):
+            if document is None:
+                # errors while normalizing: report them with the others
+                v.validate(data)
+            elif v.validate(document, normalize=False):
+                return v.document, None
+            return None, v.errors
 
     def normalize(self, data):
         """Retrurn a normalized dict based on input.
 
         See http://docs.python-cerberus.org/en/stable/usage.html
         """
-        return self._validator().normalized(data, self.api_schema())
+        with tracing.span('normalize', api=type(self).__name__):
+            if self.validator_engine == 'fast':
+                return self._fast_validator().normalized(data)
+            return self._validator().normalized(data)
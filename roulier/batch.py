@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""Run a function on many inputs with a pool of threads.
+
+Used to send many requests to a carrier concurrently:
+threads spend their time waiting for the network.
+
+imap_processes() uses a pool of processes instead, for work
+spending its time in python (like encoding big edi files).
+"""
+from collections import deque, namedtuple
+import multiprocessing
+import threading
+
+try:
+    from queue import Queue
+except ImportError:  # python 2
+    from Queue import Queue
+
+
+class BatchResult(
+        namedtuple('BatchResult', ['index', 'data', 'result', 'error'])):
+    """Result of a call in a batch.
+
+    index: position of data in the input iterable
+    data: the input
+    result: returned value (None if an exception was raised)
+    error: the exception raised (None if the call succeeded)
+    """
+
+    __slots__ = ()
+
+
+def _worker(func, tasks, results, stop):
+    while True:
+        task = tasks.get()
+        if task is None or stop.is_set():
+            return
+        index, data = task
+        try:
+            result = BatchResult(index, data, func(data), None)
+        except Exception as e:
+            result = BatchResult(index, data, None, e)
+        except BaseException as e:
+            # KeyboardInterrupt, SystemExit...: raised by imap()
+            results.put(BatchResult(index, data, None, e))
+            return
+        results.put(result)
+
+
+def imap(func, iterable, max_workers=4, ordered=True, max_pending=None):
+    """Call func on each item of iterable in a pool of threads.
+
+    An exception raised by func does not stop the batch:
+    it is returned in the BatchResult of the item (but
+    KeyboardInterrupt, SystemExit... are raised here).
+
+    The iterable is consumed lazily: at most max_pending items are
+    being processed or waiting to be yielded at any time,
+    so memory stays flat even with a huge iterable.
+
+    params:
+        func: function called with one item
+        iterable: inputs
+        max_workers: number of threads
+        ordered: yield results in input order if True, as soon
+            as they are done otherwise
+        max_pending: default to 2 * max_workers
+
+    yields: BatchResult
+    """
+    if max_workers < 1:
+        raise ValueError('max_workers must be at least 1')
+    max_pending = max(max_pending or 2 * max_workers, max_workers)
+    tasks = Queue()
+    results = Queue()
+    stop = threading.Event()
+    workers = []
+    for _ in range(max_workers):
+        worker = threading.Thread(
+            target=_worker, args=(func, tasks, results, stop))
+        worker.daemon = True
+        worker.start()
+        workers.append(worker)
+
+    inputs = enumerate(iterable)
+    exhausted = False
+    pending = 0  # submitted but not yielded yet
+    done = {}  # ordered mode: results waiting for previous ones
+    next_index = 0
+    try:
+        while True:
+            while not exhausted and pending < max_pending:
+                try:
+                    tasks.put(next(inputs))
+                except StopIteration:
+                    exhausted = True
+                else:
+                    pending += 1
+            if not pending:
+                return
+            result = results.get()
+            if not isinstance(result.error, (Exception, type(None))):
+                raise result.error
+            if not ordered:
+                pending -= 1
+                yield result
+                continue
+            done[result.index] = result
+            while next_index in done:
+                pending -= 1
+                next_index += 1
+                yield done.pop(next_index - 1)
+    finally:
+        # let running calls finish in background, skip queued ones
+        stop.set()
+        for _ in workers:
+            tasks.put(None)
+
+
+def imap_processes(func, iterable, processes=None, max_pending=None):
+    """Call func on each item of iterable in a pool of processes.
+
+    Results are yielded in the order of iterable. Unlike imap(),
+    an exception raised by func stops the batch (it is raised
+    here). func must be defined at module level and items and
+    results must be picklable.
+
+    The iterable is consumed lazily: at most max_pending items are
+    sent to the processes or waiting to be yielded at any time.
+
+    params:
+        func: function called with one item
+        iterable: inputs
+        processes: number of processes, default to the number of cpus
+        max_pending: default to 2 * processes
+
+    yields: results of func
+    """
+    processes = processes or multiprocessing.cpu_count()
+    if processes < 1:
+        raise ValueError('processes must be at least 1')
+    max_pending = max(max_pending or 2 * processes, 1)
+    pool = multiprocessing.Pool(processes)
+    pending = deque()
+    try:
+        for item in iterable:
+            pending.append(pool.apply_async(func, (item,)))
+            if len(pending) >= max_pending:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        pool.terminate()
+        pool.join()
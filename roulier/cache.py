@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""Bounded caches of computed values (like converted labels).
+
+Two backends with the same interface:
+- LRUCache: in the process, the least recently used values are
+  dropped beyond maxsize entries
+- DiskCache: files in a directory that can be shared by processes
+  (workers of a server...), the least recently used files are
+  removed beyond max_bytes
+
+TTLCache wraps a backend: its values expire after a time to
+live (values can also be kept until dropped by the backend).
+
+    cache = LRUCache(maxsize=64)
+    zpl = cache.fetch(content_key(png, rotate), convert, png, rotate)
+    cache.stats()  # {'hits': .., 'misses': .., 'size': .., ...}
+
+Keys are str, content_key() hashes the content of the input
+(and options) so that identical inputs share a value.
+"""
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+def content_key(data, *options):
+    """Key of a content (bytes or text) and options (like rotate).
+
+    return: str (hex digest)
+    """
+    if not isinstance(data, bytes):
+        data = data.encode('utf-8')
+    digest = hashlib.sha1(data)
+    if options:
+        digest.update(repr(options).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class Cache(object):
+    """Base of the caches: counts hits and misses.
+
+    Subclasses implement _get() (raises KeyError), _set(),
+    clear() and __len__().
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def _get(self, key):
+        raise NotImplementedError()
+
+    def _set(self, key, value):
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key, default=None):
+        """Return the value of key, or default (counted as a miss)."""
+        try:
+            value = self._get(key)
+        except KeyError:
+            self._count(False)
+            return default
+        self._count(True)
+        return value
+
+    def set(self, key, value):
+        self._set(key, value)
+
+    def fetch(self, key, func, *args, **kwargs):
+        """Return the value of key, computed by func(*args, **kwargs)
+        and stored if missing.
+
+        (a value computed by two threads at once is stored twice)
+        """
+        try:
+            value = self._get(key)
+        except KeyError:
+            self._count(False)
+            value = func(*args, **kwargs)
+            self._set(key, value)
+            return value
+        self._count(True)
+        return value
+
+    def stats(self):
+        """Return a dict: hits, misses, size (entries) and limits."""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self)}
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.hits = self.misses = 0
+
+
+class LRUCache(Cache):
+    """In-process cache of maxsize entries at most (thread-safe)."""
+
+    def __init__(self, maxsize=128):
+        super(LRUCache, self).__init__()
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            # most recently used last
+            value = self._data.pop(key)
+            self._data[key] = value
+        return value
+
+    def _set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        stats = super(LRUCache, self).stats()
+        stats['maxsize'] = self.maxsize
+        return stats
+
+
+class DiskCache(Cache):
+    """Cache of values in a directory (one file per key).
+
+    Values are bytes, text or JSON serializable (lists, dicts...:
+    tuples are read back as lists); they are stored as such, not
+    pickled, so that reading a file never runs code.
+
+    Files are written atomically (renamed once complete) so the
+    directory can be shared by processes; reading a file updates
+    its modification time, files modified least recently are
+    removed when the directory is over max_bytes.
+
+    The directory is made readable by its owner only: processes
+    sharing it are trusted (a value written there is returned
+    as is, like a label to print).
+    """
+
+    suffix = '.cache'
+
+    # first byte of a file: type of the value
+    BYTES, TEXT, JSON = b'b', b't', b'j'
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024):
+        super(DiskCache, self).__init__()
+        self.directory = directory
+        self.max_bytes = max_bytes
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory, 0o700)
+            except OSError:  # made by another process
+                if not os.path.isdir(directory):
+                    raise
+        # bytes written since the directory was last scanned,
+        # files of other processes are only seen by _evict()
+        self._size = self._total_size()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def _files(self):
+        """Return [(mtime, size, path)] of the cache files."""
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:  # removed by another process
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _total_size(self):
+        return sum(size for __, size, __ in self._files())
+
+    def dumps(self, value):
+        """Return the content of the file of value (bytes)."""
+        if isinstance(value, bytes):
+            return self.BYTES + value
+        if isinstance(value, type(u'')):
+            return self.TEXT + value.encode('utf-8')
+        return self.JSON + json.dumps(value).encode('utf-8')
+
+    def loads(self, data):
+        """Return the value of the content of a file (raises
+        ValueError if unknown)."""
+        kind, data = data[:1], data[1:]
+        if kind == self.BYTES:
+            return data
+        if kind == self.TEXT:
+            return data.decode('utf-8')
+        if kind == self.JSON:
+            return json.loads(data.decode('utf-8'))
+        raise ValueError('Unknown cache file')
+
+    def _get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as cache_file:
+                value = self.loads(cache_file.read())
+            os.utime(path, None)
+        except (IOError, OSError, ValueError):
+            # missing, removed meanwhile or unreadable
+            raise KeyError(key)
+        return value
+
+    def _set(self, key, value):
+        data = self.dumps(value)
+        path = self._path(key)
+        handle, temp_path = tempfile.mkstemp(
+            dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                temp_file.write(data)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.rename(temp_path, path)
+        except OSError:
+            # windows does not replace files: keep the other one
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self._size += len(data) - replaced
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        files = sorted(self._files())
+        size = sum(file_size for __, file_size, __ in files)
+        for __, file_size, path in files:
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:  # removed by another process
+                pass
+            size -= file_size
+        self._size = size
+
+    def clear(self):
+        for __, __, path in self._files():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._size = 0
+
+    def __len__(self):
+        return len(self._files())
+
+    def stats(self):
+        stats = super(DiskCache, self).stats()
+        stats['bytes'] = self._total_size()
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+
+class TTLCache(Cache):
+    """Cache of values expiring after ttl seconds, in a backend.
+
+    Subclasses can give a ttl to each value (ttl_of()); a value
+    with a ttl of None does not expire, it is kept until the
+    backend drops it (maxsize, max_bytes).
+
+    params:
+        backend: LRUCache, DiskCache...
+        ttl: seconds
+    """
+
+    def __init__(self, backend, ttl=300):
+        super(TTLCache, self).__init__()
+        self.backend = backend
+        self.ttl = ttl
+        self.expired = 0
+
+    def clock(self):
+        return time.time()
+
+    def ttl_of(self, value):
+        """Return the time to live of value (None: no expiry)."""
+        return self.ttl
+
+    def _get(self, key):
+        expires, value = self.backend._get(key)
+        if expires is not None and expires <= self.clock():
+            with self._stats_lock:
+                self.expired += 1
+            raise KeyError(key)
+        return value
+
+    def _set(self, key, value):
+        ttl = self.ttl_of(value)
+        expires = ttl if ttl is None else self.clock() + ttl
+        self.backend._set(key, (expires, value))
+
+    def clear(self):
+        self.backend.clear()
+
+    def __len__(self):
+        return len(self.backend)
+
+    def stats(self):
+        """Return the stats of the backend, with hits, misses,
+        expired (misses of an expired value) and ttl."""
+        stats = self.backend.stats()
+        stats.update({
+            'hits': self.hits, 'misses': self.misses,
+            'expired': self.expired, 'ttl': self.ttl})
+        return stats
+
+    def reset_stats(self):
+        super(TTLCache, self).reset_stats()
+        with self._stats_lock:
+            self.expired = 0
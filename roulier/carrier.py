@@ -2,12 +2,19 @@
 """Carrier interface."""
 import abc
 
+from . import tracing
+from .batch import imap
+from .exception import InvalidAction
+
 
 class Carrier(object):
     """Carrier interface."""
 
     __metaclass__ = abc.ABCMeta
 
+    # action of get_label()
+    LABEL_ACTION = None
+
     @abc.abstractmethod
     def api(self):
         """Expose how to communicate with a carrier implementation."""
@@ -17,3 +24,44 @@ class Carrier(object):
     def get(self, action):
         """Invoke an action for a carrier."""
         return
+
+    def pipeline(self, action):
+        """Return the steps of an action: (encode, transport, decode).
+
+        encode(data): returns the payload for transport.send()
+        transport: a roulier.transport.Transport
+        decode(payload, response): returns the result of the action
+
+        get() runs these steps; the http call can be made
+        by something else (see roulier.aio).
+        """
+        raise InvalidAction("Action not supported")
+
+    def _run(self, data, action):
+        """Run the steps of pipeline() (see roulier.tracing)."""
+        encode, transport, decode = self.pipeline(action)
+        with tracing.span(
+                'get', carrier=type(self).__name__.lower(), action=action):
+            with tracing.span('encode'):
+                payload = encode(data)
+            response = transport.send(payload)
+            with tracing.span('decode'):
+                return decode(payload, response)
+
+    def get_labels(self, iterable, max_workers=4, ordered=True):
+        """Get many labels, with concurrent requests.
+
+        Errors (like InvalidApiInput or CarrierError) don't stop
+        the batch: they are in the error field of the result.
+
+        params:
+            iterable: data for get_label(), consumed lazily
+            max_workers: max number of requests at the same time
+            ordered: yield in the order of iterable if True,
+                as soon as a label is received otherwise
+        yields: roulier.batch.BatchResult
+            (index, data, result of get_label(), error)
+        """
+        return imap(
+            self.get_label, iterable, max_workers=max_workers,
+            ordered=ordered)
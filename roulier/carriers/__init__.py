@@ -1,6 +1,2 @@
 # -*- coding: utf-8 -*-
-from . import laposte
-from . import dummy
-from . import geodis
-from . import dummy
-from . import dpd
+# carriers are imported on first use (see roulier.roulier)
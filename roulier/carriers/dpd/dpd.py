@@ -10,6 +10,8 @@ from roulier.carrier import Carrier
 class Dpd(Carrier):
     """Implementation for Dpd."""
 
+    LABEL_ACTION = 'createShipmentWithLabels'
+
     encoder = DpdEncoder()
     decoder = DpdDecoder()
     ws = DpdTransport()
@@ -20,12 +22,19 @@ class Dpd(Carrier):
 
     def get(self, data, action):
         """Run an action with data against Dpd WS."""
-        request = self.encoder.encode(data, action)
-        response = self.ws.send(request)
-        return self.decoder.decode(
-            response['body'], request['output_format'])
+        return self._run(data, action)
+
+    def pipeline(self, action):
+        """See Carrier.pipeline()."""
+        def encode(data):
+            return self.encoder.encode(data, action)
+
+        def decode(request, response):
+            return self.decoder.decode(
+                response['body'], request['output_format'])
+        return encode, self.ws, decode
 
     # shortcuts
     def get_label(self, data):
         """Genereate a createShipmentWithLabels."""
-        return self.get(data, 'createShipmentWithLabels')
+        return self.get(data, self.LABEL_ACTION)
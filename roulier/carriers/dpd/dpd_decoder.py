@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """Dpd XML -> Python."""
 from lxml import objectify
+from roulier.cache import LRUCache
 from roulier.codec import Decoder
 from roulier import ws_tools as tools
 import base64
@@ -9,6 +10,10 @@ import base64
 class DpdDecoder(Decoder):
     """Dpd XML -> Python."""
 
+    # converted labels (reprints), shared by decoders;
+    # can be replaced by a roulier.cache.DiskCache or None
+    zpl_cache = LRUCache(maxsize=64)
+
     def decode(self, body, output_format):
         """Dpd XML -> Python."""
         def create_shipment_with_labels(msg):
@@ -64,6 +69,6 @@ class DpdDecoder(Decoder):
         This function rotate it and convert it an suitable zpl format
         """
         if label_format == 'ZPL':
-            return tools.png_to_zpl(png, True)
+            return tools.png_to_zpl(png, True, cache=self.zpl_cache)
         else:
             return base64.b64decode(png)
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """Transform input to dpd compatible xml."""
-from jinja2 import Environment, PackageLoader
 from roulier.codec import Encoder
+from roulier.jinja_env import get_environment
 from datetime import datetime
 from .dpd_api import DpdApi
 from roulier.exception import InvalidApiInput
@@ -21,10 +21,9 @@ class DpdEncoder(Encoder):
                 'action %s not in %s' % (action, ', '.join(DPD_ACTIONS)))
 
         api = DpdApi()
-        if not api.validate(api_input):
-            raise InvalidApiInput(
-                'Input error : %s' % api.errors(api_input))
-        data = api.normalize(api_input)
+        data, errors = api.process(api_input)
+        if errors:
+            raise InvalidApiInput('Input error : %s' % errors)
 
         # add some rules which are hard to implement with
         # cerberus.
@@ -81,10 +80,7 @@ class DpdEncoder(Encoder):
             # png is named Default, WTF DPD?
             data['service']['labelFormat'] = 'Default'
 
-        env = Environment(
-            loader=PackageLoader('roulier', '/carriers/dpd/templates'),
-            extensions=['jinja2.ext.with_', 'jinja2.ext.autoescape'],
-            autoescape=True)
+        env = get_environment('/carriers/dpd/templates', autoescape=True)
 
         template = env.get_template("dpd_%s.xml" % action)
         return {
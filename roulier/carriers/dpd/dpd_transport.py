@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
 """Implement dpdWS."""
-import requests
 from lxml import objectify, etree
-from jinja2 import Environment, PackageLoader
+from roulier import tracing
 from roulier.transport import Transport
+from roulier.jinja_env import get_environment
 from roulier.ws_tools import remove_empty_tags
 from roulier.exception import CarrierError
 
@@ -29,33 +29,42 @@ class DpdTransport(Transport):
                 body: XML response (without soap)
             }
         """
-        body = payload['body']
-        headers = payload['headers']
-        soap_message = self.soap_wrap(body, headers)
-        log.debug(soap_message)
-        response = self.send_request(soap_message)
+        request = self.prepare_request(payload)
+        log.debug(request['data'])
+        response = self.post(request)
         log.info('WS response time %s' % response.elapsed.total_seconds())
         return self.handle_response(response)
 
+    def prepare_request(self, payload):
+        """Build the http request of a payload (see send())."""
+        soap_message = self.soap_wrap(payload['body'], payload['headers'])
+        return self.http_request(soap_message)
+
+    def http_request(self, body):
+        """Url, headers and data to send body to dpd WS."""
+        return {
+            'url': self.url(self.DPD_WS),
+            'headers': {'content-type': 'text/xml'},
+            'data': body,
+        }
+
     def soap_wrap(self, body, auth):
         """Wrap body in a soap:Enveloppe."""
-        env = Environment(
-            loader=PackageLoader('roulier', '/carriers/dpd/templates'),
-            extensions=['jinja2.ext.with_'])
+        with tracing.span('soap_wrap') as span:
+            env = get_environment('/carriers/dpd/templates')
 
-        template = env.get_template("dpd_soap.xml")
-        body_stripped = remove_empty_tags(body)
-        header_template = env.get_template("dpd_header.xml")
-        header_xml = header_template.render(auth=auth)
-        data = template.render(body=body_stripped, header=header_xml)
-        return data.encode('utf8')
+            template = env.get_template("dpd_soap.xml")
+            body_stripped = remove_empty_tags(body)
+            header_template = env.get_template("dpd_header.xml")
+            header_xml = header_template.render(auth=auth)
+            data = template.render(
+                body=body_stripped, header=header_xml).encode('utf8')
+            span.set('size', len(data))
+        return data
 
     def send_request(self, body):
         """Send body to dpd WS."""
-        return requests.post(
-            self.DPD_WS,
-            headers={'content-type': 'text/xml'},
-            data=body)
+        return self.post(self.http_request(body))
 
     def handle_500(self, response):
         """Handle reponse in case of ERROR 500 type."""
@@ -73,8 +82,9 @@ class DpdTransport(Transport):
             obj = objectify.fromstring(response_xml)
             return obj.Body.getchildren()[0]
 
-        body = extract_soap(response.content)
-        body_xml = etree.tostring(body)
+        content = response.content
+        with tracing.span('xml', size=len(content)):
+            body_xml = etree.tostring(extract_soap(content))
         return {
             "body": body_xml,
             "response": response,
@@ -9,6 +9,8 @@ from roulier.carrier import Carrier
 class Dummy(Carrier):
     """Implementation for dummy."""
 
+    LABEL_ACTION = 'generateLabel'
+
     encoder = DummyEncoder()
     decoder = DummyDecoder()
     ws = DummyTransport()
@@ -19,14 +21,20 @@ class Dummy(Carrier):
 
     def get(self, data, action):
         """Run an action with data against Laposte WS."""
-        request = self.encoder.encode(data, action)
-        response = self.ws.send(request)
+        return self._run(data, action)
+
+    def pipeline(self, action):
+        """See Carrier.pipeline()."""
+        def encode(data):
+            return self.encoder.encode(data, action)
 
-        if not response['payload']:
-            return response
-        return self.decoder.decode(response['payload'])
+        def decode(request, response):
+            if not response['payload']:
+                return response
+            return self.decoder.decode(response['payload'])
+        return encode, self.ws, decode
 
     # shortcuts
     def get_label(self, data):
         """Generate a label."""
-        return self.get(data, 'generateLabel')
+        return self.get(data, self.LABEL_ACTION)
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """Transform input to dummy zpl."""
-from jinja2 import Environment, PackageLoader
 from roulier.codec import Encoder
+from roulier.jinja_env import get_environment
 from roulier.exception import InvalidApiInput
 from .dummy_api import DummyApi
 
@@ -18,22 +18,19 @@ class DummyEncoder(Encoder):
                 'action %s not in %s' % (action, ', '.join(DUMMY_ACTIONS)))
 
         api = DummyApi()
-        if not api.validate(api_input):
-            raise InvalidApiInput(
-                'Input error : %s' % api.errors(api_input))
-        data = api.normalize(api_input)
+        data, errors = api.process(api_input)
+        if errors:
+            raise InvalidApiInput('Input error : %s' % errors)
 
         data['to_address']['dept'] = data['to_address']['zip'][0:2]
 
-        env = Environment(
-            loader=PackageLoader('roulier', '/carriers/dummy/templates'),
-            extensions=['jinja2.ext.with_'])
+        env = get_environment('/carriers/dummy/templates')
 
         template = env.get_template("dummy_%s.zpl" % action)
         return template.render(
             auth=data['auth'],
             service=data['service'],
-            parcel=data['parcel'],
+            parcel=data['parcels'][0],
             sender_address=data['from_address'],
             receiver_address=data['to_address'])
 
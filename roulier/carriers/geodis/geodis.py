@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """Implementation for Geodis."""
 
+from .geodis_edi_deposit import GeodisEdiDeposit
 from .geodis_encoder_edi import GeodisEncoderEdi
 from .geodis_encoder_ws import GeodisEncoderWs
 from .geodis_encoder_rest_ws import GeodisEncoderRestWs
@@ -9,6 +10,7 @@ from .geodis_decoder_rest_ws import GeodisDecoderRestWs
 from .geodis_transport_ws import GeodisTransportWs
 from .geodis_transport_edi import GeodisTransportEdi
 from .geodis_transport_rest_ws import GeodisTransportRestWs
+from .geodis_tracking_list import GeodisTrackingList
 
 from roulier.carrier import Carrier
 from roulier.exception import InvalidAction
@@ -31,6 +33,13 @@ from roulier.exception import InvalidAction
 class Geodis(Carrier):
     """Implementation for Geodis."""
 
+    LABEL_ACTION = 'label'
+
+    # shared by instances: keep connections alive between calls
+    ws = GeodisTransportWs()
+    rest_ws = GeodisTransportRestWs()
+    edi = GeodisTransportEdi()
+
     def api(self, action='label'):
         """Expose how to communicate with Geodis."""
         try:
@@ -49,12 +58,21 @@ class Geodis(Carrier):
         return method(self, data)
 
     def get_edi(self, data, api=False):
-        encoder = GeodisEncoderEdi()
-        transport = GeodisTransportEdi()
         if api:
-            return encoder.api()
-        arr = encoder.encode(data)
-        return transport.send(arr)
+            return GeodisEncoderEdi().api()
+        return self._run(data, 'edi')
+
+    def write_edi(self, data, sink, **options):
+        """Write the edi deposit slip to sink (a file-like object).
+
+        Like get_edi() but data['shipments'] can be an iterator:
+        shipments are encoded and written by chunks.
+
+        options: of GeodisEdiDeposit (split in messages,
+            encode in processes...)
+        return: number of messages
+        """
+        return GeodisEdiDeposit(**options).write(data, sink)
 
     def get_label(self, data, api=False):
         """Genereate a demandeImpressionEtiquette."""
@@ -69,31 +87,73 @@ class Geodis(Carrier):
     def get_tracking_list(self, data, api=False):
         return self._get_rest_ws(data, api, 'trackingList')
 
+    def iter_tracking_list(self, data, **options):
+        """Yield the rows of get_tracking_list() by date ranges.
+
+        The shippingDateStart to shippingDateEnd window is fetched
+        by shards, with concurrent requests; rows are yielded as
+        each shard is received.
+
+        options: of GeodisTrackingList (days of a shard,
+            max_workers...)
+        """
+        return GeodisTrackingList(**options).iter_rows(
+            data, self.pipeline('trackingList'))
+
     def _get_ws(self, data, api=False, action=None):
+        if api:
+            return GeodisEncoderWs().api(action=action)
+        return self._run(data, action)
+
+    def _get_rest_ws(self, data, api=False, action=None):
+        if api:
+            return GeodisEncoderRestWs().api(action=action)
+        return self._run(data, action)
+
+    def pipeline(self, action):
+        """See Carrier.pipeline()."""
+        if action in ('label', 'demandeImpressionEtiquette'):
+            return self._ws_pipeline('demandeImpressionEtiquette')
+        elif action == 'findLocalite':
+            return self._ws_pipeline(action)
+        elif action in ('tracking', 'trackingList'):
+            return self._rest_ws_pipeline(action)
+        elif action == 'edi':
+            return self._edi_pipeline()
+        raise InvalidAction("Action not supported")
+
+    def _ws_pipeline(self, action):
         encoder = GeodisEncoderWs()
         decoder = GeodisDecoderWs()
-        transport = GeodisTransportWs()
 
-        if api:
-            return encoder.api(action=action)
+        def encode(data):
+            return encoder.encode(data, action)
 
-        request = encoder.encode(data, action)
-        response = transport.send(request)
-        return decoder.decode(
-            response['body'],
-            response['parts'],
-            request['infos'],
-        )
+        def decode(request, response):
+            return decoder.decode(
+                response['body'],
+                response['parts'],
+                request['infos'],
+            )
+        return encode, self.ws, decode
 
-    def _get_rest_ws(self, data, api=False, action=None):
+    def _rest_ws_pipeline(self, action):
         encoder = GeodisEncoderRestWs()
-        decode = GeodisDecoderRestWs()
-        transport = GeodisTransportRestWs()
-        if api:
-            return encoder.api(action=action)
-        request = encoder.encode(data, action)
-        response = transport.send(request)
-        return decode.decode(response, action)
+        decoder = GeodisDecoderRestWs()
+
+        def encode(data):
+            return encoder.encode(data, action)
+
+        def decode(request, response):
+            return decoder.decode(response, action)
+        return encode, self.rest_ws, decode
+
+    def _edi_pipeline(self):
+        encoder = GeodisEncoderEdi()
+
+        def decode(arr, response):
+            return response
+        return encoder.encode, self.edi, decode
 
     ACTIONS = {
         'label': get_label,
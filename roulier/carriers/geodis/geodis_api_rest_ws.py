@@ -1,8 +1,26 @@
 # -*- coding: utf-8 -*-
 """Implementation of Geodis Api."""
+from copy import deepcopy
+from operator import itemgetter
+
+from roulier import tracing
 from roulier.api import Api
 
 
+def compile_mapping(schema):
+    """Compile a GeodisMappingOut schema into a function.
+
+    The function does what GeodisMappingOut.visit(data, schema)
+    does, without walking the schema: a dict comprehension per
+    dict of the schema, an itemgetter per value.
+    """
+    items = tuple(
+        (key, compile_mapping(val) if isinstance(val, dict)
+         else itemgetter(val))
+        for key, val in schema.items())
+    return lambda data: {key: get(data) for key, get in items}
+
+
 class GeodisApiRestWs(Api):
 
     def _schemas(self):
@@ -18,13 +36,19 @@ class GeodisApiRestWs(Api):
         step2 = internalApi.normalize(step1)
         return step2
 
+    def process(self, data):
+        step1, errors = super(GeodisApiRestWs, self).process(data)
+        if errors:
+            return None, errors
+        return self._interal_api().normalize(step1), None
+
     def api_values(self):
         """Return a dict containing expected keys.
 
         It's a normalized version of the schema.
         only internal api
         """
-        return self._validator().normalized({}, self.api_schema())
+        return self._validator().normalized({})
 
     def _interal_api(self):
         pass
@@ -40,7 +64,12 @@ class GeodisMappingIn(Api):
             else:
                 out[key] = val
 
-    def normalize(self, data):
+    # renames of the service, keyed by class (see _renames())
+    _compiled_renames = {}
+
+    def flat(self, data):
+        """Return data with auth and the other values flattened
+        in service (before renaming)."""
         without_auth = {
             key: val
             for (key, val) in data.items()
@@ -51,8 +80,52 @@ class GeodisMappingIn(Api):
             'service': {}
         }
         self.flatten(without_auth, flat['service'])
-        normalized = super(GeodisMappingIn, self).normalize(flat)
-        return normalized
+        return flat
+
+    def _renames(self):
+        """Return {field: new name} of the service schema.
+
+        None if the schema has other rules than rename: cerberus
+        normalizes then.
+        """
+        klass = type(self)
+        if klass not in GeodisMappingIn._compiled_renames:
+            schemas = self._schemas()
+            service = schemas.get('service', {})
+            renames = {}
+            for field, rules in service.items():
+                if set(rules) != set(['rename']):
+                    renames = None
+                    break
+                renames[field] = rules['rename']
+            if set(schemas) - set(['service']):
+                renames = None
+            GeodisMappingIn._compiled_renames[klass] = renames
+        return GeodisMappingIn._compiled_renames[klass]
+
+    @classmethod
+    def invalidate_schema(cls):
+        super(GeodisMappingIn, cls).invalidate_schema()
+        for klass in list(GeodisMappingIn._compiled_renames):
+            if issubclass(klass, cls):
+                GeodisMappingIn._compiled_renames.pop(klass, None)
+
+    def normalize(self, data):
+        flat = self.flat(data)
+        renames = self._renames()
+        if renames is None:
+            return super(GeodisMappingIn, self).normalize(flat)
+        with tracing.span('normalize', api=type(self).__name__):
+            # same result as cerberus, quirk included: a field
+            # renamed to its own name (reference1) is dropped, see
+            # test_renamed_to_itself_is_dropped
+            service = flat['service']
+            for field in tuple(service):
+                if field in renames:
+                    service[renames[field]] = service[field]
+                    del service[field]
+            flat['auth'] = deepcopy(flat['auth'])
+        return flat
 
 
 class GeodisApiTrackingListMapping(GeodisMappingIn):
@@ -138,10 +211,28 @@ class GeodisApiTrackingList(GeodisApiRestWs):
 
 class GeodisMappingOut(Api):
 
+    # compile_mapping() of schema(), keyed by class
+    _mappers = {}
+
+    def mapper(self):
+        """Return a function mapping a row like normalize()."""
+        klass = type(self)
+        mapper = GeodisMappingOut._mappers.get(klass)
+        if mapper is None:
+            mapper = GeodisMappingOut._mappers.setdefault(
+                klass, compile_mapping(self.schema()))
+        return mapper
+
+    @classmethod
+    def invalidate_schema(cls):
+        super(GeodisMappingOut, cls).invalidate_schema()
+        for klass in list(GeodisMappingOut._mappers):
+            if issubclass(klass, cls):
+                GeodisMappingOut._mappers.pop(klass, None)
+
     def normalize(self, data):
-        schema = self.schema()
         # self.add_tracking_code(data)
-        return self.visit(data, schema)
+        return self.mapper()(data)
 
     def visit(self, data, schema):
         out = {}
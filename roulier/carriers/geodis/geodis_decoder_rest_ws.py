@@ -3,6 +3,10 @@
 from roulier.codec import Decoder
 from .geodis_api_rest_ws import GeodisApiTrackingListOut
 
+# a shipment in these states won't change
+FINAL_STATES = ('DELIVERED', 'RETURNED')
+
+
 class GeodisDecoderRestWs(Decoder):
     """Geodis XML -> Python."""
 
@@ -13,13 +17,12 @@ class GeodisDecoderRestWs(Decoder):
         """
         body = payload['body']
         if action == 'trackingList':
-            mapping = GeodisApiTrackingListOut()
+            mapper = GeodisApiTrackingListOut().mapper()
+            add_tracking_code = self.add_tracking_code
             formatted = []
             for line in body:
-                self.add_tracking_code(line)
-                formatted.append(
-                    mapping.normalize(line)
-                )
+                add_tracking_code(line)
+                formatted.append(mapper(line))
         else:
             # NOT implemented
             formatted = body
@@ -28,20 +31,25 @@ class GeodisDecoderRestWs(Decoder):
 
 
     def add_tracking_code(self, data):
+        data['status'] = self.tracking_status(data['codeSituation'])
+
+    @staticmethod
+    def tracking_status(code):
+        """Return the status of a codeSituation."""
         # MVL: mise en livraison
         # AAR: en cours acheminement
         # None: en attente prise en charge
         # LIV: livré
         # CFM: conforme
-        if data['codeSituation'] == 'LIV':
+        if code == 'LIV':
             state = 'DELIVERED'
-        elif data['codeSituation'] == 'SOL':
+        elif code == 'SOL':
             state = 'RETURNED'
-        elif data['codeSituation'] in ('MLV', 'AAR'):
+        elif code in ('MLV', 'AAR'):
             state = 'TRANSIT'
         else:
             state = 'UNKNOWN'
-        data['status'] = state
+        return state
 
 # CODES=
 # 'UNKNOWN',
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """Geodis XML -> Python."""
 from roulier.codec import Decoder
+from roulier.labels import Labels
 from .geodis_common_ws import GEODIS_INFOS
 
 
@@ -12,9 +13,8 @@ class GeodisDecoderWs(Decoder):
 
         def reponse_impression_etiquette(msg, parts):
             output_format = infos["output_format"]
-            labels = '^XZ•^XA'.join(parts.split('^XZ\r\n^XA')).split('•')
-            labels_idx = iter(range(len(labels)))
-            labels_data = iter(labels)
+            # one label per parcel
+            labels = Labels(parts)
             return {
                 "tracking": {
                     "number": body.cabRouting,
@@ -30,11 +30,11 @@ class GeodisDecoderWs(Decoder):
                     "number": getattr(colis, 'cab', ''),
                     "reference": getattr(colis, 'cabclt', ''),
                     "label": {
-                        "name": "label_%s" % labels_idx.next(),
-                        "data": labels_data.next(),
+                        "name": "label_%s" % i,
+                        "data": labels[i],
                         "type": output_format,
                     }
-                } for colis in body.infoColis],
+                } for i, colis in enumerate(body.infoColis)],
                 "annexes": [
                 ],
                 "extra": {
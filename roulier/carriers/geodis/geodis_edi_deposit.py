@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""Write big Geodis deposit slips (edi).
+
+Shipments are read by chunks (GeodisEncoderEdi.chunk_size);
+each chunk is validated, encoded and sanitized, in a pool of
+processes if asked, then written in the order of the input.
+
+The deposit can be split in several messages (UNH to UNT):
+a message gets at most max_parcels parcels and about max_bytes
+bytes (a bigger shipment gets a message of its own). With a
+budget, messages are numbered: their reference is depositId-1,
+depositId-2... Each message can be put in an interchange of its
+own (UNB to UNZ) to be sent in separate files.
+
+    deposit = GeodisEdiDeposit(max_parcels=5000, processes=4)
+    with open('deposit.edi', 'w') as sink:
+        deposit.write(data, sink)
+"""
+from itertools import islice
+
+from roulier.batch import imap_processes
+from roulier.exception import InvalidApiInput
+from .geodis_api_edi import GeodisApiEdi
+from .geodis_encoder_edi import GeodisEncoderEdi
+from .geodis_transport_edi import GeodisTransportEdi
+
+
+def _encode_chunk(task):
+    """Validate, encode and sanitize a chunk of shipments.
+
+    Runs in the pool of processes (or not).
+
+    return: [(parcels, shippingId, edi of the segments after CNI,
+        count of these segments)]
+    """
+    encoder_class, transport_class, header, shipments, offset = task
+    encoder = encoder_class()
+    transport = transport_class()
+    data = encoder.process_shipments(
+        GeodisApiEdi(), header, shipments, offset)
+    encoded = []
+    for shipment in data['shipments']:
+        # CNI is numbered once the message is known
+        lines = encoder.encode_shipment(shipment, data['service'], 0)[1:]
+        encoded.append((
+            len(shipment['parcels']), shipment['shippingId'],
+            '\n'.join(transport.iter_edi(lines)), len(lines)))
+    return encoded
+
+
+class GeodisEdiDeposit(object):
+    """Write a deposit slip, split in messages or interchanges.
+
+    params:
+        max_parcels: of a message (no limit if None)
+        max_bytes: of a message, about (no limit if None)
+        interchanges: one interchange per message; write() is then
+            given a function returning a new sink per interchange
+        processes: number of processes encoding shipments
+            (None: in this process)
+    """
+
+    encoder_class = GeodisEncoderEdi
+    transport_class = GeodisTransportEdi
+
+    def __init__(self, max_parcels=None, max_bytes=None,
+                 interchanges=False, processes=None):
+        self.max_parcels = max_parcels
+        self.max_bytes = max_bytes
+        self.interchanges = interchanges
+        self.processes = processes
+
+    def _tasks(self, header, shipments):
+        chunk_size = self.encoder_class.chunk_size
+        shipments = iter(shipments)
+        offset = 0
+        while True:
+            chunk = list(islice(shipments, chunk_size))
+            if not chunk:
+                return
+            yield (
+                self.encoder_class, self.transport_class, header, chunk,
+                offset)
+            offset += len(chunk)
+
+    def process_header(self, api_input):
+        """Validate and normalize api_input (shipments are ignored).
+
+        return: (header, normalized header)
+        """
+        header = dict(api_input, shipments=[])
+        data, errors = GeodisApiEdi().process(header)
+        if errors:
+            raise InvalidApiInput('Input error : %s' % errors)
+        return header, data
+
+    def encode(self, header, shipments):
+        """Yield shipments encoded, in the order of shipments.
+
+        params:
+            header: api input without shipments (see process_header())
+            shipments: iterable
+        yields: (parcels, shippingId, edi of the segments after CNI,
+            count of these segments)
+        """
+        tasks = self._tasks(header, shipments)
+        if self.processes:
+            chunks = imap_processes(
+                _encode_chunk, tasks, processes=self.processes)
+        else:
+            chunks = (_encode_chunk(task) for task in tasks)
+        for chunk in chunks:
+            for shipment in chunk:
+                yield shipment
+
+    def write(self, api_input, sink):
+        """Write the deposit of api_input (like GeodisEncoderEdi.encode()).
+
+        api_input['shipments'] can be an iterator: it is consumed
+        by chunks, memory does not grow with the deposit. The header
+        is validated first: nothing is written if it is invalid, an
+        invalid shipment raises InvalidApiInput with its index in
+        the whole input.
+
+        params:
+            sink: file-like object (text); a function returning one
+                (called with the index of the interchange, starting
+                at 0, closed once written) if interchanges
+        return: number of messages
+        """
+        header, data = self.process_header(api_input)
+        return self.write_encoded(
+            data, self.encode(header, api_input['shipments']), sink)
+
+    def write_encoded(self, data, shipments, sink):
+        """Write a deposit of shipments already encoded.
+
+        params:
+            data: normalized header (see process_header())
+            shipments: iterable, like encode() yields
+            sink: see write()
+        return: number of messages
+        """
+        writer = _Writer(self, data, sink)
+        for shipment in shipments:
+            writer.add(*shipment)
+        return writer.close()
+
+
+class _Writer(object):
+    """State of GeodisEdiDeposit.write()."""
+
+    def __init__(self, deposit, data, sink):
+        self.deposit = deposit
+        self.encoder = deposit.encoder_class()
+        self.transport = deposit.transport_class()
+        self.data = data
+        self.service = data['service']
+        self.sink = sink
+        self.file = None  # of the interchange
+        self.separator = ''
+        self.messages = 0  # in the interchange
+        self.total = 0  # of messages
+        self.message = None  # reference of the current message
+        self.segments = self.parcels = self.size = self.shipments = 0
+
+    def _write(self, edi, segments=1):
+        self.file.write(self.separator)
+        self.file.write(edi)
+        self.separator = '\n'
+        if self.message is not None:
+            self.segments += segments
+            self.size += len(edi) + 1
+
+    def _write_segment(self, segment):
+        self._write(next(self.transport.iter_edi([segment])))
+
+    def _open_interchange(self, reference=None):
+        if self.deposit.interchanges:
+            self.file = self.sink(self.total - 1)
+        else:
+            self.file = self.sink
+        self.separator = ''
+        self.messages = 0
+        self._write_segment(
+            self.transport.interchange_header(self.service, reference))
+
+    def _close_interchange(self, reference=None):
+        self._write_segment(self.transport.interchange_trailer(
+            self.service, self.messages, reference))
+        if self.deposit.interchanges:
+            self.file.close()
+        self.file = None
+
+    def _open_message(self):
+        self.total += 1
+        if self.deposit.max_parcels or self.deposit.max_bytes:
+            reference = '%s-%s' % (self.service['depositId'], self.total)
+        else:
+            reference = self.service['depositId']
+        if self.file is None:
+            self._open_interchange(
+                self.deposit.interchanges and reference or None)
+        self.messages += 1
+        self.message = reference
+        self.segments = self.parcels = self.size = self.shipments = 0
+        for segment in self.encoder.encode_header(
+                self.data['agency_address'], self.data['from_address'],
+                self.service, reference):
+            self._write_segment(segment)
+
+    def _close_message(self):
+        reference, self.message = self.message, None
+        self._write_segment(['UNT', '%s' % (self.segments + 1), reference])
+        if self.deposit.interchanges:
+            self._close_interchange(reference)
+
+    def _full(self, parcels, size):
+        """Would the shipment get the message over the budget."""
+        max_parcels = self.deposit.max_parcels
+        max_bytes = self.deposit.max_bytes
+        return self.shipments and (
+            max_parcels and self.parcels + parcels > max_parcels or
+            max_bytes and self.size + size > max_bytes)
+
+    def add(self, parcels, shipping_id, edi, segments):
+        """Write an encoded shipment (see _encode_chunk())."""
+        cni = next(self.transport.iter_edi(
+            [['CNI', '%s' % (self.shipments + 1), shipping_id]]))
+        # + UNT, about
+        size = len(cni) + len(edi) + 2 + len(self.message or '') + 10
+        if self.message is not None and self._full(parcels, size):
+            self._close_message()
+        if self.message is None:
+            self._open_message()
+            cni = next(self.transport.iter_edi(
+                [['CNI', '1', shipping_id]]))
+        self.shipments += 1
+        self.parcels += parcels
+        self._write(cni)
+        self._write(edi, segments)
+
+    def close(self):
+        if self.message is None:
+            self._open_message()
+        self._close_message()
+        if self.file is not None:
+            self._close_interchange()
+        return self.total
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Build a Geodis deposit slip (edi) during the day.
+
+Shipments are validated and encoded once, when they are added
+(as they are labelled), and kept in a sqlite database. At cutoff,
+the deposit is written from the stored segments: nothing is
+validated or encoded again.
+
+    store = GeodisEdiStore('/var/lib/roulier/D1.sqlite')
+    store.add(data)  # like Geodis.get_edi() data, any time
+    store.remove('X12')  # cancelled (shippingId)
+    with open('D1.edi', 'w') as sink:
+        store.write(data, sink)  # at cutoff, data['shipments'] unused
+
+The store can be used by many processes (sqlite locks the
+database while a shipment is written).
+"""
+import sqlite3
+
+from .geodis_edi_deposit import GeodisEdiDeposit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shipment (
+    position INTEGER PRIMARY KEY AUTOINCREMENT,
+    shipping_id TEXT NOT NULL UNIQUE,
+    parcels INTEGER NOT NULL,
+    edi TEXT NOT NULL,
+    segments INTEGER NOT NULL
+)
+"""
+
+
+class GeodisEdiStore(object):
+    """Shipments of a deposit, encoded, in a sqlite database.
+
+    params:
+        path: of the database (created if needed)
+        deposit: GeodisEdiDeposit encoding and writing the deposit
+            (split in messages...)
+    """
+
+    def __init__(self, path, deposit=None):
+        self.path = path
+        self.deposit = deposit or GeodisEdiDeposit()
+        self.connection = sqlite3.connect(path)
+        # edi is ascii: str on python 2 too
+        self.connection.text_factory = str
+        with self.connection:
+            self.connection.execute(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, api_input):
+        """Validate, encode and store the shipments of api_input.
+
+        A shipment with the shippingId of a stored one replaces it
+        (and goes at the end of the deposit). Nothing is stored if
+        a shipment is invalid (InvalidApiInput is raised).
+
+        return: number of shipments added
+        """
+        header, data = self.deposit.process_header(api_input)
+        encoded = list(self.deposit.encode(header, api_input['shipments']))
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO shipment '
+                '(shipping_id, parcels, edi, segments) VALUES (?, ?, ?, ?)',
+                [(shipping_id, parcels, edi, segments)
+                 for parcels, shipping_id, edi, segments in encoded])
+        return len(encoded)
+
+    def remove(self, shipping_id):
+        """Remove a shipment (cancelled).
+
+        return: True if it was stored
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                'DELETE FROM shipment WHERE shipping_id = ?', (shipping_id,))
+        return cursor.rowcount > 0
+
+    def __contains__(self, shipping_id):
+        return self.connection.execute(
+            'SELECT 1 FROM shipment WHERE shipping_id = ?',
+            (shipping_id,)).fetchone() is not None
+
+    def __len__(self):
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM shipment').fetchone()[0]
+
+    def shipping_ids(self):
+        """Return the shippingId of the stored shipments, in order."""
+        return [row[0] for row in self.connection.execute(
+            'SELECT shipping_id FROM shipment ORDER BY position')]
+
+    def write(self, api_input, sink):
+        """Write the deposit of the stored shipments.
+
+        params:
+            api_input: header of the deposit (like add()), shipments
+                are ignored
+            sink: see GeodisEdiDeposit.write()
+        return: number of messages
+        """
+        __, data = self.deposit.process_header(api_input)
+        shipments = self.connection.execute(
+            'SELECT parcels, shipping_id, edi, segments FROM shipment '
+            'ORDER BY position')
+        return self.deposit.write_encoded(data, shipments, sink)
+
+    def clear(self):
+        """Remove every shipment (once the deposit is sent)."""
+        with self.connection:
+            self.connection.execute('DELETE FROM shipment')
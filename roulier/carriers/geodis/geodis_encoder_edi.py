@@ -14,10 +14,9 @@ class GeodisEncoderEdi(Encoder):
 
     def encode(self, api_input):
         api = GeodisApiEdi()
-        if not api.validate(api_input):
-            raise InvalidApiInput(
-                'Input error : %s' % api.errors(api_input))
-        data = api.normalize(api_input)
+        data, errors = api.process(api_input)
+        if errors:
+            raise InvalidApiInput('Input error : %s' % errors)
 
         return {
             "body": self.encode_agency(
@@ -28,6 +27,30 @@ class GeodisEncoderEdi(Encoder):
             "headers": data['service'],
         }
 
+    # shipments validated at once by GeodisEdiDeposit
+    # (cerberus is slow to validate small documents)
+    chunk_size = 100
+
+    def process_shipments(self, api, header, shipments, offset=0):
+        """Validate and normalize shipments with the header.
+
+        params:
+            api: GeodisApiEdi
+            header: api input without shipments
+            shipments: list
+            offset: index of the first shipment in the whole input
+        return: normalized api input
+        """
+        data, errors = api.process(dict(header, shipments=shipments))
+        if errors:
+            if offset and 'shipments' in errors:
+                # index in the whole input
+                errors['shipments'] = [dict(
+                    (idx + offset, error)
+                    for idx, error in errors['shipments'][0].items())]
+            raise InvalidApiInput('Input error : %s' % errors)
+        return data
+
     def encode_shipment(self, shipment, service, idx):
         packs = shipment['parcels']
         to_address = shipment['to_address']
@@ -82,15 +105,18 @@ class GeodisEncoderEdi(Encoder):
         return lines
 
     def encode_agency(self, agency_address, from_address, shipments, service):
-        shipment_lines = []
-        i = 0
-        deposit = service['depositId']
-        date = datetime.now()
-        for shipment in shipments:
-            i = i + 1
-            shipment_lines += self.encode_shipment(shipment, service, i)
+        return list(self.iter_agency(
+            agency_address, from_address, shipments, service))
 
-        lines = [
+    def encode_header(
+            self, agency_address, from_address, service, deposit=None):
+        """Return the segments of the message before shipments.
+
+        deposit: reference of the message (default to depositId)
+        """
+        deposit = deposit or service['depositId']
+        date = datetime.now()
+        return [
             ['UNH', deposit, ['IFCSUM', 'D', '96A', 'UN', 'ETT021']],
             ['BGM', '630', deposit],
             ['DTM', ['137', date.strftime('%Y%m%d%H%M'), '203']],
@@ -117,8 +143,24 @@ class GeodisEncoderEdi(Encoder):
                 from_address['country']
              ],
             ['DOC', '630', deposit],
-        ] + shipment_lines
-        lines += [
-            ['UNT', '%s' % (len(lines) + 1), deposit]
         ]
-        return lines
+
+    def iter_agency(self, agency_address, from_address, shipments, service):
+        """Yield the segments of the message (UNH to UNT).
+
+        shipments are consumed one by one (it can be an iterator),
+        segments are counted for UNT on the way.
+        """
+        deposit = service['depositId']
+        lines = self.encode_header(agency_address, from_address, service)
+        count = len(lines)
+        for line in lines:
+            yield line
+        i = 0
+        for shipment in shipments:
+            i = i + 1
+            lines = self.encode_shipment(shipment, service, i)
+            count += len(lines)
+            for line in lines:
+                yield line
+        yield ['UNT', '%s' % (count + 1), deposit]
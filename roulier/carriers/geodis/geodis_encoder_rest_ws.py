@@ -13,10 +13,9 @@ class GeodisEncoderRestWs(Encoder):
 
     def encode(self, api_input, action):
         api = GEODIS_INFOS[action]['api']()
-        if not api.validate(api_input):
-            raise InvalidApiInput(
-                'Input error : %s' % api.errors(api_input))
-        data = api.normalize(api_input)
+        data, errors = api.process(api_input)
+        if errors:
+            raise InvalidApiInput('Input error : %s' % errors)
 
         infos = {
             'url': "%s/%s" % (
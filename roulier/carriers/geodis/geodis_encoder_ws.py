@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """Transform input to geodis compatible xml."""
-from jinja2 import Environment, PackageLoader
 from roulier.codec import Encoder
+from roulier.jinja_env import get_environment
 from roulier.exception import InvalidApiInput
 from .geodis_common_ws import GEODIS_INFOS
 
@@ -26,16 +26,12 @@ class GeodisEncoderWs(Encoder):
     def encode(self, api_input, action):
         """Transform input to geodis compatible xml."""
         api = self.get_api(action)
-        if not api.validate(api_input):
-            raise InvalidApiInput(
-                'Input error : %s' % api.errors(api_input))
-        env = Environment(
-            loader=PackageLoader('roulier', '/carriers/geodis/templates'),
-            extensions=['jinja2.ext.with_', 'jinja2.ext.autoescape'],
-            autoescape=True)
+        data, errors = api.process(api_input)
+        if errors:
+            raise InvalidApiInput('Input error : %s' % errors)
+        env = get_environment('/carriers/geodis/templates', autoescape=True)
         template = env.get_template("geodis_%s.xml" % action)
 
-        data = api.normalize(api_input)
         infos = {
             'xmlns': GEODIS_INFOS[action]['xmlns'],
             'url': (
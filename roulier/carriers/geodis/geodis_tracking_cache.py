@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Cache of Geodis tracking responses.
+
+Set on the rest transport, the same tracking request (same
+account, service and normalized body) is answered from the cache
+instead of the WS. A shipment in a final state (delivered or
+returned) won't change: its response is kept until the backend
+drops it; other responses expire after ttl seconds. Coroutines
+of roulier.aio use the cache too.
+
+    Geodis.rest_ws.cache = GeodisTrackingCache(
+        LRUCache(maxsize=10000), ttl=600)
+    Geodis().get_tracking(data)  # sent
+    Geodis().get_tracking(data)  # from the cache
+    Geodis.rest_ws.cache.stats()
+"""
+import json
+
+from roulier.cache import LRUCache, TTLCache, content_key
+from .geodis_decoder_rest_ws import FINAL_STATES, GeodisDecoderRestWs
+
+
+class GeodisTrackingCache(TTLCache):
+    """Responses (contenu) of tracking requests.
+
+    params:
+        backend: LRUCache (default, 1024 responses), DiskCache...
+        ttl: seconds, of responses with a shipment not in a final
+            state (or without shipment)
+    """
+
+    final_states = FINAL_STATES
+
+    def __init__(self, backend=None, ttl=300):
+        super(GeodisTrackingCache, self).__init__(
+            backend if backend is not None else LRUCache(maxsize=1024),
+            ttl=ttl)
+
+    def key(self, payload):
+        """Key of a payload of GeodisTransportRestWs.send()."""
+        return content_key(
+            json.dumps(payload['body'], sort_keys=True),
+            payload['infos']['service'], payload['headers']['login'])
+
+    def ttl_of(self, value):
+        # a list of shipments (trackingList) or one
+        lines = value if isinstance(value, list) else [value]
+        if value and all(
+                GeodisDecoderRestWs.tracking_status(line.get('codeSituation'))
+                in self.final_states for line in lines):
+            return None
+        return self.ttl
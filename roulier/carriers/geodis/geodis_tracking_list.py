@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""Fetch a long Geodis tracking list by date ranges.
+
+The shippingDateStart to shippingDateEnd window is split in
+shards of a few days; a request is sent for each shard (each
+one signed with its own timestamp), at most max_workers at the
+same time. Rows are yielded as soon as the response of their
+shard is decoded, without waiting for the whole window; a
+shipment answered by several shards is yielded once (noSuivi).
+
+    tracking_list = GeodisTrackingList(days=7, max_workers=4)
+    for row in tracking_list.iter_rows(
+            data, Geodis().pipeline('trackingList')):
+        print(row['tracking']['trackingCode'])
+"""
+from copy import deepcopy
+from datetime import datetime, timedelta
+
+from roulier.batch import imap
+
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def shards(start, end, days):
+    """Split the window from start to end (included) in shards.
+
+    params:
+        start, end: dates as strings (YYYY-MM-DD)
+        days: of a shard
+    return: list of (start, end) of the shards, as strings
+    """
+    if days < 1:
+        raise ValueError('days must be at least 1')
+    start = datetime.strptime(start, DATE_FORMAT)
+    end = datetime.strptime(end, DATE_FORMAT)
+    result = []
+    while start <= end:
+        last = min(start + timedelta(days=days - 1), end)
+        result.append(
+            (start.strftime(DATE_FORMAT), last.strftime(DATE_FORMAT)))
+        start = last + timedelta(days=1)
+    return result
+
+
+class GeodisTrackingList(object):
+    """Tracking list of a date window, fetched by shards.
+
+    params:
+        days: of a shard
+        max_workers: max number of requests at the same time
+        ordered: yield the shards in date order if True, as soon
+            as they are received otherwise
+    """
+
+    def __init__(self, days=7, max_workers=4, ordered=False):
+        self.days = days
+        self.max_workers = max_workers
+        self.ordered = ordered
+
+    def split(self, data):
+        """Return the data of each shard (like get_tracking_list()).
+
+        Data without shippingDateStart and shippingDateEnd is not
+        split.
+        """
+        service = data['service']
+        if not (service.get('shippingDateStart') and
+                service.get('shippingDateEnd')):
+            return [data]
+        result = []
+        for start, end in shards(
+                service['shippingDateStart'], service['shippingDateEnd'],
+                self.days):
+            shard = deepcopy(data)
+            shard['service']['shippingDateStart'] = start
+            shard['service']['shippingDateEnd'] = end
+            result.append(shard)
+        return result
+
+    def iter_rows(self, data, pipeline):
+        """Yield the decoded rows of the tracking list of data.
+
+        An error of a shard (InvalidApiInput, CarrierError...) is
+        raised when it is received: other requests are not sent.
+
+        params:
+            data: like get_tracking_list()
+            pipeline: (encode, transport, decode) of trackingList
+                (see Carrier.pipeline())
+        yields: rows, like get_tracking_list() returns
+        """
+        encode, transport, decode = pipeline
+
+        def fetch(shard):
+            # signed by transport.send() (prepare_data), each time
+            payload = encode(shard)
+            return decode(payload, transport.send(payload))
+
+        seen = set()
+        for result in imap(
+                fetch, self.split(data), max_workers=self.max_workers,
+                ordered=self.ordered):
+            if result.error is not None:
+                raise result.error
+            for row in result.result:
+                tracking_code = row['tracking']['trackingCode']
+                if tracking_code:
+                    if tracking_code in seen:
+                        continue
+                    seen.add(tracking_code)
+                yield row
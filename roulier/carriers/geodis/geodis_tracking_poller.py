@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""Follow the status of many Geodis shipments.
+
+The poller keeps the last known status of each shipment in a
+sqlite database. A poll only asks for the shipments due: a
+shipment delivered or returned is not asked for again, and a
+shipment is asked for less and less often while its status
+does not change (half the time since its last change, between
+min_interval and max_interval). Due shipments are grouped by
+agency and shipping dates: one trackingList request per agency
+and range of consecutive dates. A poll returns the changes only
+(and only the rows of changed shipments are decoded). Polls skip
+the cache of the transport, if any (GeodisTrackingCache): they
+refresh it.
+
+    poller = GeodisTrackingPoller(Geodis(), auth, '/var/lib/tracking')
+    poller.add('T1', '2019-07-01', agency_id='084135')
+    for change in poller.poll():  # every few minutes
+        print(change.tracking_id, change.status)
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+import logging
+import sqlite3
+import time
+
+from roulier.batch import imap
+from .geodis_decoder_rest_ws import FINAL_STATES, GeodisDecoderRestWs
+from .geodis_tracking_list import DATE_FORMAT
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shipment (
+    tracking_id TEXT PRIMARY KEY,
+    shipping_date TEXT NOT NULL,
+    agency_id TEXT NOT NULL,
+    status TEXT,
+    changed REAL NOT NULL,
+    next_poll REAL
+)
+"""
+
+
+class TrackingChange(
+        namedtuple('TrackingChange', [
+            'tracking_id', 'previous', 'status', 'row'])):
+    """Change of status of a shipment.
+
+    tracking_id: noSuivi
+    previous: status before the poll (None if unknown)
+    status: new status
+    row: like get_tracking_list() rows
+    """
+
+    __slots__ = ()
+
+
+def date_ranges(dates, max_gap=0):
+    """Group dates (YYYY-MM-DD) in ranges of consecutive dates.
+
+    params:
+        dates: iterable
+        max_gap: days without date allowed in a range
+    return: sorted list of (start, end)
+    """
+    ranges = []
+    for day in sorted(set(dates)):
+        date = datetime.strptime(day, DATE_FORMAT)
+        if ranges and date - ranges[-1][1] <= timedelta(days=max_gap + 1):
+            ranges[-1][1] = date
+        else:
+            ranges.append([date, date])
+    return [(start.strftime(DATE_FORMAT), end.strftime(DATE_FORMAT))
+            for start, end in ranges]
+
+
+class GeodisTrackingPoller(object):
+    """Status of shipments, refreshed by trackingList requests.
+
+    params:
+        carrier: Geodis
+        auth: like the 'auth' of get_tracking_list() data
+        path: of the database (created if needed)
+        min_interval: seconds between 2 requests of a shipment, at least
+        max_interval: at most
+        max_gap: days without due shipment in a request (see
+            date_ranges()): fewer requests, more rows to decode
+        max_workers: max number of requests at the same time
+    """
+
+    def __init__(self, carrier, auth, path=':memory:', min_interval=900,
+                 max_interval=86400, max_gap=0, max_workers=4):
+        self.carrier = carrier
+        self.auth = auth
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_gap = max_gap
+        self.max_workers = max_workers
+        # errors (BatchResult) of the requests of the last poll
+        self.errors = []
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute(SCHEMA)
+
+    def clock(self):
+        return time.time()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, tracking_id, shipping_date, agency_id='', status=None):
+        """Follow a shipment (asked for at the next poll).
+
+        params:
+            tracking_id: noSuivi
+            shipping_date: YYYY-MM-DD
+            agency_id: codeSa
+            status: known status
+        """
+        now = self.clock()
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO shipment (tracking_id, '
+                'shipping_date, agency_id, status, changed, next_poll) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (tracking_id, shipping_date, agency_id, status, now,
+                 None if status in FINAL_STATES else now))
+
+    def remove(self, tracking_id):
+        """Stop following a shipment.
+
+        return: True if it was followed
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                'DELETE FROM shipment WHERE tracking_id = ?', (tracking_id,))
+        return cursor.rowcount > 0
+
+    def status(self, tracking_id):
+        """Return the last known status of a shipment (KeyError)."""
+        row = self.connection.execute(
+            'SELECT status FROM shipment WHERE tracking_id = ?',
+            (tracking_id,)).fetchone()
+        if row is None:
+            raise KeyError(tracking_id)
+        return row[0]
+
+    def __len__(self):
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM shipment').fetchone()[0]
+
+    def due(self, now=None):
+        """Return {agency_id: [shipping dates]} of the shipments due."""
+        now = self.clock() if now is None else now
+        due = {}
+        for agency_id, shipping_date in self.connection.execute(
+                'SELECT DISTINCT agency_id, shipping_date FROM shipment '
+                'WHERE next_poll <= ?', (now,)):
+            due.setdefault(agency_id, []).append(shipping_date)
+        return due
+
+    def requests(self, now=None):
+        """Return the data of the trackingList requests of a poll."""
+        requests = []
+        for agency_id, dates in sorted(self.due(now).items()):
+            for start, end in date_ranges(dates, self.max_gap):
+                data = self.carrier.api('trackingList')
+                data['auth'].update(self.auth)
+                data['service'].update({
+                    'agencyId': agency_id,
+                    'shippingDateStart': start, 'shippingDateEnd': end})
+                requests.append(data)
+        return requests
+
+    def poll(self):
+        """Ask for the shipments due, return the changes of status.
+
+        A request in error is logged (and kept in self.errors):
+        its shipments stay due.
+
+        return: list of TrackingChange
+        """
+        now = self.clock()
+        encode, transport, decode = self.carrier.pipeline('trackingList')
+
+        def fetch(data):
+            # not send(): the cache would answer an old status
+            payload = encode(data)
+            response = transport.handle_response(
+                transport.post(transport.prepare_request(payload)))
+            transport.cache_result(payload, response)
+            return payload, response
+
+        self.errors = []
+        changes = []
+        for result in imap(
+                fetch, self.requests(now), max_workers=self.max_workers,
+                ordered=False):
+            if result.error is not None:
+                log.warning('Geodis tracking poll failed: %s', result.error)
+                self.errors.append(result)
+                continue
+            payload, response = result.result
+            changes.extend(self._update(
+                result.data, response['body'], now,
+                lambda line: decode(payload, dict(response, body=[line]))[0]))
+        return changes
+
+    def _interval(self, unchanged):
+        return min(max(unchanged / 2.0, self.min_interval), self.max_interval)
+
+    def _update(self, data, lines, now, decode):
+        """Store the lines (contenu) of a response, return the changes.
+
+        Shipments of the request not due are updated too (they
+        are in the response anyway).
+        """
+        service = data['service']
+        lines = dict((line['noSuivi'], line) for line in lines)
+        shipments = self.connection.execute(
+            'SELECT tracking_id, status, changed FROM shipment '
+            'WHERE agency_id = ? AND shipping_date BETWEEN ? AND ? '
+            'AND next_poll IS NOT NULL',
+            (service['agencyId'], service['shippingDateStart'],
+             service['shippingDateEnd'])).fetchall()
+        changes = []
+        updates = []
+        for tracking_id, previous, changed in shipments:
+            line = lines.get(tracking_id)
+            if line is None:
+                status = previous
+            else:
+                status = GeodisDecoderRestWs.tracking_status(
+                    line['codeSituation'])
+            if status != previous:
+                changes.append(TrackingChange(
+                    tracking_id, previous, status, decode(line)))
+                changed = now
+            if status in FINAL_STATES:
+                next_poll = None
+            else:
+                next_poll = now + self._interval(now - changed)
+            updates.append((status, changed, next_poll, tracking_id))
+        with self.connection:
+            self.connection.executemany(
+                'UPDATE shipment SET status = ?, changed = ?, next_poll = ? '
+                'WHERE tracking_id = ?', updates)
+        return changes
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 """Implement geodisWS."""
+from roulier.sanitize import EDIFACT
 from roulier.transport import Transport
 from datetime import datetime
 import logging
@@ -10,6 +11,12 @@ log = logging.getLogger(__name__)
 class GeodisTransportEdi(Transport):
     """Implement Geodis EDI"""
 
+    # remove accents and replace escapable chars by space
+    # because, replacing "'" by "?'"
+    # increase length of the token
+    # which is limited by 35
+    sanitize = EDIFACT
+
     def send(self, payload):
         """Call this function.
 
@@ -29,41 +36,43 @@ class GeodisTransportEdi(Transport):
         return self.convert_to_edi(message)
 
     def transport_wrap(self, body, headers):
+        return list(self.iter_interchange(body, headers))
+
+    def iter_interchange(self, body, headers):
+        """Yield the segments of the interchange (UNB, body, UNZ)."""
+        yield self.interchange_header(headers)
+        for segment in body:
+            yield segment
+        yield self.interchange_trailer(headers)
+
+    def interchange_header(self, headers, reference=None):
+        """Return the UNB segment.
+
+        reference: of the interchange (default to depositId)
+        """
         date = datetime.now()
-        return [
-            ['UNB', ['UNOA', '3'],
+        return ['UNB', ['UNOA', '3'],
                 [headers['interchangeSender'], '22'],
                 [headers['interchangeRecipient'], '22'],
                 [date.strftime('%d%m%y'), date.strftime('%H%M')],
-                headers['depositId']
-             ],
-        ] + body + [['UNZ', '1', headers['depositId']]]
+                reference or headers['depositId']]
+
+    def interchange_trailer(self, headers, messages=1, reference=None):
+        """Return the UNZ segment (messages: count of UNH)."""
+        return ['UNZ', '%s' % messages, reference or headers['depositId']]
 
     def convert_to_edi(self, arr):
+        return "\n".join(self.iter_edi(arr))
+
+    def iter_edi(self, segments):
+        """Yield segments as edi text (without line feed)."""
+        sanitize = self.sanitize
+
         def parse_token(token):
             if isinstance(token, list):
                 return ":".join([sanitize(tok) for tok in token])
             else:
                 return sanitize(token)
 
-        def parse_segment(segment):
-            return "%s'" % "+".join([parse_token(token) for token in segment])
-
-        def parse_lines(lines):
-            return "\n".join([parse_segment(segment) for segment in lines])
-
-        def sanitize(token):
-            # remove accents and replace escapable chars by space
-            # because, replacing "'" by "?'"
-            # increase length of the token
-            # which is limited by 35
-            sanitized = (
-                token
-                .replace("?", " ")
-                .replace("'", " ")
-                .replace("+", " ")
-                .replace(":", " ")
-            ).encode('ascii', 'ignore') # cut remaining chars
-            return sanitized
-
-        return parse_lines(arr)
+        for segment in segments:
+            yield "%s'" % "+".join([parse_token(token) for token in segment])
@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
 """Implement geodisWS."""
-import requests
-
+from roulier import tracing
 from roulier.transport import Transport
 from roulier.exception import CarrierError
+from copy import deepcopy
 import json
 import logging
 import hashlib
@@ -15,6 +15,9 @@ log = logging.getLogger(__name__)
 class GeodisTransportRestWs(Transport):
     """Implement Geodis Rest WS communication."""
 
+    # GeodisTrackingCache answering the same requests (None: off)
+    cache = None
+
     def get_token(self, id, timestamp, lang, hash):
         params = [id, timestamp, lang, hash]
         return ';'.join(params)
@@ -44,11 +47,43 @@ class GeodisTransportRestWs(Transport):
             payload.infos: { url: string, xmlns: string}
         Return:
             {
-                response: (Requests.response)
+                response: (Requests.response, None from the cache)
                 body: XML response (without soap)
                 parts: empty dict // compat with WS
             }
         """
+        result = self.cached_result(payload)
+        if result is not None:
+            return result
+        request = self.prepare_request(payload)
+        response = self.post(request)
+        log.info('WS response time %s' % response.elapsed.total_seconds())
+        result = self.handle_response(response)
+        self.cache_result(payload, result)
+        return result
+
+    def cached_result(self, payload):
+        """Return the response of payload from the cache (or None)."""
+        cache = self.cache
+        if cache is None:
+            return None
+        body = cache.get(cache.key(payload))
+        if body is None:
+            return None
+        # the decoder adds keys to the lines
+        return {
+            "body": deepcopy(body),
+            "parts": [],
+            "response": None,
+        }
+
+    def cache_result(self, payload, result):
+        cache = self.cache
+        if cache is not None:
+            cache.set(cache.key(payload), deepcopy(result['body']))
+
+    def prepare_request(self, payload):
+        """Build the http request of a payload (see send())."""
         body, token = self.prepare_data(
             payload['body'],
             payload['headers']['login'],
@@ -58,21 +93,21 @@ class GeodisTransportRestWs(Transport):
 
         infos = payload['infos']
         infos['token'] = token
+        return self.http_request(body, infos)
 
-        response = self.send_request(body, infos)
-        log.info('WS response time %s' % response.elapsed.total_seconds())
-        return self.handle_response(response)
+    def http_request(self, body, infos):
+        """Url, headers and data to send body to geodis WS."""
+        return {
+            'url': self.url(infos['url']),
+            'headers': {
+                'X-GEODIS-Service': infos['token'],
+            },
+            'data': body,
+        }
 
     def send_request(self, body, infos):
         """Send body to geodis WS."""
-        ws_url = infos['url']
-        token = infos['token']
-        return requests.post(
-            ws_url,
-            headers={
-                'X-GEODIS-Service': token,
-            },
-            data=body)
+        return self.post(self.http_request(body, infos))
 
     def handle_500(self, response):
         """Handle reponse in case of ERROR 500 type."""
@@ -94,7 +129,9 @@ class GeodisTransportRestWs(Transport):
 
     def handle_200(self, response):
         """Handle response type 200."""
-        payload = json.loads(response.text)
+        text = response.text
+        with tracing.span('json', size=len(text)):
+            payload = json.loads(text)
         if payload['ok'] is not True:
             self.handle_true_negative_error(response, payload)
         return {
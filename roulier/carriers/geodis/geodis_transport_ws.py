@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 """Implement geodisWS."""
-import requests
 from lxml import objectify
-from jinja2 import Environment, PackageLoader
+from roulier import tracing
 from roulier.transport import Transport
-from roulier.ws_tools import remove_empty_tags, get_parts
+from roulier.jinja_env import get_environment
+from roulier.ws_tools import remove_empty_tags
+from roulier.multipart import parse_response
 from roulier.exception import CarrierError
 import logging
 
@@ -28,44 +29,54 @@ class GeodisTransportWs(Transport):
                 parts: dict of attachments
             }
         """
-        body = payload['body']
-        headers = payload['headers']
-        infos = payload['infos']
-        soap_message = self.soap_wrap(body, headers, infos)
-        response = self.send_request(soap_message, infos)
+        request = self.prepare_request(payload)
+        response = self.post(request)
         log.info('WS response time %s' % response.elapsed.total_seconds())
         return self.handle_response(response)
 
+    def prepare_request(self, payload):
+        """Build the http request of a payload (see send())."""
+        infos = payload['infos']
+        soap_message = self.soap_wrap(
+            payload['body'], payload['headers'], infos)
+        return self.http_request(soap_message, infos)
+
+    def http_request(self, body, infos):
+        """Url, headers and data to send body to geodis WS."""
+        return {
+            'url': self.url(infos['url']),
+            'headers': {
+                'content-type': 'text/xml',
+                'SOAPAction': '<SOAP Action>'
+            },
+            'data': body,
+        }
+
     def soap_wrap(self, body, auth, infos):
         """Wrap body in a soap:Enveloppe."""
-        env = Environment(
-            loader=PackageLoader('roulier', '/carriers/geodis/templates'),
-            extensions=['jinja2.ext.with_'])
-
-        template = env.get_template("geodis_soap.xml")
-        body_stripped = remove_empty_tags(body)
-        header_template = env.get_template("geodis_header.xml")
-        header_xml = header_template.render(auth=auth, xmlns=infos['xmlns'])
-        data = template.render(
-            body=body_stripped, header=header_xml, xmlns=infos['xmlns'])
-        return data.encode('utf8')
+        with tracing.span('soap_wrap') as span:
+            env = get_environment('/carriers/geodis/templates')
+
+            template = env.get_template("geodis_soap.xml")
+            body_stripped = remove_empty_tags(body)
+            header_template = env.get_template("geodis_header.xml")
+            header_xml = header_template.render(
+                auth=auth, xmlns=infos['xmlns'])
+            data = template.render(
+                body=body_stripped, header=header_xml,
+                xmlns=infos['xmlns']).encode('utf8')
+            span.set('size', len(data))
+        return data
 
     def send_request(self, body, infos):
         """Send body to geodis WS."""
-        ws_url = infos['url']
-        return requests.post(
-            ws_url,
-            headers={
-                'content-type': 'text/xml',
-                'SOAPAction': '<SOAP Action>'
-            },
-            data=body)
+        return self.post(self.http_request(body, infos))
 
     def handle_500(self, response):
         """Handle reponse in case of ERROR 500 type."""
         # TODO : put a try catch (like wrong server)
         log.warning('Geodis error 500')
-        xml = get_parts(response)['start']
+        xml = parse_response(response)['start']
         obj = objectify.fromstring(xml)
         message = obj.xpath("//*[local-name() = 'message']")
         id_message = None
@@ -82,14 +93,15 @@ class GeodisTransportWs(Transport):
 
     def handle_200(self, response):
         """Handle response type 200."""
-        parts = get_parts(response)
+        parts = parse_response(response)
         xml = parts['start']
 
         def extract_soap(response_xml):
             obj = objectify.fromstring(response_xml)
             return obj.Body.getchildren()[0]
 
-        payload = extract_soap(xml)
+        with tracing.span('xml', size=len(xml)):
+            payload = extract_soap(xml)
         try:
             # TODO : may be extract this elsewere
             # rechercheLocalite has no attachment
@@ -1 +1,2 @@
+from . import test_edi
 from . import test_rest
\ No newline at end of file
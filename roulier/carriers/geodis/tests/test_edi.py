@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""Geodis EDI deposit slip, written while streaming."""
+from copy import deepcopy
+from datetime import datetime
+import re
+
+try:
+    from cStringIO import StringIO  # python 2: edi is str
+except ImportError:
+    from io import StringIO
+
+import pytest
+
+from roulier.exception import InvalidApiInput
+from ..geodis import Geodis
+from ..geodis_edi_store import GeodisEdiStore
+from ..geodis_encoder_edi import GeodisEncoderEdi
+
+ADDRESS = {
+    'name': u'Hélène Côté', 'street1': '35 b Rue Montgolfier',
+    'street2': 'Bat C', 'city': 'Villeurbanne', 'country': 'FR',
+    'zip': '69100', 'phone': '0600000000', 'siret': '123'}
+
+
+def _data(count):
+    data = Geodis().api('edi')
+    data['service'].update({
+        'depositId': 'D1', 'depositDate': datetime(2019, 1, 1),
+        'customerId': 'C1', 'interchangeSender': 'S',
+        'interchangeRecipient': 'R'})
+    data['agency_address'].update(ADDRESS)
+    data['from_address'].update(ADDRESS)
+    shipment = data['shipments'][0]
+    shipment.update({
+        'product': 'MES', 'shippingId': 'X1', 'reference1': "r'1+?:"})
+    shipment['to_address'].update(ADDRESS)
+    shipment['parcels'] = [
+        {'weight': 1.0, 'barcode': 'B1'}, {'weight': 2.0, 'barcode': 'B2'}]
+    data['shipments'] = [deepcopy(shipment) for __ in range(count)]
+    return data
+
+
+def _without_dates(edi):
+    return re.sub(r'\d{6}:\d{4}|\d{12}', 'DATE', edi)
+
+
+def _write(data, **options):
+    sink = StringIO()
+    Geodis().write_edi(data, sink, **options)
+    return sink.getvalue()
+
+
+@pytest.mark.parametrize('count', [0, 1, 3])
+def test_like_get_edi(count):
+    data = _data(count)
+    expected = Geodis().get_edi(deepcopy(data))
+    assert _without_dates(_write(data)) == _without_dates(expected)
+    data['shipments'] = iter(data['shipments'])
+    assert _without_dates(_write(data)) == _without_dates(expected)
+
+
+def test_unt_count():
+    edi = _write(_data(3)).split('\n')
+    unt = [line for line in edi if line.startswith('UNT+')][0]
+    # UNH to UNT
+    assert unt == "UNT+%s+D1'" % (len(edi) - 2)
+
+
+def test_lazy(monkeypatch):
+    monkeypatch.setattr(GeodisEncoderEdi, 'chunk_size', 1)
+    data = _data(1)
+    shipment = data['shipments'][0]
+    sink = StringIO()
+
+    def shipments():
+        yield shipment
+        # the first one is already written
+        assert sink.getvalue().count('CNI+') == 1
+        yield shipment
+
+    data['shipments'] = shipments()
+    Geodis().write_edi(data, sink)
+    assert sink.getvalue().count('CNI+') == 2
+
+
+@pytest.mark.parametrize('chunk_size', [1, 100])
+def test_invalid_shipment(monkeypatch, chunk_size):
+    monkeypatch.setattr(GeodisEncoderEdi, 'chunk_size', chunk_size)
+    data = _data(2)
+    data['shipments'][1]['to_address']['city'] = ''
+    with pytest.raises(InvalidApiInput) as error:
+        _write(data)
+    # index of the shipment in the whole input
+    assert "'shipments': [{1: " in str(error.value)
+    # header: raised before writing anything
+    data['service']['customerId'] = ''
+    sink = StringIO()
+    with pytest.raises(InvalidApiInput):
+        Geodis().write_edi(data, sink)
+    assert sink.getvalue() == ''
+
+
+def _messages(edi):
+    """Check UNT and UNZ counts, return the messages (lines)."""
+    lines = edi.split('\n')
+    assert lines[0].startswith('UNB+') and lines[-1].startswith('UNZ+')
+    messages = []
+    for line in lines[1:-1]:
+        if line.startswith('UNH+'):
+            messages.append([])
+        messages[-1].append(line)
+    for message in messages:
+        reference = message[0].split('+')[1]
+        assert message[-1] == "UNT+%s+%s'" % (len(message), reference)
+        cni = [line for line in message if line.startswith('CNI+')]
+        assert [line.split('+')[1] for line in cni] == [
+            '%s' % i for i in range(1, len(cni) + 1)]
+    assert lines[-1].split('+')[1] == '%s' % len(messages)
+    return messages
+
+
+def test_split_parcels():
+    # 2 parcels per shipment
+    edi = _write(_data(5), max_parcels=4)
+    messages = _messages(edi)
+    assert [message[0][:8] for message in messages] == [
+        'UNH+D1-1', 'UNH+D1-2', 'UNH+D1-3']
+    assert [len([line for line in message if line.startswith('CNI+')])
+            for message in messages] == [2, 2, 1]
+    # same shipments
+    assert _without_dates(edi).count('GIN+BN+') == 10
+
+
+def test_split_bytes():
+    # a shipment bigger than the budget: a message of its own
+    assert len(_messages(_write(_data(3), max_bytes=1))) == 3
+    edi = _write(_data(7), max_bytes=1500)
+    messages = _messages(edi)
+    assert len(messages) > 1
+    for message in messages:
+        assert len('\n'.join(message)) <= 1500
+
+
+class Sink(list):
+    closed = False
+
+    def write(self, edi):
+        self.append(edi)
+
+    def close(self):
+        self.closed = True
+
+
+def test_interchanges():
+    sinks = []
+
+    def sink(index):
+        assert index == len(sinks)
+        sinks.append(Sink())
+        return sinks[-1]
+
+    assert Geodis().write_edi(
+        _data(3), sink, max_parcels=2, interchanges=True) == 3
+    assert all(sink.closed for sink in sinks)
+    for i, edi in enumerate(''.join(sink) for sink in sinks):
+        assert _messages(edi)[0][0].startswith('UNH+D1-%s+' % (i + 1))
+        assert edi.endswith("UNZ+1+D1-%s'" % (i + 1))
+
+
+def test_processes(monkeypatch):
+    monkeypatch.setattr(GeodisEncoderEdi, 'chunk_size', 2)
+    data = _data(7)
+    expected = _without_dates(_write(data, max_parcels=6))
+    data['shipments'] = iter(data['shipments'])
+    edi = _write(data, max_parcels=6, processes=2)
+    assert _without_dates(edi) == expected
+    data = _data(7)
+    data['shipments'][5]['to_address']['city'] = ''
+    with pytest.raises(InvalidApiInput) as error:
+        _write(data, processes=2)
+    assert "'shipments': [{5: " in str(error.value)
+
+
+def test_store(tmpdir, monkeypatch):
+    path = str(tmpdir.join('deposit.sqlite'))
+    data = _data(4)
+    for i, shipment in enumerate(data['shipments']):
+        shipment['shippingId'] = 'X%s' % i
+    store = GeodisEdiStore(path)
+    assert store.add(dict(data, shipments=data['shipments'][:3])) == 3
+    assert store.add(dict(data, shipments=data['shipments'][3:])) == 1
+    assert store.remove('X1')
+    assert not store.remove('X1')
+    invalid = deepcopy(data['shipments'][0])
+    invalid['shippingId'] = ''
+    with pytest.raises(InvalidApiInput):
+        store.add(dict(data, shipments=[data['shipments'][1], invalid]))
+    store.close()
+
+    # nothing is validated or encoded again
+    def fail(*args):
+        raise AssertionError('encoded again')
+    monkeypatch.setattr(GeodisEncoderEdi, 'encode_shipment', fail)
+    with GeodisEdiStore(path) as store:
+        assert store.shipping_ids() == ['X0', 'X2', 'X3']
+        assert 'X2' in store and 'X1' not in store
+        sink = StringIO()
+        store.write(dict(data, shipments=None), sink)
+    monkeypatch.undo()
+    del data['shipments'][1]
+    assert _without_dates(sink.getvalue()) == _without_dates(_write(data))
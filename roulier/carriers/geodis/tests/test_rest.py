@@ -1,12 +1,27 @@
 # -*- coding: utf-8 -*-
 
 import json
+import threading
+import time
 from collections import OrderedDict
+from datetime import timedelta
+
+import pytest
+
+from roulier.cache import DiskCache
+from roulier.exception import CarrierError
+from ..geodis import Geodis
 
 from ..geodis_decoder_rest_ws import GeodisDecoderRestWs
 from ..geodis_encoder_rest_ws import GeodisEncoderRestWs
 from ..geodis_transport_rest_ws import GeodisTransportRestWs
-from ..geodis_api_rest_ws import GeodisApiTrackingListOut
+from roulier.api import Api
+from ..geodis_api_rest_ws import (
+    GeodisApiTracking, GeodisApiTrackingList, GeodisApiTrackingListOut,
+    compile_mapping)
+from ..geodis_tracking_cache import GeodisTrackingCache
+from ..geodis_tracking_list import shards
+from ..geodis_tracking_poller import GeodisTrackingPoller, date_ranges
 
 
 def test_encode():
@@ -251,3 +266,306 @@ def test_decode():
     ret = decode.decode(rep, 'trackingList')
 
     assert ret == ret_val
+
+
+def test_shards():
+    assert shards('2019-07-01', '2019-07-10', 4) == [
+        ('2019-07-01', '2019-07-04'), ('2019-07-05', '2019-07-08'),
+        ('2019-07-09', '2019-07-10')]
+    assert shards('2019-02-27', '2019-03-01', 7) == [
+        ('2019-02-27', '2019-03-01')]
+    assert shards('2019-07-02', '2019-07-01', 7) == []
+    with pytest.raises(ValueError):
+        shards('2019-07-01', '2019-07-10', 0)
+
+
+class Response(object):
+    status_code = 200
+    elapsed = timedelta(0)
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeTransport(GeodisTransportRestWs):
+    """Answer a row per day of the window, and a row on every page."""
+
+    situation = 'LIV'
+    fail = False
+
+    def __init__(self, delay=0):
+        super(FakeTransport, self).__init__()
+        self.delay = delay
+        self.requests = []
+        self.running = self.max_running = 0
+        self.lock = threading.Lock()
+
+    def post(self, request):
+        body = json.loads(request['data'])
+        with self.lock:
+            self.requests.append(request)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self.lock:
+            self.running -= 1
+        if self.fail or body['dateDepartDebut'] == 'fail':
+            return Response('{"ok": false, "codeErreur": "E"}')
+        line = dict(
+            json.loads(data)['contenu'][0], codeSituation=self.situation)
+        days = body['dateDepartFin'] and shards(
+            body['dateDepartDebut'], body['dateDepartFin'], 1) or []
+        rows = [dict(line, noSuivi='T' + day[-2:]) for day, __ in days]
+        rows.append(dict(line, noSuivi='SHARED'))
+        rows.append(dict(line, noSuivi=''))
+        return Response(json.dumps({'ok': True, 'contenu': rows}))
+
+
+def _geodis(transport):
+    class LocalGeodis(Geodis):
+        rest_ws = transport
+    geodis = LocalGeodis()
+    tracking = geodis.api('trackingList')
+    tracking['auth'].update({'login': 'l', 'password': 'p'})
+    tracking['service'].update({
+        'shippingDateStart': '2019-07-01', 'shippingDateEnd': '2019-07-10'})
+    return geodis, tracking
+
+
+def test_tracking_list_shards():
+    transport = FakeTransport(delay=0.05)
+    geodis, tracking = _geodis(transport)
+    rows = list(geodis.iter_tracking_list(tracking, days=2, max_workers=2))
+    codes = [row['tracking']['trackingCode'] for row in rows]
+    assert sorted(code for code in codes if code.startswith('T')) == [
+        'T%02d' % day for day in range(1, 11)]
+    # same shipment in every shard: once; no tracking code: kept
+    assert codes.count('SHARED') == 1
+    assert codes.count('') == 5
+    assert len(transport.requests) == 5
+    assert transport.max_running == 2
+    # each request signed for its own body
+    for request in transport.requests:
+        login, timestamp, lang, hash = request['headers'][
+            'X-GEODIS-Service'].split(';')
+        assert hash == transport.get_hash(
+            'p', login, timestamp, lang, 'api/zoomclient/recherche-envois',
+            request['data'])
+    # no window: not split
+    tracking['service']['shippingDateEnd'] = ''
+    transport.requests = []
+    list(geodis.iter_tracking_list(tracking))
+    assert len(transport.requests) == 1
+
+
+def test_tracking_list_streams():
+    transport = FakeTransport()
+    geodis, tracking = _geodis(transport)
+    rows = geodis.iter_tracking_list(tracking, days=1, max_workers=1)
+    next(rows)
+    # only the first shards are sent
+    assert len(transport.requests) < 10
+    rows.close()
+
+
+def test_tracking_list_error(monkeypatch):
+    geodis, tracking = _geodis(FakeTransport())
+    tracking['service']['shippingDateStart'] = 'fail'
+    with pytest.raises(ValueError):
+        list(geodis.iter_tracking_list(tracking))
+    geodis, tracking = _geodis(FakeTransport())
+    prepare_data = FakeTransport.prepare_data
+
+    def fail_second(self, data, *args):
+        if data['dateDepartDebut'] == '2019-07-08':
+            data = dict(data, dateDepartDebut='fail')
+        return prepare_data(self, data, *args)
+    monkeypatch.setattr(FakeTransport, 'prepare_data', fail_second)
+    with pytest.raises(CarrierError):
+        list(geodis.iter_tracking_list(tracking))
+
+
+@pytest.mark.parametrize('backend', ['lru', 'disk'])
+def test_tracking_cache(tmpdir, backend):
+    transport = FakeTransport()
+    cache = GeodisTrackingCache(
+        DiskCache(str(tmpdir)) if backend == 'disk' else None, ttl=60)
+    now = [0]
+    cache.clock = lambda: now[0]
+    transport.cache = cache
+    geodis, tracking = _geodis(transport)
+    tracking['service']['shippingDateEnd'] = '2019-07-01'
+    transport.situation = 'AAR'
+    expected = geodis.get_tracking_list(tracking)
+    assert expected[0]['tracking']['status'] == 'TRANSIT'
+    assert geodis.get_tracking_list(tracking) == expected
+    assert len(transport.requests) == 1
+    # another request
+    tracking['service']['customerId'] = 'C1'
+    geodis.get_tracking_list(tracking)
+    assert len(transport.requests) == 2
+    # expired
+    now[0] = 60
+    transport.situation = 'LIV'
+    assert geodis.get_tracking_list(tracking)[0]['tracking'][
+        'status'] == 'DELIVERED'
+    assert len(transport.requests) == 3
+    # delivered: kept
+    now[0] = 10 ** 6
+    geodis.get_tracking_list(tracking)
+    assert len(transport.requests) == 3
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expired']) == (2, 3, 1)
+
+
+def test_tracking_cache_final_states():
+    cache = GeodisTrackingCache(ttl=60)
+    line = json.loads(data)['contenu'][0]
+    assert cache.ttl_of([line, line]) is None
+    assert cache.ttl_of(line) is None
+    assert cache.ttl_of([line, dict(line, codeSituation='AAR')]) == 60
+    assert cache.ttl_of([]) == 60
+
+
+def test_date_ranges():
+    dates = ['2019-07-05', '2019-07-01', '2019-07-02', '2019-07-02']
+    assert date_ranges(dates) == [
+        ('2019-07-01', '2019-07-02'), ('2019-07-05', '2019-07-05')]
+    assert date_ranges(dates, max_gap=2) == [('2019-07-01', '2019-07-05')]
+    assert date_ranges([]) == []
+
+
+def test_poller():
+    transport = FakeTransport()
+    geodis, __ = _geodis(transport)
+    poller = GeodisTrackingPoller(
+        geodis, {'login': 'l', 'password': 'p'}, min_interval=10,
+        max_interval=100)
+    now = [0]
+    poller.clock = lambda: now[0]
+    for tracking_id, agency_id in [
+            ('T01', 'A1'), ('T02', 'A1'), ('T05', 'A1'), ('T03', 'A2')]:
+        poller.add(tracking_id, '2019-07-' + tracking_id[1:], agency_id)
+    poller.add('T09', '2019-07-09', 'A1', status='DELIVERED')
+    assert [(data['service']['agencyId'], data['service']['shippingDateStart'],
+             data['service']['shippingDateEnd'])
+            for data in poller.requests()] == [
+        ('A1', '2019-07-01', '2019-07-02'), ('A1', '2019-07-05', '2019-07-05'),
+        ('A2', '2019-07-03', '2019-07-03')]
+
+    transport.situation = 'AAR'
+    changes = poller.poll()
+    assert sorted((change.tracking_id, change.previous, change.status)
+                  for change in changes) == [
+        ('T01', None, 'TRANSIT'), ('T02', None, 'TRANSIT'),
+        ('T03', None, 'TRANSIT'), ('T05', None, 'TRANSIT')]
+    assert changes[0].row['tracking']['trackingCode'] == changes[0].tracking_id
+    assert len(transport.requests) == 3
+    # not due
+    assert poller.poll() == []
+    assert len(transport.requests) == 3
+    # due, unchanged: later and later
+    now[0] = 10
+    assert poller.poll() == []
+    assert len(transport.requests) == 6
+    now[0] = 19
+    assert poller.requests() == []
+    now[0] = 100
+    poller.poll()
+    now[0] = 149
+    assert poller.requests() == []
+    now[0] = 150
+    assert len(poller.requests()) == 3
+
+    # an error: shipments stay due
+    transport.fail = True
+    assert poller.poll() == []
+    assert len(poller.errors) == 3
+    transport.fail = False
+    transport.situation = 'LIV'
+    changes = poller.poll()
+    assert sorted((change.tracking_id, change.previous, change.status)
+                  for change in changes) == [
+        ('T01', 'TRANSIT', 'DELIVERED'), ('T02', 'TRANSIT', 'DELIVERED'),
+        ('T03', 'TRANSIT', 'DELIVERED'), ('T05', 'TRANSIT', 'DELIVERED')]
+    assert poller.status('T01') == 'DELIVERED'
+    # delivered: never asked for again
+    now[0] = 10 ** 6
+    assert poller.requests() == []
+    assert poller.remove('T01') and not poller.remove('T01')
+    assert len(poller) == 4
+    with pytest.raises(KeyError):
+        poller.status('T01')
+    poller.close()
+
+
+
+def test_poller_skips_cache():
+    transport = FakeTransport()
+    transport.cache = GeodisTrackingCache(ttl=60)
+    geodis, __ = _geodis(transport)
+    poller = GeodisTrackingPoller(
+        geodis, {'login': 'l', 'password': 'p'}, min_interval=10)
+    now = [0]
+    poller.clock = transport.cache.clock = lambda: now[0]
+    poller.add('T01', '2019-07-01', 'A1')
+    transport.situation = 'AAR'
+    assert [change.status for change in poller.poll()] == ['TRANSIT']
+    # due again, the cached response has not expired
+    now[0] = 10
+    data, = poller.requests()
+    transport.situation = 'LIV'
+    assert [change.status for change in poller.poll()] == ['DELIVERED']
+    assert len(transport.requests) == 2
+    # the cache is refreshed
+    rows = geodis.get_tracking_list(data)
+    assert rows[0]['tracking']['status'] == 'DELIVERED'
+    assert len(transport.requests) == 2
+    poller.close()
+
+
+def test_compiled_mapping_out():
+    api = GeodisApiTrackingListOut()
+    schema = api.schema()
+    for line in json.loads(data)['contenu']:
+        line['status'] = 'DELIVERED'
+        assert api.normalize(line) == api.visit(line, schema)
+        del line['poids']
+        with pytest.raises(KeyError):
+            api.normalize(line)
+    mixed = {'a': 'x', 'inner': {'b': 'y'}, 'c': 'y', 'one': {'d': 'x'}}
+    assert compile_mapping(mixed)({'x': 1, 'y': 2}) == api.visit(
+        {'x': 1, 'y': 2}, mixed)
+
+
+def test_compiled_mapping_in():
+    for api, values in [
+            (GeodisApiTrackingList(), {
+                'service': {
+                    'shippingDateStart': '2019-07-01', 'agencyId': 'A1',
+                    'reference1': 'R1', 'reference2': 'R2'},
+                'tracking': {'trackingId': 'T1', 'barcode': 'B1'},
+                'to_address': {'name': u'Hélène', 'zip': '69100'}}),
+            (GeodisApiTracking(), {
+                'service': {'refUniExp': 'E1', 'trackingId': 'T1'}})]:
+        external = api.api_values()
+        for key, value in values.items():
+            external[key].update(value)
+        external['auth'].update({'login': 'l', 'password': 'p'})
+        mapping = api._interal_api()
+        expected = Api.normalize(mapping, mapping.flat(external))
+        assert mapping.normalize(external) == expected
+        assert api.process(external)[0] == expected
+        # the input is not changed
+        assert mapping.normalize(external) == expected
+
+
+def test_renamed_to_itself_is_dropped():
+    # cerberus 1.1 drops a field renamed to its own name: reference1
+    # is not sent to trackingList, with or without the compiled renames
+    mapping = GeodisApiTrackingList()._interal_api()
+    external = {'auth': {'login': 'l', 'password': 'p'},
+                'service': {'reference1': 'R1', 'reference2': 'R2'}}
+    for normalized in (mapping.normalize(external),
+                       Api.normalize(mapping, mapping.flat(external))):
+        assert normalized['service'] == {'refDest': 'R2'}
@@ -10,6 +10,8 @@ from roulier.carrier import Carrier
 class Laposte(Carrier):
     """Implementation for Laposte."""
 
+    LABEL_ACTION = 'generateLabelRequest'
+
     encoder = LaposteEncoder()
     decoder = LaposteDecoder()
     ws = LaposteTransport()
@@ -20,15 +22,22 @@ class Laposte(Carrier):
 
     def get(self, data, action):
         """Run an action with data against Laposte WS."""
-        request = self.encoder.encode(data, action)
-        response = self.ws.send(request)
-        return self.decoder.decode(
-            response['body'],
-            response['parts'],
-            request['output_format']
-        )
+        return self._run(data, action)
+
+    def pipeline(self, action):
+        """See Carrier.pipeline()."""
+        def encode(data):
+            return self.encoder.encode(data, action)
+
+        def decode(request, response):
+            return self.decoder.decode(
+                response['body'],
+                response['parts'],
+                request['output_format']
+            )
+        return encode, self.ws, decode
 
     # shortcuts
     def get_label(self, data):
         """Genereate a generateLabelRequest."""
-        return self.get(data, 'generateLabelRequest')
+        return self.get(data, self.LABEL_ACTION)
@@ -1,8 +1,8 @@
 # -*- coding: utf-8 -*-
 """Transform input to laposte compatible xml."""
 import logging
-from jinja2 import Environment, PackageLoader
 from roulier.codec import Encoder
+from roulier.jinja_env import get_environment
 from roulier.exception import InvalidApiInput
 from .laposte_api import LaposteApi, LAPOSTE_LABEL_FORMAT
 LAPOSTE_ACTIONS = ('generateLabelRequest', 'getProductInter')
@@ -19,19 +19,16 @@ class LaposteEncoder(Encoder):
                 'action %s not in %s' % (action, ', '.join(LAPOSTE_ACTIONS)))
 
         api = LaposteApi()
-        if not api.validate(api_input):
+        data, errors = api.process(api_input)
+        if errors:
             _logger.warning('Laposte api call exception:')
             raise InvalidApiInput(
-                {'api_call_exception': api.errors(api_input)})
-        data = api.normalize(api_input)
+                {'api_call_exception': errors})
 
         data['service']['labelFormat'] = self.lookup_label_format(
             data['service']['labelFormat'])
 
-        env = Environment(
-            loader=PackageLoader('roulier', '/carriers/laposte/templates'),
-            extensions=['jinja2.ext.with_', 'jinja2.ext.autoescape'],
-            autoescape=True)
+        env = get_environment('/carriers/laposte/templates', autoescape=True)
 
         template = env.get_template("laposte_%s.xml" % action)
         return {
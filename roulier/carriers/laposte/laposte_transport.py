@@ -1,16 +1,22 @@
 # -*- coding: utf-8 -*-
 """Implement laposteWS."""
-import requests
 import email.parser
 from lxml import objectify, etree
-from jinja2 import Environment, PackageLoader
+from roulier import tracing
 from roulier.transport import Transport
-from roulier.ws_tools import remove_empty_tags, get_parts
+from roulier.jinja_env import get_environment
+from roulier.ws_tools import remove_empty_tags
+from roulier.multipart import parse_response
 from roulier.exception import CarrierError
 import logging
 
 log = logging.getLogger(__name__)
 
+try:
+    unicode
+except NameError:  # python 3
+    unicode = str
+
 
 class LaposteTransport(Transport):
     """Implement Laposte WS communication."""
@@ -30,30 +36,38 @@ class LaposteTransport(Transport):
                 parts: dict of attachments
             }
         """
-        body = payload['body']
-        headers = payload['headers']
-        soap_message = self.soap_wrap(body, headers)
-        log.debug(soap_message)
-        response = self.send_request(soap_message)
+        request = self.prepare_request(payload)
+        log.debug(request['data'])
+        response = self.post(request)
         return self.handle_response(response)
 
+    def prepare_request(self, payload):
+        """Build the http request of a payload (see send())."""
+        soap_message = self.soap_wrap(payload['body'], payload['headers'])
+        return self.http_request(soap_message)
+
+    def http_request(self, body):
+        """Url, headers and data to send body to laposte WS."""
+        return {
+            'url': self.url(self.LAPOSTE_WS),
+            'headers': {'content-type': 'text/xml;charset=UTF-8'},
+            'data': body,
+        }
+
     def soap_wrap(self, body, headers):
         """Wrap body in a soap:Enveloppe."""
-        env = Environment(
-            loader=PackageLoader('roulier', '/carriers/laposte/templates'),
-            extensions=['jinja2.ext.with_'])
+        with tracing.span('soap_wrap') as span:
+            env = get_environment('/carriers/laposte/templates')
 
-        template = env.get_template("laposte_soap.xml")
-        body_stripped = remove_empty_tags(body)
-        data = template.render(body=body_stripped)
-        return data.encode('utf8')
+            template = env.get_template("laposte_soap.xml")
+            body_stripped = remove_empty_tags(body)
+            data = template.render(body=body_stripped).encode('utf8')
+            span.set('size', len(data))
+        return data
 
     def send_request(self, body):
         """Send body to laposte WS."""
-        return requests.post(
-            self.LAPOSTE_WS,
-            headers={'content-type': 'text/xml;charset=UTF-8'},
-            data=body)
+        return self.post(self.http_request(body))
 
     def handle_500(self, response):
         """Handle reponse in case of ERROR 500 type."""
@@ -84,28 +98,20 @@ class LaposteTransport(Transport):
             if len(errors) > 0:
                 raise CarrierError(response, errors)
 
-        def extract_xml(response):
-            """Because the answer is mixedpart we need to extract."""
-            content_type = response.headers['Content-Type']
-            boundary = content_type.split('boundary="')[1].split('";')[0]
-            start = content_type.split('start="')[1].split('";')[0]
-
-            between_boundaries = response.text.split("--%s" % boundary)[1]
-            after_start = between_boundaries.split(start)[1]
-            clean_xml = after_start.strip()  # = trim()
-            return clean_xml
-
         def extract_body(response_xml):
             """Remove soap wrapper."""
             xml = objectify.fromstring(response_xml)
             payload_xml = xml.Body.getchildren()[0]
             return etree.tostring(payload_xml)
 
-        response_xml = extract_xml(response)
-        raise_on_error(response_xml)
+        parts = parse_response(response)
+        response_xml = parts['start'].strip()
+        with tracing.span('xml', size=len(response_xml)):
+            raise_on_error(response_xml)
+            body = extract_body(response_xml)
         return {
-            'body': extract_body(response_xml),
-            'parts': get_parts(response),
+            'body': body,
+            'parts': parts,
             'response': response,
         }
 
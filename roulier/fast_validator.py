@@ -0,0 +1,471 @@
+# -*- coding: utf-8 -*-
+"""Compiled validation of Api schemas.
+
+An alternative to cerberus for hot schemas: a schema is compiled once
+into plain python functions which validate, set defaults and coerce
+the same way cerberus does, and report errors in the same format
+(the messages and their order are those of cerberus 1.1, the version
+of requirements.txt; note that cerberus 1.1 does not import on
+python >= 3.10).
+
+Only the rules used by carriers are supported: type, required, empty,
+nullable, default, allowed, maxlength, rename, coerce, schema, items
+and allow_unknown (as a boolean).
+Compiling a schema using another cerberus rule raises
+NotImplementedError.
+
+See Api.validator_engine to enable it for a carrier.
+"""
+from copy import copy, deepcopy
+from datetime import date, datetime
+import sys
+
+from cerberus import errors
+from cerberus.errors import BasicErrorHandler
+from cerberus.platform import _int_types, _str_type
+from cerberus.validator import DocumentError
+
+try:
+    from collections.abc import Iterable, Mapping, Sequence
+except ImportError:  # python 2
+    from collections import Iterable, Mapping, Sequence
+
+PY2 = sys.version_info[0] == 2
+
+MESSAGES = BasicErrorHandler.messages
+
+# rules handled while normalizing or by the mapping itself
+NORMALIZATION_RULES = (
+    'allow_unknown', 'coerce', 'default', 'nullable', 'rename',
+    'required', 'type')
+
+_IMMUTABLE = (_str_type, float, bool, type(None)) + _int_types
+
+TYPES = {
+    'binary': lambda v: isinstance(v, (bytes, bytearray)),
+    'boolean': lambda v: isinstance(v, bool),
+    'date': lambda v: isinstance(v, date),
+    'datetime': lambda v: isinstance(v, datetime),
+    'dict': lambda v: isinstance(v, Mapping),
+    'float': lambda v: isinstance(v, (float, ) + _int_types),
+    'integer': lambda v: isinstance(v, _int_types),
+    'list': lambda v: (
+        isinstance(v, Sequence) and not isinstance(v, _str_type)),
+    'number': lambda v: (
+        isinstance(v, _int_types + (float, )) and not isinstance(v, bool)),
+    'set': lambda v: isinstance(v, set),
+    'string': lambda v: isinstance(v, _str_type),
+}
+
+
+def _encode(value):
+    # cerberus formats messages with utf8 strings on python 2
+    if PY2 and isinstance(value, unicode):  # noqa: F821
+        return value.encode('utf-8')
+    return value
+
+
+def _path_key(path):
+    # same order as cerberus.utils.compare_paths_lt
+    return tuple(
+        (0, crumb) if isinstance(crumb, _int_types) else (1, crumb)
+        for crumb in path)
+
+
+def _error(errors_list, path, rule, error, constraint=None,
+           value=None, info=()):
+    """Add an error formatted like cerberus' BasicErrorHandler."""
+    message = MESSAGES[error.code].format(
+        *info, constraint=_encode(constraint),
+        field=path[-1], value=_encode(value))
+    errors_list.append(((_path_key(path), rule), path, message, None))
+
+
+def _group_error(errors_list, path, rule, children):
+    """Add errors of sequence items (like cerberus' group errors)."""
+    children.sort(key=lambda error: error[0])
+    errors_list.append(((_path_key(path), rule), path, None, children))
+
+
+def error_tree(errors_list):
+    """Return errors as a dict like cerberus' Validator.errors."""
+    tree = {}
+
+    def insert(tree, path, message):
+        field = path[0]
+        if len(path) == 1:
+            if field in tree:
+                subtree = tree[field].pop()
+                tree[field] += [message, subtree]
+            else:
+                tree[field] = [message, {}]
+        else:
+            if field not in tree:
+                tree[field] = [{}]
+            insert(tree[field][-1], path[1:], message)
+
+    def insert_all(errors_list):
+        for _, path, message, children in errors_list:
+            if children is None:
+                insert(tree, path, message)
+            else:
+                insert_all(children)
+
+    def purge(error_list):
+        if not error_list[-1]:
+            error_list.pop()
+        else:
+            for key in error_list[-1]:
+                purge(error_list[-1][key])
+
+    insert_all(sorted(errors_list, key=lambda error: error[0]))
+    for field in tree:
+        purge(tree[field])
+    return tree
+
+
+class _FieldRules(object):
+    """Compiled rules of a field."""
+
+    def __init__(self, definition, compiler):
+        self.definition = definition
+        self.compiler = compiler
+        self.nullable = definition.get('nullable', False)
+        self.has_default = 'default' in definition
+        self.default = definition.get('default')
+        self.copy_default = not isinstance(self.default, _IMMUTABLE)
+        self.rename = definition.get('rename')
+        self.coercers = compiler.coercers(definition.get('coerce'))
+        self.is_mapping_container = 'schema' in definition or (
+            'allow_unknown' in definition)
+        self.is_sequence_container = 'schema' in definition
+        self._mapping_rules = None
+        self._item_rules = None
+
+        self.type_check = None
+        if 'type' in definition:
+            types = definition['type']
+            if isinstance(types, _str_type):
+                self.type_check = TYPES[types]
+            else:
+                checks = [TYPES[t] for t in types]
+                self.type_check = lambda v: any(c(v) for c in checks)
+
+        self.checks = []
+        for rule, constraint in definition.items():
+            if rule in NORMALIZATION_RULES:
+                continue
+            build = getattr(self, '_build_%s' % rule, None)
+            if build is not None:
+                check = build(constraint)
+                if check is not None:
+                    self.checks.append(check)
+            elif rule in compiler.known_rules:
+                raise NotImplementedError(
+                    "Rule '%s' is not supported by the compiled "
+                    "validator" % rule)
+            # else: not a rule, cerberus ignores it too
+
+        # 'schema' is read as rules of a dict or of list items
+        # depending on the value: compile now what type declares
+        if 'schema' in definition:
+            types = definition.get('type', ())
+            if isinstance(types, _str_type):
+                types = [types]
+            if 'dict' in types:
+                self.mapping_rules()
+            if 'list' in types:
+                self.item_rules()
+
+    # compiled sub schemas
+
+    def mapping_rules(self):
+        """Rules of this field when its value is a dict."""
+        if self._mapping_rules is None:
+            self._mapping_rules = self.compiler.mapping(
+                self.definition.get('schema', {}),
+                self.definition.get(
+                    'allow_unknown', self.compiler.allow_unknown))
+        return self._mapping_rules
+
+    def item_rules(self):
+        """Rules of each item when the value of this field is a list."""
+        if self._item_rules is None:
+            self._item_rules = self.compiler.field(self.definition['schema'])
+            if self._item_rules.rename is not None:
+                raise NotImplementedError(
+                    "Rule 'rename' is not supported in a sequence")
+        return self._item_rules
+
+    # validation rules
+
+    def _build_allowed(self, allowed):
+        allowed_set = set(allowed)
+
+        def check(value, path, errors_list):
+            if isinstance(value, Iterable) and not isinstance(
+                    value, _str_type):
+                unallowed = set(value) - allowed_set
+                if unallowed:
+                    _error(errors_list, path, 'allowed',
+                           errors.UNALLOWED_VALUES, allowed, value,
+                           (list(unallowed), ))
+            elif value not in allowed:
+                _error(errors_list, path, 'allowed',
+                       errors.UNALLOWED_VALUE, allowed, value)
+        return check
+
+    def _build_empty(self, empty):
+        if empty:
+            return None
+
+        def check(value, path, errors_list):
+            if isinstance(value, Iterable) and len(value) == 0:
+                _error(errors_list, path, 'empty',
+                       errors.EMPTY_NOT_ALLOWED, empty, value)
+        return check
+
+    def _build_maxlength(self, maxlength):
+        def check(value, path, errors_list):
+            if isinstance(value, Iterable) and len(value) > maxlength:
+                _error(errors_list, path, 'maxlength',
+                       errors.MAX_LENGTH, maxlength, value, (len(value), ))
+        return check
+
+    def _build_schema(self, schema):
+        def check(value, path, errors_list):
+            if isinstance(value, Sequence) and not isinstance(
+                    value, _str_type):
+                item_rules = self.item_rules()
+                children = []
+                for i, item in enumerate(value):
+                    item_rules.validate(item, path + (i, ), children)
+                if children:
+                    _group_error(errors_list, path, 'schema', children)
+            elif isinstance(value, Mapping):
+                self.mapping_rules().validate(value, path, errors_list)
+        return check
+
+    def _build_items(self, items):
+        items_rules = [self.compiler.field(item) for item in items]
+
+        def check(value, path, errors_list):
+            if len(items) != len(value):
+                _error(errors_list, path, 'items', errors.ITEMS_LENGTH,
+                       items, value, (len(items), len(value)))
+                return
+            children = []
+            for i, (item_rules, item) in enumerate(zip(items_rules, value)):
+                item_rules.validate(item, path + (i, ), children)
+            if children:
+                _group_error(errors_list, path, 'items', children)
+        return check
+
+    # processing
+
+    def coerce(self, value, path, errors_list):
+        for coercer in self.coercers:
+            try:
+                value = coercer(value)
+            except Exception as e:
+                _error(errors_list, path, 'coerce', errors.COERCION_FAILED,
+                       self.definition['coerce'], value, (str(e), ))
+                break
+        return value
+
+    def normalize_container(self, value, path, errors_list):
+        """Normalize a dict or a list value."""
+        if isinstance(value, Mapping):
+            if self.is_mapping_container:
+                return self.mapping_rules().normalize(
+                    copy(value), path, errors_list)
+        elif isinstance(value, _str_type):
+            pass
+        elif isinstance(value, Sequence) and self.is_sequence_container:
+            item_rules = self.item_rules()
+            return [
+                item_rules.normalize_item(item, path + (i, ), errors_list)
+                for i, item in enumerate(value)]
+        return value
+
+    def normalize_item(self, value, path, errors_list):
+        """Normalize a value of a list."""
+        if value is None and self.has_default and not self.nullable:
+            value = deepcopy(self.default)
+        if self.coercers:
+            value = self.coerce(value, path, errors_list)
+        return self.normalize_container(value, path, errors_list)
+
+    def validate(self, value, path, errors_list):
+        if value is None:
+            if not self.nullable:
+                _error(errors_list, path, 'nullable', errors.NOT_NULLABLE,
+                       self.nullable, value)
+            return
+        if self.type_check is not None and not self.type_check(value):
+            _error(errors_list, path, 'type', errors.BAD_TYPE,
+                   self.definition['type'], value)
+            return
+        for check in self.checks:
+            check(value, path, errors_list)
+
+
+class _MappingRules(object):
+    """Compiled schema of a dict."""
+
+    def __init__(self, schema, allow_unknown, compiler):
+        if isinstance(allow_unknown, Mapping):
+            raise NotImplementedError(
+                "Only boolean allow_unknown is supported by the compiled "
+                "validator")
+        self.allow_unknown = allow_unknown
+        self.fields = {}
+        for field, definition in schema.items():
+            if not isinstance(definition, Mapping):
+                definition = {}
+            self.fields[field] = compiler.field(definition)
+        self.renames = dict(
+            (field, rules.rename) for field, rules in self.fields.items()
+            if rules.rename is not None)
+        self.defaults = [
+            (field, rules) for field, rules in self.fields.items()
+            if rules.has_default]
+        self.coerced = [
+            (field, rules) for field, rules in self.fields.items()
+            if rules.coercers]
+        self.required = [
+            field for field, rules in self.fields.items()
+            if rules.definition.get('required') is True]
+
+    def normalize(self, mapping, path, errors_list):
+        """Normalize mapping in place, like cerberus' normalized()."""
+        if self.renames:
+            for field in tuple(mapping):
+                if field in self.renames:
+                    mapping[self.renames[field]] = mapping.pop(field)
+        for field, rules in self.defaults:
+            if field not in mapping or (
+                    mapping[field] is None and not rules.nullable):
+                if rules.copy_default:
+                    mapping[field] = deepcopy(rules.default)
+                else:
+                    mapping[field] = rules.default
+        for field, rules in self.coerced:
+            if field in mapping:
+                mapping[field] = rules.coerce(
+                    mapping[field], path + (field, ), errors_list)
+        fields = self.fields
+        for field in mapping:
+            rules = fields.get(field)
+            if rules is not None:
+                mapping[field] = rules.normalize_container(
+                    mapping[field], path + (field, ), errors_list)
+        return mapping
+
+    def validate(self, mapping, path, errors_list):
+        """Validate a normalized mapping."""
+        fields = self.fields
+        for field in mapping:
+            rules = fields.get(field)
+            if rules is not None:
+                rules.validate(mapping[field], path + (field, ), errors_list)
+            elif not self.allow_unknown:
+                _error(errors_list, path + (field, ), '',
+                       errors.UNKNOWN_FIELD, None, mapping[field])
+        for field in self.required:
+            if field not in mapping:
+                _error(errors_list, path + (field, ), 'required',
+                       errors.REQUIRED_FIELD, True)
+
+
+class _Compiler(object):
+    """Compile definitions, sharing compiled rules of a same dict."""
+
+    def __init__(self, validator, allow_unknown):
+        self.validator = validator
+        self.allow_unknown = allow_unknown
+        self.known_rules = set(validator.rules)
+        self._fields = {}
+
+    def field(self, definition):
+        key = id(definition)
+        if key not in self._fields:
+            # keep a reference on definition: id() must stay unique
+            self._fields[key] = (definition, _FieldRules(definition, self))
+        return self._fields[key][1]
+
+    def mapping(self, schema, allow_unknown):
+        return _MappingRules(schema, allow_unknown, self)
+
+    def coercers(self, coerce):
+        if coerce is None:
+            return []
+        if isinstance(coerce, _str_type) or callable(coerce):
+            coerce = [coerce]
+        return [
+            getattr(self.validator, '_normalize_coerce_%s' % c)
+            if isinstance(c, _str_type) else c
+            for c in coerce]
+
+
+class FastValidator(object):
+    """Validate and normalize documents against a compiled schema.
+
+    Behave like cerberus' Validator for the supported rules.
+    Instances hold no state about documents: they can be shared
+    between threads.
+
+    params:
+        schema: a cerberus schema (like Api.api_schema())
+        validator: cerberus validator providing coercers
+            (methods _normalize_coerce_*)
+        allow_unknown: allow fields not defined in schema
+    """
+
+    def __init__(self, schema, validator, allow_unknown=False):
+        compiler = _Compiler(validator, allow_unknown)
+        self.root = compiler.mapping(schema, allow_unknown)
+
+    def _check_document(self, document):
+        if document is None:
+            raise DocumentError(errors.DOCUMENT_MISSING)
+        if not isinstance(document, Mapping):
+            raise DocumentError(errors.DOCUMENT_FORMAT.format(document))
+
+    def normalize(self, document):
+        """Return a normalized copy of document and the list of
+        errors occured while normalizing (see validate())."""
+        self._check_document(document)
+        errors_list = []
+        document = self.root.normalize(copy(document), (), errors_list)
+        return document, errors_list
+
+    def validate(self, document, errors_list=()):
+        """Validate a document returned by normalize().
+
+        returns: errors, a dict like cerberus' Validator.errors,
+            including those of errors_list, empty if document is valid.
+        """
+        errors_list = list(errors_list)
+        self.root.validate(document, (), errors_list)
+        return error_tree(errors_list)
+
+    def normalized(self, document):
+        """Return a normalized copy of document.
+
+        Like cerberus: None if an error occured while normalizing.
+        """
+        document, errors_list = self.normalize(document)
+        if errors_list:
+            return None
+        return document
+
+    def validated(self, document):
+        """Normalize then validate document.
+
+        returns: (normalized copy of document, errors)
+            errors is a dict like cerberus' Validator.errors,
+            empty if document is valid.
+        """
+        document, errors_list = self.normalize(document)
+        return document, self.validate(document, errors_list)
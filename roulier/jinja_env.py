@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Shared Jinja environments of the templates of roulier.
+
+One environment per (template package, autoescape), built on first
+use and kept for the life of the process: templates (and included
+templates) are parsed and compiled once, then served from the
+cache of the environment, which is thread-safe.
+
+    env = get_environment('/carriers/laposte/templates', autoescape=True)
+    template = env.get_template('laposte_generateLabelRequest.xml')
+
+Templates can also be compiled to python modules beforehand
+(at install or deploy time) so that new processes skip compilation:
+
+    python -m roulier.jinja_env /var/lib/roulier/templates
+
+then set ROULIER_COMPILED_TEMPLATES=/var/lib/roulier/templates
+or call use_compiled_templates('/var/lib/roulier/templates').
+Templates missing from the directory are loaded from the package.
+"""
+from __future__ import print_function
+import os
+import sys
+import threading
+
+from jinja2 import (
+    ChoiceLoader, Environment, ModuleLoader, PackageLoader, Template)
+
+from . import tracing
+
+# template packages of roulier (paths relative to the roulier package)
+PACKAGES = [
+    '/carriers/dpd/templates',
+    '/carriers/dummy/templates',
+    '/carriers/geodis/templates',
+    '/carriers/laposte/templates',
+]
+
+_environments = {}
+_lock = threading.Lock()
+_compiled_directory = os.environ.get('ROULIER_COMPILED_TEMPLATES')
+
+
+class TracedTemplate(Template):
+    """Template rendered in a 'render' span (see roulier.tracing)."""
+
+    def render(self, *args, **kwargs):
+        with tracing.span('render', template=self.name) as span:
+            result = super(TracedTemplate, self).render(*args, **kwargs)
+            span.set('size', len(result))
+        return result
+
+
+def _compiled_path(directory, path, autoescape):
+    name = path.strip('/').replace('/', '_')
+    if autoescape:
+        name += '_autoescape'
+    return os.path.join(directory, name)
+
+
+def _build(path, autoescape, compiled=True):
+    loader = PackageLoader('roulier', path)
+    if compiled and _compiled_directory:
+        compiled_path = _compiled_path(_compiled_directory, path, autoescape)
+        if os.path.isdir(compiled_path):
+            loader = ChoiceLoader([ModuleLoader(compiled_path), loader])
+    extensions = ['jinja2.ext.with_']
+    if autoescape:
+        extensions.append('jinja2.ext.autoescape')
+    # templates are package data: no need to check them for changes
+    env = Environment(
+        loader=loader, extensions=extensions, autoescape=autoescape,
+        auto_reload=False)
+    env.template_class = TracedTemplate
+    return env
+
+
+def get_environment(path, autoescape=False):
+    """Return the shared environment of a template package.
+
+    params:
+        path: path of the templates, relative to the roulier package
+            (like '/carriers/laposte/templates')
+        autoescape: escape rendered values (xml/html)
+    return: jinja2.Environment
+    """
+    key = (path, autoescape)
+    env = _environments.get(key)
+    if env is None:
+        with _lock:
+            env = _environments.get(key)
+            if env is None:
+                env = _environments[key] = _build(path, autoescape)
+    return env
+
+
+def clear():
+    """Forget the environments (and their compiled templates)."""
+    with _lock:
+        _environments.clear()
+
+
+def use_compiled_templates(directory):
+    """Load templates from modules built by compile_templates().
+
+    params:
+        directory: as given to compile_templates(), None to stop
+            using compiled templates
+    """
+    global _compiled_directory
+    _compiled_directory = directory
+    clear()
+
+
+def compile_templates(directory, packages=None):
+    """Compile templates to python modules.
+
+    params:
+        directory: where modules are written
+        packages: template packages, default to PACKAGES
+    """
+    for path in packages or PACKAGES:
+        for autoescape in (False, True):
+            env = _build(path, autoescape, compiled=False)
+            env.compile_templates(
+                _compiled_path(directory, path, autoescape),
+                zip=None, ignore_errors=False)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print('Usage: python -m roulier.jinja_env directory')
+        sys.exit(1)
+    compile_templates(sys.argv[1])
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Labels of a document of concatenated printer labels (ZPL, EPL).
+
+Carriers send the labels of a multi-parcel shipment as one
+document. Labels finds the end of each label in one pass and
+keeps offsets: a label is copied from the document only when
+it is asked for (or not at all, with view()).
+
+    labels = Labels(document)
+    len(labels)  # number of labels
+    labels[0]  # bytes of the first label
+    labels.view(0)  # memoryview of the document, no copy
+
+A label ends with ^XZ (ZPL) or a P line (EPL: print); it begins
+where the previous one ended, line breaks and spaces skipped
+(so commands sent between labels, like downloaded graphics,
+stay with the label following them). A document without
+any end is one label.
+"""
+import re
+
+try:
+    from collections.abc import Sequence
+except ImportError:  # python 2
+    from collections import Sequence
+
+# end of a label, by language
+ENDS = {
+    # ^XZ (re.IGNORECASE would be much slower)
+    'zpl': re.compile(br'\^[Xx][Zz]'),
+    # a P line (print)
+    'epl': re.compile(br'^P\d+(?:,\d+)?(?=\r?$)', re.MULTILINE),
+}
+_SPACE = re.compile(br'[ \t\r\n]*')
+
+
+def scan(document, language=None):
+    """Return the language and (start, end) offsets of the labels.
+
+    params:
+        document: bytes
+        language: 'zpl', 'epl' or None to guess it
+    return: (language or None, list of (start, end))
+    """
+    languages = [language] if language else ['zpl', 'epl']
+    for language in languages:
+        spans = []
+        start = 0
+        for match in ENDS[language].finditer(document):
+            end = match.end()
+            spans.append((start, end))
+            start = _SPACE.match(document, end).end()
+        if spans:
+            if start < len(document):
+                # not a label alone: part of the last one
+                spans[-1] = (spans[-1][0], len(document))
+            return language, spans
+    return None, [(0, len(document))]
+
+
+class Labels(Sequence):
+    """Labels of a document (see scan()), as bytes.
+
+    params:
+        document: bytes
+        language: 'zpl', 'epl' or None to guess it
+    """
+
+    def __init__(self, document, language=None):
+        self.document = document
+        self.language, self.spans = scan(document, language)
+
+    def __len__(self):
+        return len(self.spans)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.document[start:end]
+                    for start, end in self.spans[index]]
+        start, end = self.spans[index]
+        return self.document[start:end]
+
+    def view(self, index):
+        """Return a label as a memoryview of the document."""
+        start, end = self.spans[index]
+        return memoryview(self.document)[start:end]
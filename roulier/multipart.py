@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""Parse multipart/related (MTOM) responses of carriers.
+
+Boundaries are searched in the bytes of the response: parts are
+not copied (memoryviews of the content), they are turned into bytes
+on first access.
+
+    parts = parse_response(response)  # a requests.Response
+    parts['start']  # the soap envelope (bytes)
+    parts.get('label-1@cxf.apache.org')
+
+A streamed response can be parsed while it is received:
+only the part being received is kept in memory.
+
+    parser = MultipartParser(response.headers['Content-Type'])
+    for chunk in response.iter_content(65536):
+        parser.feed(chunk)
+    parts = parser.close()
+
+Values are the raw bytes of the parts, like email.parser
+(base64 or quoted-printable parts are not decoded).
+"""
+import email.message
+import email.parser
+import re
+
+from . import tracing
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # python 2
+    from collections import Mapping
+
+# a line of headers (see email.feedparser)
+_HEADER_LINE = re.compile(br'From |[\041-\071\073-\176]+:|[\t ]')
+_EOL = re.compile(br'\r\n|\r|\n')
+
+
+class Parts(Mapping):
+    """Parts of a multipart response, by Content-ID.
+
+    The root part ('start' parameter of the Content-Type, or first
+    part) is 'start', parts without Content-ID are 'Attachment<i>'.
+    """
+
+    def __init__(self):
+        self._contents = {}
+        self._values = {}
+        self._headers = {}
+
+    def add(self, key, content, headers):
+        """Add a part.
+
+        params:
+            content: bytes or memoryview
+            headers: email.message.Message
+        """
+        self._contents[key] = content
+        self._values.pop(key, None)
+        self._headers[key] = headers
+
+    def view(self, key):
+        """Return the content of a part, without copy (memoryview)."""
+        return memoryview(self._contents[key])
+
+    def headers(self, key):
+        """Return the headers of a part (email.message.Message)."""
+        return self._headers[key]
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            content = self._contents[key]
+            if isinstance(content, memoryview):
+                content = content.tobytes()
+            self._values[key] = content
+            return content
+
+    def __iter__(self):
+        return iter(self._contents)
+
+    def __len__(self):
+        return len(self._contents)
+
+    def __repr__(self):
+        return '<Parts %s>' % ', '.join(
+            '%s: %d bytes' % (key, len(content))
+            for key, content in self._contents.items())
+
+
+def _parse_content_type(content_type):
+    """Return boundary and start (Content-ID of the root part)."""
+    message = email.message.Message()
+    message['Content-Type'] = content_type
+    boundary = message.get_param('boundary')
+    if not boundary:
+        raise ValueError('No boundary in %s' % content_type)
+    start = message.get_param('start') or ''
+    return boundary.encode('ascii'), start.lstrip('<').rstrip('>')
+
+
+def _find_delimiter(buf, delimiter, pos, final):
+    """Find the next delimiter line (like email.feedparser).
+
+    return: (line start, end of line, is the close delimiter)
+        or (None, where to search again, False) if none is found
+    """
+    length = len(buf)
+    while True:
+        index = buf.find(delimiter, pos)
+        if index < 0:
+            # the delimiter may be cut at the end of buf
+            return None, max(pos, length - len(delimiter) - 1), False
+        pos = index + 1
+        if index and buf[index - 1:index] not in (b'\n', b'\r'):
+            continue
+        end = index + len(delimiter)
+        if length < end + 2 and not final:
+            return None, index, False  # may be the close delimiter
+        closing = buf[end:end + 2] == b'--'
+        if closing:
+            end += 2
+        while buf[end:end + 1] in (b' ', b'\t'):
+            end += 1
+        if end >= length:
+            if final:
+                return index, end, closing
+            return None, index, False
+        eol = _EOL.match(buf, end)
+        if eol is None:
+            continue
+        if eol.end() == length and buf[end:] == b'\r' and not final:
+            return None, index, False  # may be \r\n
+        return index, eol.end(), closing
+
+
+def _content_end(buf, start, line_start):
+    """End of a part: the line break before a delimiter is not in it.
+
+    (also stripped at the end of the last part if there is
+    no close delimiter)
+    """
+    if buf[line_start - 2:line_start] == b'\r\n' and line_start - 2 >= start:
+        return line_start - 2
+    if line_start > start and buf[line_start - 1:line_start] in (
+            b'\n', b'\r'):
+        return line_start - 1
+    return line_start
+
+
+def _split_headers(buf, start, end):
+    """Return headers (email.message.Message) and body start of a part."""
+    pos = start
+    while pos < end:
+        eol = _EOL.search(buf, pos, end)
+        line_end = eol.start() if eol else end
+        if line_end == pos:  # blank line
+            pos = eol.end() if eol else end
+            break
+        if not _HEADER_LINE.match(buf, pos, line_end):
+            break  # missing blank line: body starts here
+        pos = eol.end() if eol else end
+    headers = bytes(buf[start:pos])
+    if str is not bytes:  # python 3
+        headers = headers.decode('latin-1')
+    return email.parser.HeaderParser().parsestr(headers), pos
+
+
+class _Builder(object):
+    """Add parts to Parts with the keys of ws_tools.get_parts."""
+
+    def __init__(self, start):
+        self.start = start
+        self.parts = Parts()
+        self.index = 0
+
+    def add(self, buf, start, end, copy):
+        headers, body = _split_headers(buf, start, end)
+        content = memoryview(buf)[body:end]
+        if copy:
+            content = content.tobytes()
+        cid = headers.get('content-id', '').lstrip('<').rstrip('>')
+        if (not self.start or self.start == cid) and (
+                'start' not in self.parts):
+            key = 'start'
+        else:
+            key = cid or 'Attachment%d' % self.index
+        self.parts.add(key, content, headers)
+        self.index += 1
+
+
+def parse(content_type, content):
+    """Parse a multipart body.
+
+    params:
+        content_type: Content-Type header (with the boundary)
+        content: bytes of the body
+    return: Parts, memoryviews of content
+    """
+    boundary, start = _parse_content_type(content_type)
+    delimiter = b'--' + boundary
+    builder = _Builder(start)
+    part_start = None
+    pos = 0
+    while True:
+        line_start, pos, closing = _find_delimiter(
+            content, delimiter, pos, True)
+        if line_start is None:
+            break
+        if part_start is not None:
+            builder.add(content, part_start, _content_end(
+                content, part_start, line_start), copy=False)
+        part_start = pos
+        if closing:
+            return builder.parts
+    if part_start is not None:
+        # no close delimiter
+        builder.add(content, part_start, _content_end(
+            content, part_start, len(content)), copy=False)
+    return builder.parts
+
+
+def parse_response(response):
+    """Parse the body of a requests.Response (see parse())."""
+    content = response.content
+    with tracing.span('multipart', size=len(content)):
+        return parse(response.headers['Content-Type'], content)
+
+
+class MultipartParser(object):
+    """Parse a multipart body received in chunks.
+
+    Only the part being received is kept: each part is copied
+    once, when complete.
+    """
+
+    def __init__(self, content_type):
+        boundary, start = _parse_content_type(content_type)
+        self._delimiter = b'--' + boundary
+        self._builder = _Builder(start)
+        self._buffer = bytearray()
+        self._pos = 0  # where to search the next delimiter
+        self._part_start = None  # None before the first delimiter
+        self._done = False
+
+    @property
+    def parts(self):
+        """Parts received so far."""
+        return self._builder.parts
+
+    def feed(self, data):
+        """Parse a chunk of the body."""
+        if self._done:
+            return  # epilogue
+        self._buffer += data
+        self._parse(final=False)
+
+    def close(self):
+        """Parse what is left and return Parts."""
+        if not self._done:
+            self._parse(final=True)
+        if not self._done and self._part_start is not None:
+            # no close delimiter
+            buf = self._buffer
+            self._builder.add(buf, self._part_start, _content_end(
+                buf, self._part_start, len(buf)), copy=True)
+        self._done = True
+        self._buffer = bytearray()
+        return self._builder.parts
+
+    def _parse(self, final):
+        buf = self._buffer
+        while not self._done:
+            line_start, pos, closing = _find_delimiter(
+                buf, self._delimiter, self._pos, final)
+            if line_start is None:
+                self._pos = pos
+                break
+            if self._part_start is not None:
+                self._builder.add(buf, self._part_start, _content_end(
+                    buf, self._part_start, line_start), copy=True)
+            self._part_start = self._pos = pos
+            self._done = closing
+        # forget what is parsed
+        keep = self._pos if self._part_start is None else self._part_start
+        if keep:
+            del buf[:keep]
+            self._pos -= keep
+            if self._part_start is not None:
+                self._part_start -= keep
@@ -1,22 +1,190 @@
 # -*- coding: utf-8 -*-
-"""Factory of main classes."""
-from .carriers.laposte.laposte import Laposte
-from .carriers.dummy.dummy import Dummy
-from .carriers.geodis.geodis import Geodis
-from .carriers.dpd.dpd import Dpd
+"""Factory of main classes.
+
+Carriers are imported on first use: a process using one carrier
+does not import the dependencies of the others.
+
+Carriers are found in the 'roulier.carriers' entry points of the
+installed packages (built-in carriers are declared in setup.py),
+once per process. A package adds a carrier in its setup.py:
+
+    entry_points={'roulier.carriers': [
+        'mycarrier = mypackage.mycarrier:MyCarrier']}
+
+or at runtime with register(). Scanning the installed packages
+is slow (importlib.metadata, pkg_resources before python 3.8):
+with ROULIER_CARRIER_INDEX set to a file path, the carriers found
+are saved there and read by the next processes, until a directory
+of sys.path changes.
+"""
+from importlib import import_module
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+
+log = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = 'roulier.carriers'
+INDEX_ENVIRON = 'ROULIER_CARRIER_INDEX'
+
+# name: 'module:class' of the built-in carriers (also used
+# when roulier is not installed)
+CARRIERS = {
+    "laposte": "roulier.carriers.laposte.laposte:Laposte",
+    "dummy": "roulier.carriers.dummy.dummy:Dummy",
+    "geodis": "roulier.carriers.geodis.geodis:Geodis",
+    "dpd": "roulier.carriers.dpd.dpd:Dpd",
+}
+
+# name: 'module:class' of every carrier, see registry()
+_registry = None
+# imported classes, by name
+_classes = {}
+_lock = threading.RLock()
+
+
+def discover():
+    """Return the carriers of the installed packages (entry points).
+
+    return: {name: 'module:class'}
+    """
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # python < 3.8
+        return _discover_pkg_resources()
+    try:
+        found = entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:  # python < 3.10
+        found = entry_points().get(ENTRY_POINT_GROUP, ())
+    return {entry_point.name: entry_point.value for entry_point in found}
+
+
+def _discover_pkg_resources():
+    """discover() without importlib.metadata (slower)."""
+    try:
+        from pkg_resources import iter_entry_points
+    except ImportError:  # setuptools not installed
+        return {}
+    return {
+        entry_point.name: '%s:%s' % (
+            entry_point.module_name, '.'.join(entry_point.attrs))
+        for entry_point in iter_entry_points(ENTRY_POINT_GROUP)}
+
+
+def _signature():
+    """Key of the installed packages: sys.path and the modification
+    time of its directories (changed by an install)."""
+    digest = hashlib.sha1()
+    for path in sys.path:
+        try:
+            mtime = os.stat(path or '.').st_mtime
+        except OSError:
+            mtime = None
+        digest.update(repr((path, mtime)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _read_index(path, signature):
+    try:
+        with open(path) as index_file:
+            index = json.load(index_file)
+    except (IOError, OSError, ValueError):
+        return None
+    if index.get('signature') != signature:
+        return None
+    return index.get('carriers')
+
+
+def _write_index(path, signature, carriers):
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(handle, 'w') as temp_file:
+            json.dump({'signature': signature, 'carriers': carriers},
+                      temp_file)
+        os.rename(temp_path, path)
+    except (IOError, OSError) as e:
+        # windows does not replace files, read-only directory...
+        log.warning('Carrier index not written: %s', e)
+
+
+def registry(index=None):
+    """Return the carriers, found on first call.
+
+    params:
+        index: path of the index file (default: ROULIER_CARRIER_INDEX,
+            no index if not set)
+    return: {name: 'module:class' or class}
+    """
+    global _registry
+    if _registry is None:
+        with _lock:
+            if _registry is None:
+                index = index or os.environ.get(INDEX_ENVIRON)
+                carriers = None
+                if index:
+                    signature = _signature()
+                    carriers = _read_index(index, signature)
+                if carriers is None:
+                    carriers = discover()
+                    if index:
+                        _write_index(index, signature, carriers)
+                found = dict(CARRIERS)
+                found.update(carriers)
+                _registry = found
+    return _registry
+
+
+def register(name, carrier):
+    """Add a carrier to the registry of this process.
+
+    params:
+        carrier: class or 'module:class' (imported on first use)
+    """
+    with _lock:
+        registry()[name] = carrier
+        _classes.pop(name, None)
+
+
+def reset_registry():
+    """Forget the carriers found (and register()ed): found again
+    on next use."""
+    global _registry
+    with _lock:
+        _registry = None
+        _classes.clear()
+
+
+def carrier_class(name):
+    """Return the class of a carrier, imported on first call.
+
+    raise KeyError if the carrier is unknown
+    """
+    klass = _classes.get(name)
+    if klass is None:
+        with _lock:
+            klass = _classes.get(name)
+            if klass is None:
+                klass = registry()[name]
+                if not isinstance(klass, type):
+                    module, class_name = klass.split(':')
+                    klass = import_module(module)
+                    for attr in class_name.split('.'):
+                        klass = getattr(klass, attr)
+                _classes[name] = klass
+    return klass
 
 
 def _carriers():
-    """Get names:class of carriers.
+    """Get names:class of carriers (every carrier is imported).
 
     You may use the factory get('laposte') instead.
     """
-    return {
-        "laposte": Laposte,
-        "dummy": Dummy,
-        "geodis": Geodis,
-        "dpd": Dpd,
-    }
+    return {name: carrier_class(name) for name in registry()}
 
 
 def get_carriers():
@@ -24,7 +192,7 @@ def get_carriers():
 
     return: list of strings
     """
-    return _carriers().keys()
+    return registry().keys()
 
 
 def get(carrier):
@@ -36,9 +204,8 @@ def get(carrier):
     ws = LaposteTransport()
     ws.send(data)
     """
-    carrier_obj = _carriers().get(carrier.lower())
-
-    if carrier_obj:
-        return carrier_obj()
-    else:
+    try:
+        carrier_obj = carrier_class(carrier.lower())
+    except KeyError:
         raise BaseException("Carrier not found")
+    return carrier_obj()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""Text cleanup for carriers: one translation table per profile.
+
+A profile maps each character to a replacement (or nothing) and
+sanitizes a text in one pass (unicode.translate()). Characters
+missing from the table are looked up once, then kept in the table.
+Results of recent texts are memoized (addresses repeat a lot).
+
+    from roulier.sanitize import ACCENTS
+    ACCENTS(u'Hélène Œuvre')  # 'Helene OEuvre'
+
+Profiles:
+- ZPL: transliterated to ascii (unidecode), ZPL control characters
+  removed
+- ACCENTS: french accents folded, other non-ascii characters removed
+  (for web services not handling utf8)
+- EDIFACT: EDIFACT separators replaced by spaces (escaping would make
+  tokens longer than allowed), non-ascii characters removed
+
+Carriers needing other rules can extend a profile:
+
+    ACCENTS.extend({u'ß': u'ss'})
+
+Sanitized texts are str (ascii); other values are returned unchanged.
+"""
+from unidecode import unidecode
+
+try:
+    basestring
+except NameError:  # python 3
+    basestring = unicode = str
+    unichr = chr
+
+# of the memo, per profile
+MEMO_SIZE = 10000
+
+
+class _Table(dict):
+    """Translation table filled on demand by fallback()."""
+
+    def __init__(self, replace, fallback):
+        super(_Table, self).__init__(
+            (ord(char), value) for char, value in replace.items())
+        self.fallback = fallback
+
+    def __missing__(self, codepoint):
+        value = self[codepoint] = self.fallback(unichr(codepoint))
+        return value
+
+
+class Profile(object):
+    """A text cleanup.
+
+    params:
+        replace: dict of character: replacement (unicode),
+            None to remove the character
+        fallback: function returning the replacement of other
+            characters (unicode or None)
+        encoding: of python 2 str (decoded before cleanup)
+    """
+
+    def __init__(self, replace, fallback, encoding='ascii'):
+        self.replace = dict(replace)
+        self.fallback = fallback
+        self.encoding = encoding
+        self._table = _Table(self.replace, fallback)
+        # latin-1 is what most of carriers' data is made of
+        for codepoint in range(256):
+            self._table[codepoint]
+        self._memo = {}
+
+    def extend(self, replace):
+        """Return a profile with more (or other) replacements."""
+        extended = dict(self.replace)
+        extended.update(replace)
+        return Profile(extended, self.fallback, self.encoding)
+
+    def __call__(self, value):
+        """Return value sanitized (if it is text)."""
+        if not isinstance(value, basestring):
+            return value
+        if isinstance(value, bytes):  # python 2
+            value = value.decode(self.encoding)
+        try:
+            return self._memo[value]
+        except KeyError:
+            pass
+        sanitized = value.translate(self._table)
+        if not isinstance(sanitized, str):  # python 2
+            sanitized = sanitized.encode('ascii')
+        if len(self._memo) >= MEMO_SIZE:
+            self._memo.clear()
+        self._memo[value] = sanitized
+        return sanitized
+
+
+def _ascii(char):
+    """Keep ascii characters, remove the others."""
+    return char if char < u'\x80' else None
+
+
+def _remove(chars, fallback):
+    def remove(char):
+        value = fallback(char)
+        if value:
+            value = u''.join(c for c in value if c not in chars)
+        return value or None
+    return remove
+
+
+# ^, 0xFE (meant as ~, unidecode leaves none) and the
+# substitutions of ^ and ~ (RS and DLE)
+ZPL_CONTROL = u'\xfe^\x1e\x10'
+
+ZPL = Profile(
+    {}, _remove(ZPL_CONTROL, lambda char: unicode(unidecode(char))),
+    # like unidecode does
+    encoding='latin-1')
+
+ACCENTS = Profile({
+    u'é': u'e', u'è': u'e', u'ë': u'e', u'ê': u'e',
+    u'ô': u'o', u'ï': u'i', u'ö': u'o', u'à': u'a', u'â': u'a',
+    u'ç': u'c', u'û': u'u', u'ù': u'u',
+    u'É': u'E', u'È': u'E', u'Ë': u'E', u'Ê': u'E',
+    u'Ô': u'O', u'Ï': u'I', u'Ö': u'O', u'À': u'A', u'Â': u'A',
+    u'Ç': u'C', u'Û': u'U', u'Ù': u'U',
+    u'œ': u'oe', u'Œ': u'OE',
+}, _ascii)
+
+# release character and separators (UNOA)
+EDIFACT = Profile(dict.fromkeys(u"?'+:", u' '), _ascii)
@@ -0,0 +1,16 @@
+from . import test_aio
+from . import test_api
+from . import test_batch
+from . import test_cache
+from . import test_fast_validator
+from . import test_import
+from . import test_jinja_env
+from . import test_labels
+from . import test_multipart
+from . import test_registry
+from . import test_sanitize
+from . import test_stand_in
+from . import test_tracing
+from . import test_transport
+from . import test_ws_tools
+from . import test_zpl
@@ -0,0 +1,442 @@
+# -*- coding: utf-8 -*-
+"""Local http server standing in for the webservices of the carriers.
+
+Usage: python -m roulier.tests.stand_in [--port 8000] [--latency 0.05]
+                                        [--error-rate 0.01] [--size 20000]
+
+then point the transports to it (in the process under test):
+
+    Transport.set_base_url('http://127.0.0.1:8000')
+
+The paths of the carriers' urls are served:
+
+    /sls-ws/SlsServiceWS            Laposte generateLabel (MTOM:
+                                    label and CN23 parts)
+    /dpd-eprintwebservice/...       DPD CreateShipmentWithLabels
+                                    (base64 png label and summary)
+    /geolabel/services/ImpressionEtiquette
+                                    Geodis label (MTOM, a zpl label
+                                    per parcel in an attachment)
+    /geolabel/services/RechercherLocalite
+                                    Geodis findLocalite
+    /services/api/zoomclient/...    Geodis tracking (REST): the
+                                    X-GEODIS-Service token is checked
+                                    against --api-key
+
+Each response takes --latency seconds, fails (the error of the
+carrier, status 500) with the probability --error-rate and has a
+payload of about --size bytes (labels, rows of a tracking list).
+StandIn can also be started in a test or a benchmark (port 0: any
+free port):
+
+    server = StandIn(latency=0.05).start()
+    Transport.set_base_url(server.url)
+"""
+from __future__ import print_function
+from datetime import datetime, timedelta
+import argparse
+import base64
+import hashlib
+import io
+import json
+import random
+import struct
+import threading
+import time
+import uuid
+import zlib
+
+from lxml import etree
+from PIL import Image, ImageDraw
+
+from roulier.carriers.geodis.geodis_api_rest_ws import (
+    GeodisApiTrackingListOut)
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:  # python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+# path: method of StandIn answering
+ROUTES = {
+    '/sls-ws/SlsServiceWS': 'laposte',
+    '/dpd-eprintwebservice/eprintwebservice.asmx': 'dpd',
+    '/geolabel/services/ImpressionEtiquette': 'geodis_label',
+    '/geolabel/services/RechercherLocalite': 'geodis_find_localite',
+    '/services/api/zoomclient/recherche-envois': 'geodis_tracking_list',
+    '/services/api/zoomclient/recherche-envoi': 'geodis_tracking',
+}
+REST_PREFIX = '/services/'
+
+SOAP = (
+    '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">'
+    '<soap:Body>%s</soap:Body></soap:Envelope>')
+FAULT = (
+    '<soap:Fault><faultcode>soap:Server</faultcode>'
+    '<faultstring>%s</faultstring>%s</soap:Fault>')
+ROOT_CID = 'root.message@cxf.apache.org'
+
+LABEL_NS = 'http://impression.service.web.etiquette.geodis.com'
+LOCALITE_NS = 'http://localite.service.web.etiquette.geodis.com'
+
+TRACKING_LINE = dict.fromkeys(
+    key for values in GeodisApiTrackingListOut().schema().values()
+    for key in values.values())
+TRACKING_LINE.update({'poids': 1.0, 'nbColis': 1})
+SITUATIONS = ['LIV', 'AAR', 'MLV', 'SOL', 'CFM']
+
+
+def zpl_label(number, size):
+    """A zpl label of about size bytes (a graphic field)."""
+    graphic = 'F0' * max(size // 2 - 60, 1)
+    return (
+        '^XA^FO50,50^GFA,%s,%s,25,%s^FS'
+        '^FO50,300^A0N,40,40^FD%s^FS^XZ\n' % (
+            len(graphic) // 2, len(graphic) // 2, graphic, number)
+    ).encode('ascii')
+
+
+def _png_chunk(kind, data):
+    return (struct.pack('>I', len(data)) + kind + data +
+            struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+
+def png_label(text, size):
+    """A png label of about size bytes: a private chunk pads it."""
+    image = Image.new('L', (400, 600), 255)
+    draw = ImageDraw.Draw(image)
+    for x in range(20, 380, 6):
+        draw.line([(x, 20), (x, 140)], fill=0, width=x % 3 + 1)
+    draw.text((20, 160), text, fill=0)
+    output = io.BytesIO()
+    image.save(output, 'PNG')
+    png = output.getvalue()
+    padding = size - len(png) - 12
+    if padding > 0:
+        # ancillary, private chunk: skipped by readers
+        png = png[:-12] + _png_chunk(b'roUl', b'\0' * padding) + png[-12:]
+    return png
+
+
+def mtom(soap, attachments):
+    """Return (content type, body) of a multipart/related response:
+    soap then the attachments ({cid: bytes})."""
+    boundary = 'uuid:%s' % uuid.uuid4()
+    chunks = [
+        b'--', boundary.encode('ascii'), b'\r\n'
+        b'Content-Type: application/xop+xml; charset=UTF-8; '
+        b'type="text/xml"\r\nContent-Transfer-Encoding: binary\r\n'
+        b'Content-ID: <', ROOT_CID.encode('ascii'), b'>\r\n\r\n',
+        soap.encode('utf-8'), b'\r\n']
+    for cid, content in attachments.items():
+        chunks += [
+            b'--', boundary.encode('ascii'), b'\r\n'
+            b'Content-Type: application/octet-stream\r\n'
+            b'Content-Transfer-Encoding: binary\r\n'
+            b'Content-ID: <', cid.encode('ascii'), b'>\r\n\r\n',
+            content, b'\r\n']
+    chunks += [b'--', boundary.encode('ascii'), b'--\r\n']
+    content_type = (
+        'multipart/related; type="application/xop+xml"; '
+        'boundary="%s"; start="<%s>"; start-info="text/xml"' % (
+            boundary, ROOT_CID))
+    return content_type, b''.join(chunks)
+
+
+def find(xml, name):
+    """Text of the elements named name (any namespace)."""
+    return xml.xpath('//*[local-name() = $name]/text()', name=name)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        BaseHTTPRequestHandler.setup(self)
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        route = ROUTES.get(self.path.split('?')[0])
+        with server.lock:
+            server.running += 1
+            server.max_running = max(server.max_running, server.running)
+        try:
+            if route is None:
+                status, content_type, content = (
+                    404, 'text/plain', b'not found')
+            else:
+                if server.latency:
+                    time.sleep(server.latency)
+                answer = getattr(server, route)
+                if server.fails():
+                    answer = getattr(server, route + '_error')
+                status, content_type, content = answer(self, body)
+        finally:
+            with server.lock:
+                server.running -= 1
+                server.requests[route] = server.requests.get(route, 0) + 1
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class StandIn(ThreadingMixIn, HTTPServer):
+    """Answer the requests of the carriers like their webservices.
+
+    requests: number of requests answered, by route (None: unknown
+        path)
+    connections: number of connections opened by the clients
+    max_running: most requests answered at the same time
+    """
+
+    daemon_threads = True
+    # connections waiting to be accepted (load tests open many)
+    request_queue_size = 128
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.0,
+                 error_rate=0.0, size=20000, api_key='password',
+                 seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.size = size
+        self.api_key = api_key
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.connections = 0
+        self.running = self.max_running = 0
+        self._png = {}
+        HTTPServer.__init__(self, address, Handler)
+        host, port = self.server_address[:2]
+        self.url = 'http://%s:%s' % (host, port)
+
+    def start(self):
+        """Serve in a thread."""
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+    def fails(self):
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def number(self, prefix, digits=11):
+        with self.lock:
+            return prefix + ''.join(
+                self.random.choice('0123456789') for __ in range(digits))
+
+    def _soap_fault(self, message, detail=''):
+        return (500, 'text/xml; charset=utf-8',
+                (SOAP % (FAULT % (message, detail))).encode('utf-8'))
+
+    # Laposte
+
+    def laposte(self, handler, body):
+        etree.fromstring(body)  # well formed
+        number = self.number('6A')
+        soap = SOAP % (
+            '<ns2:generateLabelResponse '
+            'xmlns:ns2="http://sls.ws.coliposte.fr">'
+            u'<return><messages><id>0</id><messageContent>La requête a été '
+            u'traitée avec succès</messageContent><type>INFOS</type>'
+            '</messages><labelResponse><label><xop:Include xmlns:xop='
+            '"http://www.w3.org/2004/08/xop/include" href="cid:label@sls"/>'
+            '</label><cn23><xop:Include xmlns:xop='
+            '"http://www.w3.org/2004/08/xop/include" href="cid:cn23@sls"/>'
+            '</cn23><parcelNumber>%s</parcelNumber></labelResponse>'
+            '</return></ns2:generateLabelResponse>' % number)
+        cn23 = b'%PDF-1.4\n% ' + b'\0' * (self.size // 4) + b'\n%%EOF\n'
+        content_type, content = mtom(soap, {
+            'label@sls': zpl_label(number, self.size),
+            'cn23@sls': cn23,
+        })
+        return 200, content_type, content
+
+    def laposte_error(self, handler, body):
+        return self._soap_fault('Service unavailable (stand-in)')
+
+    # DPD
+
+    def png(self, name):
+        png = self._png.get(name)
+        if png is None:
+            png = self._png[name] = base64.b64encode(
+                png_label(name, self.size)).decode('ascii')
+        return png
+
+    def dpd(self, handler, body):
+        etree.fromstring(body)  # well formed
+        number = self.number('250', 9)
+        soap = SOAP % (
+            '<CreateShipmentWithLabelsResponse '
+            'xmlns="http://www.cargonet.software">'
+            '<CreateShipmentWithLabelsResult><shipments><ShipmentBc>'
+            '<parcelnumber>%s</parcelnumber><barcode>%%00%s</barcode>'
+            '</ShipmentBc></shipments><labels>'
+            '<Label><label>%s</label><type>EPRINT</type></Label>'
+            '<Label><label>%s</label><type>EPRINTATTACHMENT</type></Label>'
+            '</labels></CreateShipmentWithLabelsResult>'
+            '</CreateShipmentWithLabelsResponse>' % (
+                number, number, self.png('label'), self.png('summary')))
+        return 200, 'text/xml; charset=utf-8', soap.encode('utf-8')
+
+    def dpd_error(self, handler, body):
+        return self._soap_fault('Service unavailable (stand-in)')
+
+    # Geodis WS
+
+    def geodis_label(self, handler, body):
+        xml = etree.fromstring(body)
+        parcels = max(len(find(xml, 'numcol')), 1)
+        routing = self.number('R', 10)
+        soap = SOAP % (
+            '<ns2:reponseImpressionEtiquette xmlns:ns2="%s">'
+            '<ns2:cabRouting>%s</ns2:cabRouting>'
+            '<ns2:codeAttachement>cid:etiquette@geodis</ns2:codeAttachement>'
+            '<ns2:codire>6910</ns2:codire><ns2:priorite>1</ns2:priorite>'
+            '<ns2:reseau>MES</ns2:reseau>%s'
+            '</ns2:reponseImpressionEtiquette>' % (
+                LABEL_NS, routing, ''.join(
+                    '<ns2:infoColis><ns2:cab>%s%02d</ns2:cab>'
+                    '<ns2:cabclt>%s</ns2:cabclt><ns2:codumg>PC</ns2:codumg>'
+                    '<ns2:numero>%s</ns2:numero></ns2:infoColis>' % (
+                        routing, i, i, i)
+                    for i in range(1, parcels + 1))))
+        labels = b''.join(
+            zpl_label('%s%02d' % (routing, i), self.size // parcels)
+            for i in range(1, parcels + 1))
+        content_type, content = mtom(soap, {'etiquette@geodis': labels})
+        return 200, content_type, content
+
+    def geodis_find_localite(self, handler, body):
+        xml = etree.fromstring(body)
+        zip_code = (find(xml, 'codePostal') or ['69100'])[0]
+        city = (find(xml, 'libelle') or ['VILLE'])[0].upper()
+        soap = SOAP % (
+            '<ns2:findLocaliteResponse xmlns:ns2="%s">%s'
+            '</ns2:findLocaliteResponse>' % (LOCALITE_NS, ''.join(
+                '<ns2:infoLocalite><ns2:codePostal>%s</ns2:codePostal>'
+                '<ns2:codeRegion>R%s</ns2:codeRegion>'
+                '<ns2:libelle>%s %s</ns2:libelle>'
+                '<ns2:numOrdre>%s</ns2:numOrdre></ns2:infoLocalite>' % (
+                    zip_code, i, city, i, i)
+                for i in range(1, 4))))
+        content_type, content = mtom(soap, {})
+        return 200, content_type, content
+
+    def _geodis_ws_error(self, handler, body):
+        soap = SOAP % (FAULT % (
+            'Service unavailable (stand-in)',
+            '<detail><ns2:fault xmlns:ns2="%s"><ns2:code>500</ns2:code>'
+            '<ns2:message>Service unavailable (stand-in)</ns2:message>'
+            '</ns2:fault></detail>' % LABEL_NS))
+        content_type, content = mtom(soap, {})
+        return 500, content_type, content
+
+    geodis_label_error = geodis_find_localite_error = _geodis_ws_error
+
+    # Geodis REST
+
+    def _rest(self, handler, body, content):
+        """Answer content if the token of the request is valid."""
+        try:
+            login, timestamp, lang, digest = handler.headers[
+                'X-GEODIS-Service'].split(';')
+        except (AttributeError, ValueError):
+            login = timestamp = lang = digest = ''
+        service = handler.path.split('?')[0][len(REST_PREFIX):]
+        expected = hashlib.sha256(';'.join([
+            self.api_key, login, timestamp, lang, service,
+            body.decode('utf-8')]).encode('utf-8')).hexdigest()
+        if digest != expected:
+            # Geodis answers errors with a 200
+            payload = {'ok': False, 'codeErreur': 'TOKEN',
+                       'texteErreur': 'Invalid X-GEODIS-Service token',
+                       'contenu': None}
+        else:
+            payload = {'ok': True, 'codeErreur': None,
+                       'texteErreur': None, 'contenu': content()}
+        return (200, 'application/json;charset=UTF-8',
+                json.dumps(payload).encode('utf-8'))
+
+    def tracking_line(self, tracking_id, date):
+        with self.lock:
+            situation = self.random.choice(SITUATIONS)
+        return dict(
+            TRACKING_LINE, noSuivi=tracking_id, noRecepisse=tracking_id,
+            dateDepart=date, codeSituation=situation)
+
+    def geodis_tracking_list(self, handler, body):
+        request = json.loads(body.decode('utf-8'))
+
+        def content():
+            start = request.get('dateDepartDebut') or '2019-01-01'
+            end = request.get('dateDepartFin') or start
+            days = (datetime.strptime(end, '%Y-%m-%d') -
+                    datetime.strptime(start, '%Y-%m-%d')).days + 1
+            line_size = len(json.dumps(self.tracking_line('T', start)))
+            rows = max(self.size // line_size, 1)
+            return [
+                self.tracking_line('T%s-%s' % (start, i), (
+                    datetime.strptime(start, '%Y-%m-%d') +
+                    timedelta(days=i % max(days, 1))).strftime('%Y-%m-%d'))
+                for i in range(rows)]
+        return self._rest(handler, body, content)
+
+    def geodis_tracking(self, handler, body):
+        request = json.loads(body.decode('utf-8'))
+        return self._rest(handler, body, lambda: self.tracking_line(
+            request.get('noSuivi') or 'T', '2019-01-01'))
+
+    def _rest_error(self, handler, body):
+        return 500, 'text/html', b'<html>Internal Server Error</html>'
+
+    geodis_tracking_list_error = geodis_tracking_error = _rest_error
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Local stand-in of the webservices of the carriers.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds to answer (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='probability of an error (default: 0)')
+    parser.add_argument('--size', type=int, default=20000,
+                        help='bytes of the payloads (default: 20000)')
+    parser.add_argument('--api-key', default='password',
+                        help='password of the Geodis REST accounts')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    server = StandIn(
+        (args.host, args.port), latency=args.latency,
+        error_rate=args.error_rate, size=args.size, api_key=args.api_key,
+        seed=args.seed)
+    print('Serving on %s' % server.url)
+    print('Transport.set_base_url(%r)' % server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""Coroutines of roulier.aio against the local stand-in."""
+import time
+
+import pytest
+
+from roulier.carriers.laposte.laposte import Laposte
+from roulier.carriers.geodis.geodis import Geodis
+from roulier.carriers.geodis.geodis_tracking_cache import GeodisTrackingCache
+from roulier.carriers.geodis.geodis_transport_rest_ws import (
+    GeodisTransportRestWs)
+from roulier.exception import CarrierError
+from roulier.transport import Transport
+
+from .stand_in import StandIn
+
+try:
+    import asyncio
+    import aiohttp  # noqa: F401
+except ImportError:  # python 2 or aiohttp not installed
+    aiohttp = None
+
+pytestmark = pytest.mark.skipif(
+    aiohttp is None, reason="python 3 and aiohttp required")
+
+
+@pytest.fixture
+def stand_in():
+    server = StandIn(size=2000, seed=1).start()
+    Transport.set_base_url(server.url)
+    yield server
+    Transport.set_base_url(None)
+    server.close()
+
+
+def _laposte_data(laposte):
+    data = laposte.api()
+    data['auth']['login'] = '12345'
+    data['service']['product'] = 'COL'
+    data['service']['shippingDate'] = '2019/09/12'
+    data['parcels'][0]['weight'] = 3.4
+    for address in ('from_address', 'to_address'):
+        data[address].update({
+            'name': 'Akretion', 'street1': '35 b Rue Montgolfier',
+            'city': 'Villeurbanne', 'country': 'FR', 'zip': '69100'})
+    return data
+
+
+def _tracking_data(geodis, number):
+    data = geodis.api('tracking')
+    data['auth'].update({'login': 'l', 'password': 'password'})
+    data['service']['trackingId'] = number
+    return data
+
+
+def _run(aio_carrier, *calls):
+    """Return the results of the coroutines returned by calls, run one
+    after the other in a new event loop.
+
+    The session of aio_carrier and the loop are closed afterwards.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return [loop.run_until_complete(call()) for call in calls]
+    finally:
+        loop.run_until_complete(aio_carrier.close())
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def test_laposte_label(stand_in):
+    from roulier.aio import AioCarrier
+
+    laposte = Laposte()
+    data = _laposte_data(laposte)
+    expected = laposte.get_label(data)
+    assert expected['label']['data'].startswith(b'^XA')
+
+    stand_in.random.seed(1)  # same parcel number
+    aio_laposte = AioCarrier(laposte)
+    label, = _run(aio_laposte, lambda: aio_laposte.get_label(data))
+    assert label == expected
+
+
+def test_laposte_error(stand_in):
+    from roulier.aio import AioCarrier
+
+    stand_in.error_rate = 1
+    laposte = Laposte()
+    aio_laposte = AioCarrier(laposte)
+    with pytest.raises(CarrierError):
+        _run(aio_laposte,
+             lambda: aio_laposte.get_label(_laposte_data(laposte)))
+
+
+def test_concurrent_tracking(stand_in):
+    from roulier.aio import AioCarrier
+
+    stand_in.latency = 0.2
+    geodis = Geodis()
+    expected = geodis.get(_tracking_data(geodis, 'T0'), 'tracking')
+    assert expected['noSuivi'] == 'T0'
+
+    aio_geodis = AioCarrier(geodis)
+    start = time.time()
+    results, = _run(aio_geodis, lambda: asyncio.gather(*[
+        aio_geodis.get(_tracking_data(geodis, 'T%s' % i), 'tracking')
+        for i in range(20)]))
+    elapsed = time.time() - start
+
+    # situations are drawn at random
+    assert sorted(results[0]) == sorted(expected)
+    assert [r['noSuivi'] for r in results] == ['T%s' % i for i in range(20)]
+    # all requests are sent at the same time
+    assert stand_in.max_running == 20
+    assert elapsed < 20 * stand_in.latency / 2
+
+
+def test_tracking_cache(stand_in):
+    from roulier.aio import AioCarrier
+
+    geodis = Geodis()
+    geodis.rest_ws = GeodisTransportRestWs()
+    geodis.rest_ws.cache = GeodisTrackingCache()
+    expected = geodis.get(_tracking_data(geodis, 'T0'), 'tracking')
+
+    aio_geodis = AioCarrier(geodis)
+    results = _run(aio_geodis, *[
+        lambda number=number: aio_geodis.get(
+            _tracking_data(geodis, number), 'tracking')
+        for number in ('T0', 'T1', 'T1')])
+    geodis.rest_ws.close()
+
+    assert results[0] == expected
+    assert results[1] == results[2] != expected
+    assert stand_in.requests == {'geodis_tracking': 2}
+    stats = geodis.rest_ws.cache.stats()
+    assert (stats['hits'], stats['misses']) == (2, 2)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from roulier.api import Api
+from roulier.carriers.laposte.laposte_api import LaposteApi
+from roulier.carriers.dpd.dpd_api import DpdApi
+
+
+def test_schema_shared_by_instances():
+    assert LaposteApi().api_schema() is LaposteApi().api_schema()
+    assert LaposteApi().api_schema() is not DpdApi().api_schema()
+
+
+def test_api_values_are_not_shared():
+    api = LaposteApi()
+    values = api.api_values()
+    values['parcels'][0]['weight'] = 3.4
+    values['customs']['articles'].append({'quantity': 1})
+    assert api.api_values()['parcels'][0]['weight'] == ''
+    assert api.api_values()['customs']['articles'] == []
+
+
+def test_invalidate_schema():
+    class RuntimeApi(Api):
+        extra = {'type': 'string', 'default': 'a'}
+
+        def _auth(self):
+            schema = super(RuntimeApi, self)._auth()
+            schema['token'] = dict(self.extra)
+            return schema
+
+    api = RuntimeApi()
+    schema = api.api_schema()
+    assert api.api_values()['auth']['token'] == 'a'
+
+    RuntimeApi.extra = {'type': 'string', 'default': 'b'}
+    assert api.api_values()['auth']['token'] == 'a'
+
+    RuntimeApi.invalidate_schema()
+    assert api.api_schema() is not schema
+    assert api.api_values()['auth']['token'] == 'b'
+    # other classes are not affected
+    laposte_schema = LaposteApi().api_schema()
+    RuntimeApi.invalidate_schema()
+    assert LaposteApi().api_schema() is laposte_schema
+
+
+def test_process():
+    api = LaposteApi()
+    data = api.api_values()
+    data['auth']['login'] = '12345'
+    data['service']['product'] = 'COL'
+    data['service']['shippingDate'] = '2019/09/12'
+    data['parcels'][0]['weight'] = 3.4
+    for address in ('from_address', 'to_address'):
+        data[address].update({
+            'name': 'Akretion', 'street1': '35 b Rue Montgolfier',
+            'city': 'Villeurbanne', 'country': 'FR', 'zip': '69100'})
+    normalized, errors = api.process(data)
+    assert errors is None
+    assert normalized == api.normalize(data)
+
+    del data['to_address']['city']
+    normalized, errors = api.process(data)
+    assert normalized is None
+    assert errors == api.errors(data)
+    assert errors == {'to_address': [{'city': ['empty values not allowed']}]}
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from roulier import roulier
+from roulier.batch import imap, imap_processes
+from roulier.carriers.dummy.dummy import Dummy
+from roulier.exception import InvalidApiInput
+
+
+def test_ordered():
+    def slow_first(i):
+        time.sleep(0.05 if i == 0 else 0)
+        return i * 2
+
+    results = list(imap(slow_first, range(20), max_workers=4))
+    assert [r.index for r in results] == list(range(20))
+    assert [r.result for r in results] == [i * 2 for i in range(20)]
+    assert all(r.error is None for r in results)
+
+
+def test_unordered():
+    def slow_first(i):
+        time.sleep(0.1 if i == 0 else 0)
+        return i
+
+    results = list(imap(slow_first, range(10), max_workers=2, ordered=False))
+    assert sorted(r.result for r in results) == list(range(10))
+    assert results[-1].index == 0
+
+
+def test_errors_are_kept():
+    def fail_odd(i):
+        if i % 2:
+            raise InvalidApiInput('odd %s' % i)
+        return i
+
+    results = list(imap(fail_odd, range(6)))
+    assert [r.result for r in results] == [0, None, 2, None, 4, None]
+    assert [str(r.error) for r in results[1::2]] == [
+        'odd 1', 'odd 3', 'odd 5']
+    assert results[1].data == 1
+
+
+@pytest.mark.parametrize('error', [KeyboardInterrupt, SystemExit])
+def test_base_exceptions_are_raised(error):
+    def interrupt(i):
+        if i == 3:
+            raise error()
+        return i
+
+    with pytest.raises(error):
+        list(imap(interrupt, range(10), max_workers=2))
+
+
+def test_bounded():
+    lock = threading.Lock()
+    state = {'running': 0, 'max_running': 0, 'consumed': 0}
+
+    def inputs():
+        for i in range(50):
+            state['consumed'] += 1
+            yield i
+
+    def work(i):
+        with lock:
+            state['running'] += 1
+            state['max_running'] = max(
+                state['max_running'], state['running'])
+        time.sleep(0.005)
+        with lock:
+            state['running'] -= 1
+        return i
+
+    results = imap(work, inputs(), max_workers=3, max_pending=5)
+    for result in results:
+        # submitted and not yielded yet <= max_pending
+        assert state['consumed'] - result.index <= 5
+    assert state['consumed'] == 50
+    assert state['max_running'] <= 3
+
+
+def test_early_close():
+    calls = []
+    results = imap(calls.append, range(1000), max_workers=2)
+    next(results)
+    results.close()
+    time.sleep(0.05)
+    assert len(calls) < 10
+
+
+def _square(i):
+    if i < 0:
+        raise InvalidApiInput('negative %s' % i)
+    return i * i
+
+
+def test_processes():
+    consumed = []
+
+    def inputs():
+        for i in range(30):
+            consumed.append(i)
+            yield i
+
+    results = imap_processes(_square, inputs(), processes=2, max_pending=3)
+    for i, result in enumerate(results):
+        assert result == i * i
+        assert len(consumed) - i <= 3
+    with pytest.raises(InvalidApiInput):
+        list(imap_processes(_square, [1, -1, 2], processes=2))
+
+
+def test_get_labels():
+    class FakeDummy(Dummy):
+        def get_label(self, data):
+            if not data:
+                raise InvalidApiInput('empty')
+            return {'tracking': {'number': data['ref']}}
+
+    carrier = FakeDummy()
+    results = list(carrier.get_labels(
+        [{'ref': 'a'}, {}, {'ref': 'c'}], max_workers=2))
+    assert [r.result for r in results] == [
+        {'tracking': {'number': 'a'}}, None, {'tracking': {'number': 'c'}}]
+    assert isinstance(results[1].error, InvalidApiInput)
+    for name in roulier.get_carriers():
+        assert callable(roulier.get(name).get_labels)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""Caches of computed values (labels)."""
+from io import BytesIO
+import base64
+import os
+
+from PIL import Image
+import pytest
+
+from roulier.cache import DiskCache, LRUCache, TTLCache, content_key
+from roulier.carriers.dpd.dpd_decoder import DpdDecoder
+from roulier.ws_tools import png_to_zpl
+
+
+def _png(color=0):
+    png = BytesIO()
+    Image.new('L', (40, 16), color).save(png, 'PNG')
+    return base64.b64encode(png.getvalue())
+
+
+def test_content_key():
+    png = _png()
+    assert content_key(png, True) == content_key(png, True)
+    assert content_key(png, True) != content_key(png, False)
+    assert content_key(png) != content_key(_png(255))
+    assert content_key(u'é') == content_key(u'é'.encode('utf-8'))
+
+
+def test_lru():
+    cache = LRUCache(maxsize=2)
+    assert cache.get('a') is None
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    # b is the least recently used
+    cache.set('c', 3)
+    assert cache.get('b', 'missing') == 'missing'
+    assert cache.fetch('c', lambda: 4) == 3
+    assert cache.fetch('d', lambda x: x, 4) == 4
+    assert cache.stats() == {
+        'hits': 2, 'misses': 3, 'size': 2, 'maxsize': 2}
+    cache.clear()
+    cache.reset_stats()
+    assert cache.stats() == {
+        'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 2}
+
+
+def test_disk(tmpdir):
+    directory = str(tmpdir.join('labels'))
+    cache = DiskCache(directory, max_bytes=1000)
+    assert cache.fetch('a', lambda: u'^XA^FDé^XZ') == u'^XA^FDé^XZ'
+    # shared with other processes
+    other = DiskCache(directory)
+    assert other.get('a') == u'^XA^FDé^XZ'
+    assert other.stats()['hits'] == 1
+    assert len(cache) == 1
+
+
+def test_disk_eviction(tmpdir):
+    cache = DiskCache(str(tmpdir), max_bytes=1000)
+    for i, key in enumerate('abc'):
+        cache.set(key, b'x' * 300)
+        path = os.path.join(str(tmpdir), key + '.cache')
+        os.utime(path, (i, i))
+    # read: most recently used
+    assert cache.get('a') == b'x' * 300
+    cache.set('d', b'x' * 300)
+    assert sorted(key for key in 'abcd' if cache.get(key)) == [
+        'a', 'c', 'd']
+    assert cache.stats()['bytes'] <= 1000
+
+
+def test_disk_values(tmpdir):
+    cache = DiskCache(str(tmpdir.join('values')))
+    assert oct(os.stat(cache.directory).st_mode & 0o777) == oct(0o700)
+    values = [b'\x89PNG', u'^FDé', [None, {u'a': 1.5}]]
+    for i, value in enumerate(values):
+        cache.set('%s' % i, value)
+        assert cache.get('%s' % i) == value
+    assert type(cache.get('0')) is bytes
+    assert cache.get('2') == [None, {'a': 1.5}]
+    assert cache.get('missing') is None
+
+
+def test_disk_replace(tmpdir):
+    cache = DiskCache(str(tmpdir), max_bytes=1000)
+    for i in range(10):
+        cache.set('a', b'x' * 300)
+    assert cache._size == cache.stats()['bytes'] == 301
+    assert len(cache) == 1
+
+
+def test_disk_unreadable(tmpdir):
+    cache = DiskCache(str(tmpdir))
+    tmpdir.join('a.cache').write('not a value')
+    assert cache.fetch('a', lambda: 1) == 1
+    assert cache.get('a') == 1
+
+
+@pytest.mark.parametrize('cache', [LRUCache(), None])
+def test_png_to_zpl(cache):
+    png = _png()
+    assert png_to_zpl(png, True, cache=cache) == png_to_zpl(png, True)
+    assert png_to_zpl(png, False, cache=cache) == png_to_zpl(png, False)
+
+
+def test_dpd_decoder(monkeypatch):
+    cache = LRUCache()
+    monkeypatch.setattr(DpdDecoder, 'zpl_cache', cache)
+    png = _png()
+    first = DpdDecoder().handle_zpl(png, 'ZPL')
+    assert DpdDecoder().handle_zpl(png, 'ZPL') == first
+    assert DpdDecoder().handle_zpl(_png(255), 'ZPL') != first
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 2
+    assert DpdDecoder().handle_zpl(png, 'PNG') == base64.b64decode(png)
+
+
+class Clock(TTLCache):
+    now = 0
+
+    def clock(self):
+        return self.now
+
+    def ttl_of(self, value):
+        return None if value == 'final' else self.ttl
+
+
+@pytest.mark.parametrize('backend', ['lru', 'disk'])
+def test_ttl(tmpdir, backend):
+    if backend == 'lru':
+        cache = Clock(LRUCache(maxsize=2), ttl=10)
+    else:
+        cache = Clock(DiskCache(str(tmpdir)), ttl=10)
+    cache.set('a', 'value')
+    cache.set('b', 'final')
+    cache.now = 9
+    assert cache.get('a') == 'value'
+    cache.now = 10
+    assert cache.get('a') is None
+    assert cache.fetch('a', lambda: 'new') == 'new'
+    cache.now = 1000
+    assert cache.get('b') == 'final'
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expired']) == (2, 2, 2)
+    assert stats['size'] == 2 and stats['ttl'] == 10
+    cache.reset_stats()
+    cache.clear()
+    assert cache.stats()['expired'] == 0 and len(cache) == 0
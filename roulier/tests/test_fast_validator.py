@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""Compare the compiled validator with cerberus."""
+from copy import deepcopy
+
+import cerberus
+import pytest
+
+from roulier.api import Api
+from roulier.carriers.laposte.laposte_api import LaposteApi
+from roulier.carriers.dpd.dpd_api import DpdApi
+from roulier.carriers.dummy.dummy_api import DummyApi
+from roulier.carriers.geodis.geodis_api_edi import GeodisApiEdi
+from roulier.carriers.geodis.geodis_api_ws import GeodisApiWs
+from roulier.carriers.geodis.geodis_api_find_localite_ws import (
+    GeodisApiFindLocaliteWs)
+from roulier.carriers.geodis.geodis_api_rest_ws import (
+    GeodisApiTrackingListMapping, GeodisMappingOut)
+
+APIS = [
+    LaposteApi, DpdApi, DummyApi, GeodisApiEdi, GeodisApiWs,
+    GeodisApiFindLocaliteWs, GeodisApiTrackingListMapping, GeodisMappingOut,
+]
+
+VARIANTS = [None, 12, '', u'Éric ~^ œ', {'x': 1}, [{}]]
+
+
+def _paths(doc, prefix=()):
+    if isinstance(doc, dict):
+        items = doc.items()
+    elif isinstance(doc, list):
+        items = enumerate(doc)
+    else:
+        return
+    for key, value in items:
+        yield prefix + (key, )
+        for path in _paths(value, prefix + (key, )):
+            yield path
+
+
+def _documents(api):
+    """Yield api_values() and broken versions of it."""
+    base = Api.normalize(api, {})
+    yield {}
+    yield base
+    for path in list(_paths(base)) + [('unknown', )]:
+        for value in VARIANTS + ['delete']:
+            doc = deepcopy(base)
+            parent = doc
+            for key in path[:-1]:
+                parent = parent[key]
+            if value == 'delete':
+                if path[-1] == 'unknown':
+                    continue
+                del parent[path[-1]]
+            else:
+                parent[path[-1]] = value
+            yield doc
+
+
+def _cerberus(api, doc):
+    v = api._validator()
+    if v.validate(deepcopy(doc)):
+        return v.document, {}
+    return None, v.errors
+
+
+# errors are compared to those of the installed cerberus
+@pytest.mark.skipif(
+    cerberus.__version__.split('.')[:2] != ['1', '1'],
+    reason="messages of cerberus 1.1 (see requirements.txt)")
+@pytest.mark.parametrize('api_class', APIS)
+def test_same_as_cerberus(api_class):
+    api = api_class()
+    fast = api._fast_validator()
+    for doc in _documents(api):
+        try:
+            expected = _cerberus(api, doc)
+        except (TypeError, UnicodeError):
+            # cerberus can't report some errors
+            # (unhashable values in allowed, unicode in lists with python 2)
+            continue
+        document, errors = fast.validated(deepcopy(doc))
+        assert errors == expected[1], doc
+        if not errors:
+            assert document == expected[0], doc
+        assert fast.normalized(deepcopy(doc)) == \
+            api._validator().normalized(deepcopy(doc)), doc
+
+
+def test_validator_engine():
+    class FastLaposteApi(LaposteApi):
+        validator_engine = 'fast'
+
+    api = FastLaposteApi()
+    data = api.api_values()
+    assert data == LaposteApi().api_values()
+    data['auth']['login'] = '12345'
+    data['service']['product'] = 'COL'
+    data['service']['shippingDate'] = '2019/09/12'
+    data['parcels'][0]['weight'] = 3.4
+    for address in ('from_address', 'to_address'):
+        data[address].update({
+            'name': 'Akretion', 'street1': '35 b Rue Montgolfier',
+            'city': 'Villeurbanne', 'country': 'FR', 'zip': '69100'})
+    assert api.validate(data)
+    normalized, errors = api.process(data)
+    assert errors is None
+    assert normalized == LaposteApi().normalize(data)
+
+    del data['to_address']['city']
+    assert not api.validate(data)
+    assert api.process(data) == (None, LaposteApi().errors(data))
+    assert api.errors(data) == {
+        'to_address': [{'city': ['empty values not allowed']}]}
+
+
+def test_unsupported_rule():
+    class RegexApi(Api):
+        def _auth(self):
+            schema = super(RegexApi, self)._auth()
+            schema['login']['regex'] = '[0-9]+'
+            return schema
+
+    with pytest.raises(NotImplementedError):
+        RegexApi()._fast_validator()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Import time of roulier and of each carrier (in a new process)."""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from roulier import roulier
+
+# seconds, wide enough for a slow CI: an import above it has
+# most likely got a heavy dependency more
+BUDGETS = {
+    'roulier': 1.0,
+    'roulier.carriers.dummy.dummy': 2.0,
+    'roulier.carriers.laposte.laposte': 2.0,
+    'roulier.carriers.geodis.geodis': 2.0,
+    'roulier.carriers.dpd.dpd': 2.0,
+}
+
+# imported when used only
+LAZY = ['PIL', 'zplgrf', 'roulier.zpl']
+
+SCRIPT = """
+import json, sys, time
+start = time.time()
+import %s
+print(json.dumps([time.time() - start, sorted(sys.modules)]))
+"""
+
+
+def _import(module):
+    """Return the seconds and modules of importing module."""
+    # roulier of this tree, even if not installed
+    root = os.path.dirname(os.path.dirname(os.path.abspath(roulier.__file__)))
+    output = subprocess.check_output(
+        [sys.executable, '-c', SCRIPT % module], cwd=root)
+    return json.loads(output.decode('utf-8'))
+
+
+@pytest.mark.parametrize('module', sorted(BUDGETS))
+def test_import_budget(module):
+    seconds, modules = _import(module)
+    assert seconds < BUDGETS[module]
+    assert not [lazy for lazy in LAZY if lazy in modules]
+    if module == 'roulier':
+        assert not [name for name in modules
+                    if name.startswith('roulier.carriers.')]
+
+
+def test_lazy_registry():
+    __, modules = _import('roulier; roulier.roulier.get("dummy")')
+    assert 'roulier.carriers.dummy.dummy' in modules
+    assert 'roulier.carriers.laposte' not in modules
+    assert set(BUDGETS) - set(['roulier']) == set(
+        roulier.CARRIERS[name].split(':')[0]
+        for name in roulier.get_carriers())
+    assert roulier.get('Geodis').__class__ is roulier.carrier_class('geodis')
+    with pytest.raises(BaseException) as error:
+        roulier.get('unknown')
+    assert 'Carrier not found' in str(error.value)
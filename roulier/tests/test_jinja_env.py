@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Shared jinja environments and compiled templates."""
+import pytest
+
+from roulier import jinja_env
+from roulier.batch import imap
+from roulier.carriers.dpd.dpd_encoder import DpdEncoder
+from roulier.carriers.dpd.dpd_transport import DpdTransport
+from roulier.carriers.laposte.laposte_encoder import LaposteEncoder
+from roulier.carriers.laposte.laposte_transport import LaposteTransport
+
+ADDRESS = {
+    'name': u'Hélène', 'street1': '35 b Rue Montgolfier',
+    'city': 'Villeurbanne', 'country': 'FR', 'zip': '69100',
+    'phone': '0600000000'}
+
+
+def _laposte_data():
+    data = LaposteEncoder().api()
+    data['auth']['login'] = '12345'
+    data['service']['product'] = 'COL'
+    data['service']['shippingDate'] = '2019/09/12'
+    data['parcels'][0]['weight'] = 3.4
+    data['from_address'].update(ADDRESS)
+    data['to_address'].update(ADDRESS, company='A & <B>')
+    return data
+
+
+def _dpd_data():
+    data = DpdEncoder().api()
+    data['auth']['login'] = '12345'
+    data['service'].update({
+        'agencyId': '077', 'customerCountry': '250',
+        'customerId': '123', 'shippingDate': '2019/09/12'})
+    data['parcels'][0]['weight'] = 3.4
+    data['from_address'].update(ADDRESS)
+    data['to_address'].update(ADDRESS, company='A & <B>')
+    return data
+
+
+def _render():
+    laposte = LaposteEncoder().encode(
+        _laposte_data(), 'generateLabelRequest')
+    dpd = DpdEncoder().encode(_dpd_data(), 'createShipmentWithLabels')
+    return (
+        LaposteTransport().soap_wrap(laposte['body'], laposte['headers']),
+        DpdTransport().soap_wrap(dpd['body'], dpd['headers']))
+
+
+@pytest.fixture
+def environments():
+    jinja_env.clear()
+    yield
+    jinja_env.use_compiled_templates(None)
+
+
+def test_environments_are_shared(environments):
+    path = '/carriers/laposte/templates'
+    env = jinja_env.get_environment(path)
+    assert jinja_env.get_environment(path) is env
+    assert jinja_env.get_environment(path, autoescape=True) is not env
+    # compiled once
+    assert env.get_template('laposte_soap.xml') is env.get_template(
+        'laposte_soap.xml')
+
+
+def test_values_are_escaped(environments):
+    laposte, dpd = _render()
+    assert b'A &amp; &lt;B&gt;' in laposte
+    assert b'A &amp; &lt;B&gt;' in dpd
+
+
+def test_concurrent_renders(environments):
+    expected = _render()
+    results = imap(lambda i: _render(), range(40), max_workers=8)
+    assert [r.result for r in results] == [expected] * 40
+
+
+def test_compiled_templates(environments, tmpdir):
+    expected = _render()
+    jinja_env.compile_templates(str(tmpdir))
+    jinja_env.use_compiled_templates(str(tmpdir))
+    env = jinja_env.get_environment(
+        '/carriers/laposte/templates', autoescape=True)
+    template = env.get_template('laposte_generateLabelRequest.xml')
+    assert template.filename.startswith(str(tmpdir))
+    assert _render() == expected
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Labels of concatenated ZPL and EPL documents."""
+from lxml import objectify
+import pytest
+
+from roulier.carriers.geodis.geodis_decoder_ws import GeodisDecoderWs
+from roulier.labels import Labels, scan
+
+ZPL = [b'^XA^FO10,10^FDparcel 1^FS^XZ', b'^XA^FDparcel \xc3\xa9 2^FS^XZ',
+       b'^XA^FD3^XZ']
+
+
+def _old_split(parts):
+    """What the geodis decoder used to do."""
+    labels = parts.split(b'^XZ\r\n^XA')
+    return [
+        (i and b'^XA' or b'') + label +
+        (i < len(labels) - 1 and b'^XZ' or b'')
+        for i, label in enumerate(labels)]
+
+
+@pytest.mark.parametrize('separator', [b'\r\n', b'\n', b'', b' \r\n\r\n'])
+def test_zpl(separator):
+    document = separator.join(ZPL) + separator
+    labels = Labels(document)
+    assert labels.language == 'zpl'
+    assert list(labels) == ZPL
+    assert labels[-1] == ZPL[-1]
+    assert labels[1:] == ZPL[1:]
+    assert labels.view(1).tobytes() == ZPL[1]
+    if separator == b'\r\n':
+        assert list(labels) == _old_split(document[:-2])
+
+
+def test_zpl_between_labels():
+    graphic = b'~DGR:LOGO.GRF,4,1,FF00FF00'
+    document = b'\r\n'.join([ZPL[0], graphic, b'^xa^XGR:LOGO.GRF^FS^xz'])
+    assert list(Labels(document)) == [
+        ZPL[0], graphic + b'\r\n^xa^XGR:LOGO.GRF^FS^xz']
+    # not a label alone
+    assert list(Labels(ZPL[0] + b'\n~JA')) == [ZPL[0] + b'\n~JA']
+
+
+def test_epl():
+    first = b'N\r\nq812\r\nA50,0,0,1,1,1,N,"parcel 1"\r\nP1'
+    second = b'N\r\nA50,0,0,1,1,1,N,"P2"\r\nP1,1'
+    document = b'I8,A,001\r\n' + first + b'\r\n' + second + b'\r\n'
+    labels = Labels(document)
+    assert labels.language == 'epl'
+    assert list(labels) == [b'I8,A,001\r\n' + first, second]
+    assert scan(document, 'zpl') == (None, [(0, len(document))])
+
+
+def test_not_labels():
+    document = b'%PDF-1.4 ... %%EOF'
+    assert list(Labels(document)) == [document]
+
+
+def test_geodis_decoder():
+    body = objectify.fromstring(
+        b'<reponseImpressionEtiquette '
+        b'xmlns="http://impression.service.web.etiquette.geodis.com">'
+        b'<cabRouting>R1</cabRouting>'
+        b'<infoColis><numero>1</numero><cab>C1</cab></infoColis>'
+        b'<infoColis><numero>2</numero><cab>C2</cab></infoColis>'
+        b'<infoColis><numero>3</numero><cab>C3</cab></infoColis>'
+        b'</reponseImpressionEtiquette>')
+    parts = b'\r\n'.join(ZPL)
+    result = GeodisDecoderWs().decode(body, parts, {'output_format': 'ZPL'})
+    assert result['label']['data'] == parts
+    assert [parcel['label']['data'] for parcel in result['parcels']] == ZPL
+    assert [parcel['label']['name'] for parcel in result['parcels']] == [
+        'label_0', 'label_1', 'label_2']
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Multipart parser, against the email package."""
+import email
+
+import pytest
+
+from roulier.carriers.geodis.geodis_transport_ws import GeodisTransportWs
+from roulier.multipart import MultipartParser, parse
+
+CONTENT_TYPE = (
+    'multipart/related; type="application/xop+xml"; boundary="uuid:b1"; '
+    'start="<root.message@cxf.apache.org>"; start-info="text/xml"')
+
+PDF = b'%PDF-1.4\r\n' + bytes(bytearray(range(256))) * 40 + b'\r\n%%EOF'
+
+LAPOSTE_RESPONSE = b"""\r
+--uuid:b1\r
+Content-Type: application/xop+xml; charset=UTF-8; type="text/xml"\r
+Content-Transfer-Encoding: binary\r
+Content-ID: <root.message@cxf.apache.org>\r
+\r
+<soap:Envelope><soap:Body>ok</soap:Body></soap:Envelope>\r
+--uuid:b1\r
+Content-Type: application/octet-stream\r
+Content-Transfer-Encoding: binary\r
+Content-ID: <label-1@cxf.apache.org>\r
+\r
+^XA^FDlabel\xc3\xa9^XZ\r
+\r
+--uuid:b1\r
+Content-Type: application/pdf\r
+Content-Transfer-Encoding: binary\r
+Content-ID: <cn23-1@cxf.apache.org>\r
+\r
+""" + PDF + b"""\r
+--uuid:b1\r
+Content-Type: text/plain\r
+Content-Transfer-Encoding: base64\r
+\r
+YWJj\r
+--uuid:b1--\r
+"""
+
+GEODIS_RESPONSE = b"""--uuid:b1
+Content-Type: application/xop+xml; charset=UTF-8; type="text/xml"
+Content-ID: <root.message@cxf.apache.org>
+
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">\
+<soap:Body><ns2:reponseImpressionEtiquette \
+xmlns:ns2="http://impression.service.web.etiquette.geodis.com">\
+<ns2:codeAttachement>cid:label@geodis.com</ns2:codeAttachement>\
+</ns2:reponseImpressionEtiquette></soap:Body></soap:Envelope>
+--uuid:b1
+Content-Type: application/octet-stream
+Content-ID: <label@geodis.com>
+
+^XA^FD1^XZ\r\n^XA^FD2^XZ
+--uuid:b1--
+"""
+
+
+def _email_parts(content_type, content):
+    """What email.parser finds (raw payloads)."""
+    full = b'Content-Type: %s\n\n%s' % (content_type.encode('ascii'), content)
+    if str is bytes:
+        message = email.message_from_string(full)
+    else:  # python 3
+        message = email.message_from_bytes(full)
+    start = message.get_param('start').lstrip('<').rstrip('>')
+    parts = {}
+    for i, part in enumerate(message.get_payload()):
+        cid = part.get('content-id', '').lstrip('<').rstrip('>')
+        if str is bytes:
+            payload = part.get_payload()
+        elif part.get('content-transfer-encoding') == 'base64':
+            payload = part.get_payload().encode('ascii')
+        else:
+            payload = part.get_payload(decode=True)
+        if start == cid and 'start' not in parts:
+            parts['start'] = payload
+        else:
+            parts[cid or 'Attachment%d' % i] = payload
+    return parts
+
+
+@pytest.mark.parametrize('content', [
+    LAPOSTE_RESPONSE,
+    LAPOSTE_RESPONSE.replace(b'\r\n', b'\n'),
+    GEODIS_RESPONSE,
+    # no close delimiter
+    LAPOSTE_RESPONSE[:LAPOSTE_RESPONSE.index(b'--uuid:b1--')],
+])
+def test_like_email(content):
+    expected = _email_parts(CONTENT_TYPE, content)
+    assert dict(parse(CONTENT_TYPE, content)) == expected
+    for size in (1, 7, 4096):
+        parser = MultipartParser(CONTENT_TYPE)
+        for i in range(0, len(content), size):
+            parser.feed(content[i:i + size])
+        assert dict(parser.close()) == expected
+
+
+def test_parts():
+    parts = parse(CONTENT_TYPE, LAPOSTE_RESPONSE)
+    assert sorted(parts) == [
+        'Attachment3', 'cn23-1@cxf.apache.org', 'label-1@cxf.apache.org',
+        'start']
+    assert parts['cn23-1@cxf.apache.org'] == PDF
+    assert parts.view('cn23-1@cxf.apache.org').tobytes() == PDF
+    assert parts.get('label-1@cxf.apache.org') == b'^XA^FDlabel\xc3\xa9^XZ\r\n'
+    assert parts.headers('Attachment3')['content-type'] == 'text/plain'
+
+
+def test_incremental_parts():
+    parser = MultipartParser(CONTENT_TYPE)
+    end = LAPOSTE_RESPONSE.index(b'Content-ID: <cn23')
+    parser.feed(LAPOSTE_RESPONSE[:end])
+    assert sorted(parser.parts) == ['label-1@cxf.apache.org', 'start']
+    parser.feed(LAPOSTE_RESPONSE[end:])
+    assert len(parser.close()) == 4
+
+
+def test_no_start():
+    content_type = 'multipart/related; boundary="uuid:b1"'
+    parts = parse(content_type, GEODIS_RESPONSE)
+    assert sorted(parts) == ['label@geodis.com', 'start']
+
+
+def test_no_boundary():
+    with pytest.raises(ValueError):
+        parse('multipart/related', LAPOSTE_RESPONSE)
+
+
+def test_geodis_transport():
+    class Response(object):
+        status_code = 200
+        headers = {'Content-Type': CONTENT_TYPE}
+        content = GEODIS_RESPONSE
+
+    result = GeodisTransportWs().handle_response(Response())
+    assert result['parts'] == b'^XA^FD1^XZ\r\n^XA^FD2^XZ'
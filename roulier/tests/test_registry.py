@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Carriers found in entry points, cached and indexed."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from roulier import roulier
+from roulier.carriers.dummy.dummy import Dummy
+
+DUMMY = 'roulier.carriers.dummy.dummy:Dummy'
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    roulier.reset_registry()
+    yield
+    roulier.reset_registry()
+
+
+def test_discover(monkeypatch):
+    calls = []
+
+    def discover():
+        calls.append(1)
+        return {'mine': DUMMY}
+    monkeypatch.setattr(roulier, 'discover', discover)
+    assert sorted(roulier.get_carriers()) == [
+        'dpd', 'dummy', 'geodis', 'laposte', 'mine']
+    assert isinstance(roulier.get('MINE'), Dummy)
+    roulier.get('dummy')
+    # once per process
+    assert len(calls) == 1
+
+
+def test_register(monkeypatch):
+    monkeypatch.setattr(roulier, 'discover', lambda: {})
+
+    class Private(Dummy):
+        pass
+    roulier.register('private', Private)
+    assert isinstance(roulier.get('private'), Private)
+    roulier.register('private', DUMMY)
+    assert type(roulier.get('private')) is Dummy
+    roulier.reset_registry()
+    with pytest.raises(BaseException):
+        roulier.get('private')
+
+
+def test_index(tmpdir, monkeypatch):
+    index = str(tmpdir.join('carriers.json'))
+    monkeypatch.setenv(roulier.INDEX_ENVIRON, index)
+    monkeypatch.setattr(roulier, 'discover', lambda: {'mine': DUMMY})
+    assert 'mine' in roulier.get_carriers()
+    assert os.path.exists(index)
+
+    # next process: read from the index
+    roulier.reset_registry()
+
+    def fail():
+        raise AssertionError('discovered again')
+    monkeypatch.setattr(roulier, 'discover', fail)
+    assert 'mine' in roulier.get_carriers()
+
+    # packages installed meanwhile
+    roulier.reset_registry()
+    monkeypatch.setattr(roulier, '_signature', lambda: 'other')
+    monkeypatch.setattr(roulier, 'discover', lambda: {})
+    assert 'mine' not in roulier.get_carriers()
+
+
+def test_entry_points(tmpdir):
+    try:
+        import importlib.metadata  # noqa: F401
+    except ImportError:  # python < 3.8
+        pytest.importorskip('pkg_resources')
+    info = tmpdir.mkdir('mine-1.0.egg-info')
+    info.join('PKG-INFO').write(
+        'Metadata-Version: 1.0\nName: mine\nVersion: 1.0\n')
+    info.join('entry_points.txt').write(
+        '[roulier.carriers]\nmine = %s\n' % DUMMY)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(roulier.__file__)))
+    output = subprocess.check_output([
+        sys.executable, '-c',
+        'import sys; sys.path.append(%r); from roulier import roulier; '
+        'print(type(roulier.get("mine")).__name__)' % str(tmpdir)],
+        cwd=root)
+    assert output.strip() == b'Dummy'
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Sanitize profiles, against the replace chains they replace."""
+import sys
+
+import pytest
+from unidecode import unidecode
+
+from roulier import sanitize
+from roulier.api import MyValidator
+from roulier.carriers.geodis.geodis_transport_edi import GeodisTransportEdi
+
+try:
+    unichr
+except NameError:  # python 3
+    unichr = chr
+
+TEXTS = [
+    u'', u'Hélène Côté', u"35 b Rue de l'Œuvre, Bât C",
+    u'ÉÈËÊÔÏÖÀÂÇÛÙœ àâçéèêëïôöùûü ÿ ß æ Æ ñ',
+    u'^XA^FDoops^FS~DG\x1e\x10\xfe?+:\'', u'北京 Москва ☃ \U0001f4e6',
+    u''.join(unichr(i) for i in range(0x300)),
+]
+
+
+def zpl(value):
+    ctrl_cars = [0xFE, 0x5E, 0x1E, 0x10]
+    val = unidecode(value)
+    for ctrl in ctrl_cars:
+        val = val.replace("%c" % ctrl, "")
+    return val
+
+
+def accents(value):
+    for char, ascii in [
+            (u"é", "e"), (u"è", "e"), (u"ë", "e"), (u"ê", "e"),
+            (u"ô", "o"), (u"ï", "i"), (u"ö", "o"), (u"à", "a"),
+            (u"â", "a"), (u"ç", "c"), (u"û", "u"), (u"ù", "u"),
+            (u"É", "E"), (u"È", "E"), (u"Ë", "E"), (u"Ê", "E"),
+            (u"Ô", "O"), (u"Ï", "I"), (u"Ö", "O"), (u"À", "A"),
+            (u"Â", "A"), (u"Ç", "C"), (u"Û", "U"), (u"Ù", "U"),
+            (u"œ", "oe"), (u"Œ", "OE")]:
+        value = value.replace(char, ascii)
+    return value.encode('ascii', 'ignore').decode('ascii')
+
+
+def edifact(token):
+    for char in "?'+:":
+        token = token.replace(char, " ")
+    return token.encode('ascii', 'ignore').decode('ascii')
+
+
+@pytest.mark.parametrize('profile, reference', [
+    (sanitize.ZPL, zpl),
+    (sanitize.ACCENTS, accents),
+    (sanitize.EDIFACT, edifact),
+])
+@pytest.mark.parametrize('text', TEXTS)
+def test_like_replace(profile, reference, text):
+    # twice: memoized
+    for __ in range(2):
+        sanitized = profile(text)
+        assert sanitized == reference(text)
+        assert isinstance(sanitized, str)
+
+
+@pytest.mark.skipif(sys.version_info[0] > 2, reason='python 2 str')
+def test_python2_str():
+    assert sanitize.ACCENTS(b'abc') == 'abc'
+    with pytest.raises(UnicodeDecodeError):
+        sanitize.ACCENTS(b'\xc3\xa9')
+    # unidecode reads str as latin-1
+    assert sanitize.ZPL(b'\xe9^') == 'e'
+
+
+def test_not_text():
+    assert sanitize.ACCENTS(None) is None
+    assert sanitize.ZPL(3) == 3
+
+
+def test_memo(monkeypatch):
+    monkeypatch.setattr(sanitize, 'MEMO_SIZE', 2)
+    for text in (u'é', u'è', u'ê'):
+        assert sanitize.ACCENTS(text) == 'e'
+    assert len(sanitize.ACCENTS._memo) <= 2
+
+
+def test_extend():
+    profile = sanitize.ACCENTS.extend({u'ß': u'ss', u'é': None})
+    assert profile(u'Éé ß') == 'E ss'
+    assert sanitize.ACCENTS(u'Éé ß') == 'Ee '
+
+
+def test_coercers():
+    validator = MyValidator()
+    assert validator._normalize_coerce_zpl(u'^Hélène') == 'Helene'
+    assert validator._normalize_coerce_accents(u'Hélène ß') == 'Helene '
+
+
+def test_edi():
+    edi = GeodisTransportEdi().convert_to_edi(
+        [['NAD', 'CZ', [u"Côté: l'été", u'?+']]])
+    # accents are removed by the api (coerce: accents)
+    assert edi == "NAD+CZ+Ct  l t:  '"
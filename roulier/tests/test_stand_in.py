@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Carriers against the local stand-in of their webservices."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from roulier import roulier
+from roulier.exception import CarrierError
+from roulier.transport import Transport
+
+from .stand_in import StandIn
+
+ADDRESS = {
+    'company': u'Akretion', 'name': u'Hélène', 'street1': u'35 b Rue '
+    u'Montgolfier', 'city': u'Villeurbanne', 'zip': '69100',
+    'country': 'FR', 'phone': '0600000000', 'email': 'a@b.fr'}
+
+
+@pytest.fixture
+def stand_in():
+    server = StandIn(size=2000, seed=1).start()
+    Transport.set_base_url(server.url)
+    yield server
+    Transport.set_base_url(None)
+    server.close()
+
+
+def _label_data(carrier, service, parcels=None):
+    data = roulier.get(carrier).api()
+    data['auth']['login'] = '123'
+    data['service'].update(service, shippingDate='2019/01/01')
+    data['parcels'] = parcels or [{'weight': 1.2}]
+    data['to_address'].update(ADDRESS)
+    data['from_address'].update(ADDRESS)
+    return data
+
+
+def _laposte():
+    return _label_data('laposte', {'product': 'COL'})
+
+
+def _dpd():
+    return _label_data('dpd', {
+        'agencyId': '077', 'customerCountry': '250', 'customerId': '123'})
+
+
+def _geodis_label():
+    return _label_data('geodis', {
+        'product': 'MES', 'customerId': '123', 'shippingId': 'X1',
+        'agencyId': '06', 'option': ''}, [{'weight': 1.2}, {'weight': 2.0}])
+
+
+def _geodis_tracking(action, password='password'):
+    data = roulier.get('geodis').api(action)
+    data['auth'].update({'login': 'l', 'password': password})
+    return data
+
+
+def test_set_base_url(stand_in):
+    from roulier.carriers.laposte.laposte_transport import LaposteTransport
+    assert LaposteTransport().http_request(b'')['url'] == (
+        stand_in.url + '/sls-ws/SlsServiceWS')
+    Transport.set_base_url(None)
+    assert LaposteTransport().http_request(b'')['url'] == (
+        LaposteTransport.LAPOSTE_WS)
+
+
+def test_base_url_not_from_environment():
+    # the environment never redirects requests (and credentials)
+    env = dict(os.environ, ROULIER_BASE_URL='http://127.0.0.1:1')
+    url = subprocess.check_output([
+        sys.executable, '-c',
+        'from roulier.carriers.laposte.laposte_transport import '
+        'LaposteTransport\n'
+        'print(LaposteTransport().http_request(b"")["url"])'], env=env)
+    assert not url.decode('ascii').startswith('http://127.0.0.1')
+
+
+def test_laposte(stand_in):
+    label = roulier.get('laposte').get_label(_laposte())
+    assert str(label['tracking']['number']).startswith('6A')
+    assert label['label']['data'].startswith(b'^XA')
+    assert [annex['type'] for annex in label['annexes']] == ['pdf']
+
+
+def test_dpd(stand_in):
+    label = roulier.get('dpd').get_label(_dpd())
+    assert label['tracking']['number'].startswith('%00250')
+    assert label['label']['data'].startswith('^XA')
+    assert [annex['type'] for annex in label['annexes']] == ['png']
+
+
+def test_geodis_label(stand_in):
+    label = roulier.get('geodis').get_label(_geodis_label())
+    assert str(label['tracking']['number']).startswith('R')
+    assert [parcel['label']['data'][:3] for parcel in label['parcels']] == [
+        b'^XA', b'^XA']
+
+
+def test_geodis_find_localite(stand_in):
+    data = roulier.get('geodis').api('findLocalite')
+    data['auth']['login'] = '123'
+    data['to_address'].update(
+        {'country': 'FR', 'zip': '69100', 'city': 'Villeurbanne'})
+    localities = roulier.get('geodis').get(data, 'findLocalite')
+    assert [locality['city'] for locality in localities] == [
+        'VILLEURBANNE 1', 'VILLEURBANNE 2', 'VILLEURBANNE 3']
+
+
+def test_geodis_tracking(stand_in):
+    data = _geodis_tracking('tracking')
+    data['service']['trackingId'] = 'T1'
+    tracking = roulier.get('geodis').get_tracking(data)
+    assert tracking['noSuivi'] == 'T1'
+
+
+def test_geodis_tracking_list(stand_in):
+    data = _geodis_tracking('trackingList')
+    data['service']['shippingDateStart'] = '2019-07-01'
+    rows = roulier.get('geodis').get(data, 'trackingList')
+    assert rows and rows[0]['tracking']['trackingCode'] == 'T2019-07-01-0'
+    with pytest.raises(CarrierError):
+        roulier.get('geodis').get(
+            dict(data, auth={'login': 'l', 'password': 'bad'}),
+            'trackingList')
+
+
+@pytest.mark.parametrize('get', [
+    lambda: roulier.get('laposte').get_label(_laposte()),
+    lambda: roulier.get('dpd').get_label(_dpd()),
+    lambda: roulier.get('geodis').get_label(_geodis_label()),
+    lambda: roulier.get('geodis').get(
+        dict(_geodis_tracking('tracking'),
+             service={'trackingId': 'T1'}), 'tracking'),
+])
+def test_errors(stand_in, get):
+    stand_in.error_rate = 1
+    with pytest.raises(CarrierError):
+        get()
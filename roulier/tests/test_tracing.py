@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""Spans of the stages of Carrier.get()."""
+import pytest
+
+from roulier import tracing
+from roulier.api import Api
+from roulier.carriers.geodis.geodis import Geodis
+from roulier.carriers.geodis.geodis_transport_rest_ws import (
+    GeodisTransportRestWs)
+from roulier.carriers.laposte.laposte import Laposte
+from roulier.jinja_env import get_environment
+from roulier.transport import Transport
+
+from .stand_in import StandIn
+
+
+@pytest.fixture
+def spans():
+    spans = []
+    tracing.add_listener(spans.append)
+    yield spans
+    tracing.remove_listener(spans.append)
+
+
+def test_no_listener():
+    assert tracing.span('get') is tracing.NO_SPAN
+    with tracing.span('get') as span:
+        span.set('size', 1)
+    assert tracing.current() is None
+
+
+def test_spans_of_get(spans):
+    server = StandIn(size=1).start()
+    geodis = Geodis()
+    geodis.rest_ws = GeodisTransportRestWs(base_url=server.url)
+    data = geodis.api('trackingList')
+    data['auth'].update({'login': 'l', 'password': 'password'})
+    data['service']['shippingDateStart'] = '2019-07-01'
+    del spans[:]
+    assert geodis.get(data, 'trackingList')[0]['tracking'][
+        'trackingCode'] == 'T2019-07-01-0'
+    geodis.rest_ws.close()
+    server.close()
+
+    assert [span.name for span in spans] == [
+        'normalize', 'validate', 'normalize', 'encode', 'http', 'json',
+        'decode', 'get']
+    get = spans[-1]
+    assert get.parent is None
+    assert get.duration >= sum(
+        span.duration for span in spans if span.parent is get)
+    for span in spans:
+        assert span.attributes['carrier'] == 'geodis'
+        assert span.attributes['action'] == 'trackingList'
+        assert span.error is None
+    http = spans[4]
+    assert http.parent is get
+    assert http.attributes['status'] == 200
+    assert http.attributes['url'].endswith('recherche-envois')
+    assert http.attributes['response_size'] == spans[5].attributes['size']
+    assert spans[1].parent is spans[3]  # validate in encode
+
+
+@pytest.mark.parametrize('engine', ['cerberus', 'fast'])
+def test_spans_of_laposte_label(spans, monkeypatch, engine):
+    monkeypatch.setattr(Api, 'validator_engine', engine)
+    server = StandIn(size=1).start()
+    laposte = Laposte()
+    data = laposte.api()
+    data['auth']['login'] = '123'
+    data['service'].update(product='COL', shippingDate='2019/01/01')
+    data['parcels'][0]['weight'] = 1.2
+    for address in ('from_address', 'to_address'):
+        data[address].update({
+            'name': 'Akretion', 'street1': '35 b Rue Montgolfier',
+            'city': 'Villeurbanne', 'country': 'FR', 'zip': '69100'})
+    Transport.set_base_url(server.url)
+    try:
+        laposte.get_label(data)
+    finally:
+        Transport.set_base_url(None)
+        server.close()
+
+    encode, = [span for span in spans if span.name == 'encode']
+    assert [span.name for span in spans if span.parent is encode][:2] == [
+        'normalize', 'validate']
+
+
+def test_render(spans):
+    template = get_environment('/carriers/laposte/templates').get_template(
+        'laposte_soap.xml')
+    xml = template.render(body='<a/>')
+    assert spans[-1].name == 'render'
+    assert spans[-1].attributes == {
+        'template': 'laposte_soap.xml', 'size': len(xml)}
+
+
+def test_errors(spans):
+    def fail(span):
+        raise ValueError('listener')
+    tracing.add_listener(fail)
+    try:
+        with pytest.raises(KeyError):
+            with tracing.span('get', carrier='dpd'):
+                with tracing.span('decode'):
+                    {}['missing']
+    finally:
+        tracing.remove_listener(fail)
+    assert [span.name for span in spans] == ['decode', 'get']
+    assert isinstance(spans[0].error, KeyError)
+    assert spans[0].attributes == {'carrier': 'dpd'}
+    assert tracing.current() is None
+
+
+def test_recorder():
+    recorder = tracing.Recorder(maxlen=100)
+    for i in range(200):
+        span = tracing.Span('http', {})
+        span.duration = i
+        recorder(span)
+    assert recorder.percentile('http', 0) == 100
+    assert recorder.percentile('http', 99) == 198
+    assert recorder.percentile('get', 99) is None
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Keep-alive connections of transports."""
+from roulier.batch import imap
+from roulier.carriers.dpd.dpd_transport import DpdTransport
+from roulier.carriers.geodis.geodis import Geodis
+from roulier.carriers.geodis.geodis_transport_rest_ws import (
+    GeodisTransportRestWs)
+from roulier.carriers.laposte.laposte_transport import LaposteTransport
+from roulier.transport import Transport
+
+from .stand_in import StandIn
+
+
+class HttpTransport(Transport):
+    def send(self, payload):
+        return self.post(payload).status_code
+
+
+def _request(server):
+    return {'url': server.url + '/sls-ws/SlsServiceWS', 'headers': {},
+            'data': b'<body/>'}
+
+
+def test_connections_are_reused():
+    server = StandIn(size=200).start()
+    transport = HttpTransport()
+    for _ in range(5):
+        assert transport.send(_request(server)) == 200
+    assert server.connections == 1
+
+    transport.close()
+    assert transport.send(_request(server)) == 200
+    assert server.connections == 2
+    transport.close()
+    server.close()
+
+
+def test_pool_shared_by_threads():
+    server = StandIn(size=200).start()
+    transport = HttpTransport(pool_maxsize=2, pool_block=True)
+    results = imap(transport.send, [_request(server)] * 40, max_workers=8)
+    assert [r.result for r in results] == [200] * 40
+    assert server.connections <= 2
+    transport.close()
+    server.close()
+
+
+def test_geodis_transports_are_shared():
+    assert Geodis().ws is Geodis().ws
+    assert Geodis().pipeline('label')[1] is Geodis.ws
+    assert Geodis().pipeline('tracking')[1] is Geodis.rest_ws
+
+
+def test_base_url():
+    transport = HttpTransport()
+    url = 'https://ws.colissimo.fr/sls-ws/SlsServiceWS?wsdl'
+    assert transport.url(url) == url
+    transport = HttpTransport(base_url='http://127.0.0.1:8000/')
+    assert transport.url(url) == (
+        'http://127.0.0.1:8000/sls-ws/SlsServiceWS?wsdl')
+    transport.base_url = 'http://stand-in/prefix'
+    assert transport.url(url) == (
+        'http://stand-in/prefix/sls-ws/SlsServiceWS?wsdl')
+
+
+def test_base_url_of_carriers():
+    server = StandIn().start()
+    laposte = LaposteTransport(base_url=server.url)
+    assert laposte.http_request(b'')['url'] == (
+        server.url + '/sls-ws/SlsServiceWS')
+    assert DpdTransport(base_url=server.url).http_request(b'')['url'] == (
+        server.url + '/dpd-eprintwebservice/eprintwebservice.asmx')
+    geodis = GeodisTransportRestWs(base_url=server.url)
+    infos = {'url': 'https://espace-client.geodis.com/services/api/'
+                    'zoomclient/recherche-envoi',
+             'token': 'l;0;fr;bad'}
+    request = geodis.http_request('{}', infos)
+    assert request['url'] == (
+        server.url + '/services/api/zoomclient/recherche-envoi')
+    assert geodis.post(request).json()['codeErreur'] == 'TOKEN'
+    geodis.close()
+    server.close()
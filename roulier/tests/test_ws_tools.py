@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""Removal of empty tags, against the reference xslt."""
+import os
+
+from lxml import etree
+import pytest
+
+import roulier
+from roulier.carriers.dpd.dpd_encoder import DpdEncoder
+from roulier.carriers.geodis.geodis_encoder_ws import GeodisEncoderWs
+from roulier.carriers.laposte.laposte_encoder import LaposteEncoder
+from roulier.ws_tools import remove_empty_tags
+
+try:
+    unicode
+except NameError:  # python 3
+    unicode = str
+
+XSL = os.path.join(
+    os.path.dirname(roulier.__file__), 'templates', 'remove_empty_tags.xsl')
+
+ADDRESS = {
+    'company': u'Akretion Frères & <Co>', 'name': u'Hélène',
+    'street1': '35 b Rue Montgolfier', 'street2': ' ',
+    'city': 'Villeurbanne', 'country': 'FR', 'zip': '69100',
+    'phone': '0600000000', 'email': 'a@b.fr'}
+
+
+def _xslt(xml):
+    transform = etree.XSLT(etree.parse(XSL))
+    return unicode(transform(etree.fromstring(xml)))
+
+
+def _laposte(action):
+    data = LaposteEncoder().api()
+    data['auth']['login'] = '12345'
+    data['service']['product'] = 'COL'
+    data['service']['shippingDate'] = '2019/09/12'
+    data['parcels'][0]['weight'] = 3.4
+    data['from_address'].update(ADDRESS)
+    data['to_address'].update(ADDRESS)
+    return LaposteEncoder().encode(data, action)
+
+
+def _laposte_customs(action):
+    data = LaposteEncoder().api()
+    data['auth']['login'] = '12345'
+    data['service'].update({
+        'product': 'CORI', 'shippingDate': '2019/09/12',
+        'commercialName': 'Akretion'})
+    data['parcels'][0].update({'weight': 3.4, 'insuranceValue': 10})
+    data['customs'].update({'category': 3, 'articles': [
+        {'quantity': '2', 'weight': 0.5, 'originCountry': 'FR',
+         'description': 'hat', 'hsCode': '1234', 'value': 4}]})
+    data['from_address'].update(ADDRESS)
+    data['to_address'].update(ADDRESS, country='US', zip='10001')
+    return LaposteEncoder().encode(data, action)
+
+
+def _dpd(action):
+    data = DpdEncoder().api()
+    data['auth']['login'] = '12345'
+    data['service'].update({
+        'agencyId': '077', 'customerCountry': '250',
+        'customerId': '123', 'shippingDate': '2019/09/12'})
+    data['parcels'][0]['weight'] = 3.4
+    data['from_address'].update(ADDRESS)
+    data['to_address'].update(ADDRESS)
+    return DpdEncoder().encode(data, action)
+
+
+def _geodis(action):
+    data = GeodisEncoderWs().api(action)
+    data['auth']['login'] = '12345'
+    if action == 'findLocalite':
+        data['to_address'].update(
+            {'country': 'FR', 'zip': '69100', 'city': 'Villeurbanne'})
+        return GeodisEncoderWs().encode(data, action)
+    data['service'].update({
+        'product': 'MES', 'customerId': '123', 'shippingId': 'X1',
+        'shippingDate': '2019/09/12', 'agencyId': '06', 'option': ''})
+    data['parcels'] = [{'weight': 1.2}, {'weight': 2.0, 'reference': 'b'}]
+    data['from_address'].update(ADDRESS)
+    data['to_address'].update(ADDRESS)
+    return GeodisEncoderWs().encode(data, action)
+
+
+@pytest.mark.parametrize('encode, action', [
+    (_laposte, 'generateLabelRequest'),
+    (_laposte, 'getProductInter'),
+    (_laposte_customs, 'generateLabelRequest'),
+    (_dpd, 'createShipmentWithLabels'),
+    (_geodis, 'demandeImpressionEtiquette'),
+    (_geodis, 'findLocalite'),
+])
+def test_carrier_templates(encode, action):
+    body = encode(action)['body']
+    assert remove_empty_tags(body) == _xslt(body)
+
+
+@pytest.mark.parametrize('xml', [
+    u'<a><b/><c> </c><d k=""/></a>',
+    u'<a>x<b/> y <c/>z<d><e/></d></a>',
+    u'<a><!--c--><b><?pi x?></b><c>\n\t</c>\xa0</a>',
+    u'<a> </a>',
+    u'<a xmlns:n="urn:n"><n:b/><n:c>é &amp; &lt;</n:c></a>',
+])
+def test_documents(xml):
+    assert remove_empty_tags(xml) == _xslt(xml)
+
+
+def test_tree_is_not_modified():
+    tree = etree.fromstring(u'<a><b/><c>x</c></a>')
+    pruned = remove_empty_tags(tree, ouput_as_string=False)
+    assert etree.tostring(pruned) == b'<a><c>x</c></a>'
+    assert etree.tostring(tree) == b'<a><b/><c>x</c></a>'
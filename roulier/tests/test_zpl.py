@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Images to ^GFA, against zplgrf."""
+from io import BytesIO
+import base64
+
+from PIL import Image, ImageDraw
+import pytest
+
+from roulier.zpl import image_to_gfa, open_image
+from roulier.ws_tools import png_to_zpl
+
+
+def _png(mode, width, height):
+    """A label-like image: bars, boxes and a gradient (dithered)."""
+    image = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(image)
+    for x in range(0, width, 7):
+        draw.line([x, 0, x, height // 2], fill=(0, 0, 0), width=x % 3 + 1)
+    if width >= 5 and height >= 5:
+        # (x1 < x0 on smaller images: Pillow raises)
+        draw.rectangle(
+            [2, height // 2, width - 3, height - 3], outline='black')
+    for y in range(height // 2, height):
+        draw.line([0, y, width // 3, y], fill=(y * 255 // height,) * 3)
+    if mode == 'P':
+        image = image.convert('P', palette=Image.ADAPTIVE, colors=16)
+    else:
+        image = image.convert(mode)
+    png = BytesIO()
+    image.save(png, 'PNG')
+    return png.getvalue()
+
+
+def _zplgrf_gfa(png, rotate, compression):
+    zplgrf = pytest.importorskip('zplgrf')
+    if rotate:
+        rotated = BytesIO()
+        Image.open(BytesIO(png)).rotate(90, expand=True).save(
+            rotated, format='PNG')
+        png = rotated.getvalue()
+    line = zplgrf.GRF.from_image(png, 'DEMO').to_zpl_line(
+        compression=compression)
+    size, width, data = line[len('~DGR:DEMO.GRF,'):].split(',', 2)
+    return '^GFA,%s,%s,%s,,%s' % (size, size, width, data)
+
+
+@pytest.mark.parametrize('mode', ['1', 'L', 'P', 'RGB', 'RGBA'])
+@pytest.mark.parametrize('size', [(1, 1), (83, 41), (160, 200)])
+@pytest.mark.parametrize('rotate', [False, True])
+@pytest.mark.parametrize('compression', [2, 3])
+def test_like_zplgrf(mode, size, rotate, compression):
+    png = _png(mode, *size)
+    image = open_image(png, rotate)
+    assert image_to_gfa(image, compression) == _zplgrf_gfa(
+        png, rotate, compression)
+
+
+def test_png_to_zpl():
+    png = _png('L', 83, 41)
+    zpl = png_to_zpl(base64.b64encode(png), True)
+    assert zpl == '^XA^FO00,00\n%s^XZ' % _zplgrf_gfa(png, True, 2)
+    # 41 dots wide once rotated: 6 bytes per row
+    assert zpl.startswith('^XA^FO00,00\n^GFA,498,498,6,,')
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""Timed spans of the stages of Carrier.get(), for listeners.
+
+    from roulier import tracing
+
+    recorder = tracing.Recorder()
+    tracing.add_listener(recorder)
+    laposte.get_label(data)
+    recorder.percentile('http', 99)
+
+A listener is called with each Span when it ends (in the thread
+running the stage): span.name, span.duration (seconds),
+span.attributes ('carrier': lowercase class name, and 'action' of
+the get() it belongs to, 'size': bytes handled by the stage...),
+span.parent and span.error (the exception raised in the stage, if
+any).
+
+Spans of get() (names):
+
+    get                 Carrier.get(), parent of the others
+    encode              encoder, including:
+        normalize       Api.process() and Api.normalize()
+        validate        Api.process(): the normalized document
+        render          template rendered
+        remove_empty_tags
+    soap_wrap           soap envelope (transport)
+    http                request sent, response received
+    multipart           response parsed (roulier.multipart)
+    xml, json           response parsed (transport)
+    decode              decoder, including:
+        image           png converted to zpl
+
+Without listeners, span() returns a shared object doing nothing:
+stages cost a function call more.
+
+In coroutines (roulier.aio), spans are those of the stages run
+between awaits: no 'get' nor 'http', and the spans parsing the
+response have no carrier nor action.
+"""
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# attributes of a span given to the spans it encloses
+INHERITED = ('carrier', 'action')
+
+_listeners = []
+_local = threading.local()
+_clock = getattr(time, 'perf_counter', time.time)
+
+
+class Span(object):
+    """A stage being run (see span())."""
+
+    def __init__(self, name, attributes, parent=None):
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.start = None
+        self.duration = None
+        self.error = None
+        self._clock = None
+
+    def set(self, key, value):
+        """Set an attribute (known during the stage, like a size)."""
+        self.attributes[key] = value
+
+    def __enter__(self):
+        stack = _stack()
+        stack.append(self)
+        self.start = time.time()
+        self._clock = _clock()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = _clock() - self._clock
+        self.error = exc_value
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        for listener in list(_listeners):
+            try:
+                listener(self)
+            except Exception:
+                log.exception('Tracing listener %r failed', listener)
+        return False
+
+    def __repr__(self):
+        return '<Span %s %s %r>' % (
+            self.name, self.duration, self.attributes)
+
+
+class _NoSpan(object):
+    """span() without listeners: does nothing."""
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NO_SPAN = _NoSpan()
+
+
+def _stack():
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+def current():
+    """Return the span being run in this thread (or None)."""
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+def span(name, **attributes):
+    """Return a context manager timing a stage.
+
+    with tracing.span('render', template=name) as span:
+        xml = template.render()
+        span.set('size', len(xml))
+    """
+    if not _listeners:
+        return NO_SPAN
+    parent = current()
+    if parent is not None:
+        for key in INHERITED:
+            if key in parent.attributes:
+                attributes.setdefault(key, parent.attributes[key])
+    return Span(name, attributes, parent)
+
+
+def add_listener(listener):
+    """Call listener(span) at the end of each span."""
+    _listeners.append(listener)
+
+
+def remove_listener(listener):
+    _listeners.remove(listener)
+
+
+class Recorder(object):
+    """Listener keeping the durations of the spans, by name.
+
+    params:
+        maxlen: durations kept by name (the last ones)
+    """
+
+    def __init__(self, maxlen=10000):
+        self.maxlen = maxlen
+        self.durations = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, span):
+        with self.lock:
+            durations = self.durations.setdefault(span.name, [])
+            durations.append(span.duration)
+            if len(durations) > self.maxlen:
+                del durations[:len(durations) - self.maxlen]
+
+    def percentile(self, name, percent):
+        """Return the duration below which percent of the spans
+        named name were (None if none)."""
+        with self.lock:
+            durations = sorted(self.durations.get(name, []))
+        if not durations:
+            return None
+        index = int(round(percent / 100.0 * (len(durations) - 1)))
+        return durations[index]
+
+    def clear(self):
+        with self.lock:
+            self.durations.clear()
@@ -1,13 +1,108 @@
 # -*- coding: utf-8 -*-
 """Send a request to a carrier and get the result."""
 import abc
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import tracing
+
+try:
+    from urllib.parse import urlsplit, urlunsplit
+except ImportError:  # python 2
+    from urlparse import urlsplit, urlunsplit
+
+log = logging.getLogger(__name__)
 
 
 class Transport(object):
-    """Send a request to a carrier and get the result."""
+    """Send a request to a carrier and get the result.
+
+    Http requests are sent with a requests.Session: connections
+    are kept alive and reused (no new TCP and TLS handshake).
+    The session is shared by the threads using the transport.
+
+    Requests can be sent to another server than the carrier's (a
+    stand-in, see roulier/tests/stand_in.py) with base_url: the path
+    of the carrier's url is appended to it. It is given to a
+    transport, or to every transport with set_base_url().
+    """
 
     __metaclass__ = abc.ABCMeta
 
+    # number of hosts with a pool of connections
+    pool_connections = 10
+    # max number of connections kept in the pool of a host
+    pool_maxsize = 10
+    # wait for a free connection instead of opening a new one
+    # when pool_maxsize connections are in use
+    pool_block = False
+    # scheme, host and path prefix of the urls (None: carrier's)
+    base_url = None
+
+    def __init__(self, pool_connections=None, pool_maxsize=None,
+                 pool_block=None, base_url=None):
+        if pool_connections is not None:
+            self.pool_connections = pool_connections
+        if pool_maxsize is not None:
+            self.pool_maxsize = pool_maxsize
+        if pool_block is not None:
+            self.pool_block = pool_block
+        if base_url is not None:
+            self.base_url = base_url
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @classmethod
+    def set_base_url(cls, base_url):
+        """Send the requests of the transports of cls (all of them
+        if cls is Transport) to base_url (None: to the carriers).
+
+        Credentials are sent along: only for tests and benchmarks.
+        """
+        if base_url:
+            log.warning('Requests of %s are sent to %s', cls.__name__,
+                        base_url)
+        cls.base_url = base_url
+
+    @property
+    def session(self):
+        """Return the requests.Session, created on first use."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self.new_session()
+        return self._session
+
+    def new_session(self):
+        """Build a session with a pool of keep-alive connections."""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def close(self):
+        """Close the connections.
+
+        A new session is created if the transport is used again.
+        """
+        with self._session_lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     @abc.abstractmethod
     def send(self, input):
         """Send a request to a carrier and get the result.
@@ -18,3 +113,68 @@ class Transport(object):
             carrier specific
         """
         return
+
+    def prepare_request(self, payload):
+        """Build the http request of a payload.
+
+        Implemented by transports calling a WS over http:
+        send() is prepare_request(), post() then handle_response().
+        The http call can be made by something else (see roulier.aio).
+
+        Args:
+            payload: same as send()
+        Return:
+            {
+                url: (string)
+                headers: (dict)
+                data: body of the request
+            }
+        """
+        raise NotImplementedError
+
+    def url(self, url):
+        """Return the url of the carrier moved to base_url (if set).
+
+        url('https://ws.colissimo.fr/sls-ws/SlsServiceWS') with
+        base_url 'http://localhost:8000' is
+        'http://localhost:8000/sls-ws/SlsServiceWS'.
+        """
+        if not self.base_url:
+            return url
+        parts = urlsplit(url)
+        base = urlsplit(self.base_url)
+        return urlunsplit((
+            base.scheme, base.netloc, base.path.rstrip('/') + parts.path,
+            parts.query, parts.fragment))
+
+    def post(self, request):
+        """Send an http request built by prepare_request().
+
+        Return:
+            Requests.response
+        """
+        data = request['data']
+        with tracing.span('http', url=request['url'], size=len(data)) as span:
+            response = self.session.post(
+                request['url'], headers=request['headers'], data=data)
+            span.set('status', response.status_code)
+            span.set('response_size', len(response.content))
+        return response
+
+    def handle_response(self, response):
+        """Return the result of send() from the response of post()."""
+        raise NotImplementedError
+
+    def cached_result(self, payload):
+        """Return the result of send() kept for payload (None: the
+        request is sent).
+
+        Called before prepare_request() by send() and roulier.aio.
+        """
+        return None
+
+    def cache_result(self, payload, result):
+        """Keep the result of send() of payload (see cached_result()).
+
+        Called after handle_response() by send() and roulier.aio.
+        """
@@ -1,118 +1,122 @@
 # -*- coding: utf-8 -*-
 """Utilities for WS."""
 from lxml import etree
-from jinja2 import Environment, PackageLoader
-from zplgrf import GRF
-from PIL import Image
-from io import BytesIO
-import email.parser
-import re
 import base64
+import copy
+
+from . import tracing
+from .cache import content_key
+from .multipart import parse_response
+
+try:
+    basestring
+except NameError:  # python 3
+    basestring = unicode = str
+
+
+# whitespace of xml (str.strip() would also strip unicode spaces)
+XML_SPACE = ' \t\r\n'
+# drops most whitespace-only text while parsing
+# (lxml parsers can be used by many threads)
+_parser = etree.XMLParser(remove_blank_text=True)
+
+
+def prune_empty_tags(element):
+    """Remove empty tags of an lxml element, in place.
+
+    Same result as templates/remove_empty_tags.xsl:
+    whitespace-only text is removed and so are the tags without
+    attributes, children (tags, comments, processing instructions)
+    or text; a tag is kept if it had children, even if they
+    were all removed. (Unlike the xsl, namespace declarations
+    repeating the ones of a parent are not removed.)
+
+    param: element: lxml.etree._Element
+    return: list of removed elements
+    """
+    empty = []
+    for node in element.iter():
+        tail = node.tail
+        if tail is not None and not tail.strip(XML_SPACE):
+            node.tail = None
+        if not isinstance(node.tag, basestring):
+            continue  # comment or processing instruction
+        text = node.text
+        if text is not None and not text.strip(XML_SPACE):
+            node.text = text = None
+        if not (text or len(node) or node.attrib):
+            empty.append(node)
+    for node in empty:
+        parent = node.getparent()
+        if parent is None:
+            continue
+        if node.tail:
+            previous = node.getprevious()
+            if previous is None:
+                parent.text = (parent.text or '') + node.tail
+            else:
+                previous.tail = (previous.tail or '') + node.tail
+        parent.remove(node)
+    return empty
 
 
 def remove_empty_tags(xml, ouput_as_string=True):
-    """Remove empty tags with xslt transformation.
+    """Remove empty tags (see prune_empty_tags()).
 
-    param: xml a string or a etree type
-    return: unicode string or lxml.etree._XSLTResultTree
+    param: xml a string or a etree type (not modified)
+    return: unicode string (indented) or lxml.etree._Element
+        (None if xml itself is empty)
     """
-    # use Jinja env for getting the path of template file
-    # pkg_resouces may be an alternative, but we already
-    # have Jinja
-    env = Environment(
-        loader=PackageLoader('roulier', 'templates'),
-        extensions=['jinja2.ext.with_'])
-    template = env.get_template("remove_empty_tags.xsl")
-    xsl = etree.parse(open(template.filename))
-    transform = etree.XSLT(xsl)
-
-    if isinstance(xml, basestring):
-        xml = etree.fromstring(xml)
-    # else we asume xml is an lxml.etree
-    if ouput_as_string:
-        return unicode(transform(xml))
-    else:
-        return transform(xml)
+    with tracing.span('remove_empty_tags') as span:
+        if isinstance(xml, basestring):
+            span.set('size', len(xml))
+            xml = etree.fromstring(xml, _parser)
+        else:
+            # we asume xml is an lxml.etree
+            if hasattr(xml, 'getroot'):
+                xml = xml.getroot()
+            xml = copy.deepcopy(xml)
+        if xml in prune_empty_tags(xml):
+            xml = None
+        if not ouput_as_string:
+            return xml
+        if xml is None:
+            return u''
+        return etree.tostring(xml, encoding=unicode, pretty_print=True)
 
 
 def get_parts(response):
-    """Extract parts from headers.
+    """Extract parts of a multipart response.
 
     Params:
         response: a request object
     Returns:
-        an array of content-ids
+        multipart.Parts: bytes by content-id (see multipart.parse())
     """
-    head_lines = ''
-    for k, v in response.raw.getheaders().iteritems():
-        head_lines += str(k) + ':' + str(v) + '\n'
-
-    full = head_lines + response.content
-
-    parser = email.parser.Parser()
-    decoded_reply = parser.parsestr(full)
-    parts = {}
-    start = decoded_reply.get_param('start').lstrip('<').rstrip('>')
-    i = 0
-    for part in decoded_reply.get_payload():
-        cid = part.get('content-Id', '').lstrip('<').rstrip('>')
-        if (not start or start == cid) and 'start' not in parts:
-            parts['start'] = part.get_payload()
-        else:
-            parts[cid or 'Attachment%d' % i] = part.get_payload()
-        i += 1
-    return parts
+    return parse_response(response)
 
 
-def png_to_zpl(png, rotate):
+def png_to_zpl(png, rotate, cache=None):
     u"""Transform a PNG in a suitable format for ZPL.
 
-    .png is converted to GRF format.
+    .png is converted to a ^GFA graphic field (see roulier.zpl).
     Printing a Portable Network Graphics (PNG) with zpl instructions (like DY)
     is possible but hard (the spec is not really understandable).
 
     params:
         png : base64 encoded png
         rotate: boolean if true, rotate 90°
+        cache: a roulier.cache.Cache, conversions of the same png
+            (and rotate) are done once
 
     returns:
         a ^GFA instruction with the image.
     """
-    def base64_to_png(data):
-        return BytesIO(base64.b64decode(data))
-
-    def get_grf(png, rotate):
-        u"""Get a GRF from a png.
-
-        params:
-            png: BytesIO stream
-            rotate: rotate 90° if true
-        """
-        if rotate:
-            png_bytes = BytesIO()
-            (Image
-                .open(png)
-                .rotate(90, expand=True)
-                .save(png_bytes, format="PNG"))
-            png = png_bytes.getvalue()
-            png_bytes.close()
-
-        return GRF.from_image(png, 'DEMO')
-
-    def build_gfa(grf):
-        zpl = grf.to_zpl_line(compression=2)
-
-        m = re.search('\~DGR:DEMO.GRF,(\d+),(\d+),(.*)$', zpl)
-        size = m.group(1)
-        width = m.group(2)
-        payload = m.group(3)
-
-        return '''^XA^FO00,00
-^GFA,%(size)s,%(size)s,%(width)s,,%(payload)s^XZ''' % (
-            {'size': size, 'width': width, 'payload': payload}
-        )
-
-    with base64_to_png(png) as png_stream:
-        grf = get_grf(png_stream, rotate)
-        zpl = build_gfa(grf)
-    return zpl
+    if cache is not None:
+        return cache.fetch(
+            content_key(png, 'zpl', rotate), png_to_zpl, png, rotate)
+    with tracing.span('image', size=len(png)):
+        # PIL is imported on first conversion only
+        from .zpl import image_to_gfa, open_image
+        image = open_image(base64.b64decode(png), rotate)
+        return '^XA^FO00,00\n%s^XZ' % image_to_gfa(image)
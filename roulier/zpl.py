@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Images to ZPL graphic fields (^GFA).
+
+Same output as zplgrf (GRF.from_image() then to_zpl_line()),
+but the image is thresholded and packed by PIL (mode '1')
+instead of pixel by pixel in python.
+"""
+from io import BytesIO
+import base64
+import binascii
+import re
+import zlib
+
+from PIL import Image, ImageChops
+
+# runs of a character (in a row of hex)
+_RUN = re.compile(r'(.)\1+')
+_runs = {}  # run: compressed run
+
+
+def _repeat_count(count):
+    """ZPL repeat count: z = 400, g-y = 20-380, G-Y = 1-19."""
+    chars = 'z' * (count // 400)
+    count %= 400
+    if count >= 20:
+        chars += chr(count // 20 + 70).lower()
+        count %= 20
+    if count:
+        chars += chr(count + 70)
+    return chars
+
+
+def _str(data):
+    """ascii bytes to str (unchanged on python 2)."""
+    return data if isinstance(data, str) else data.decode('ascii')
+
+
+def _compress_run(match):
+    run = match.group()
+    try:
+        return _runs[run]
+    except KeyError:
+        compressed = _runs[run] = _repeat_count(len(run)) + run[0]
+        return compressed
+
+
+def ascii_hex(data, width):
+    """Encode a raster in ASCII hex with ZPL compression.
+
+    Rows ending with zeros are cut with ',', rows repeating the
+    previous one are ':', runs of a character are counted.
+
+    params:
+        data: bytes of the raster
+        width: bytes per row
+    return: str
+    """
+    hex_ = _str(binascii.hexlify(data)).upper()
+    row_size = width * 2
+    rows = []
+    last = None
+    for i in range(0, len(hex_), row_size):
+        row = hex_[i:i + row_size]
+        if row.endswith('00'):
+            row = row.rstrip('0')
+            if len(row) % 2:
+                row += '0'
+            row += ','
+        if row == last:
+            row = ':'
+        else:
+            last = row
+        rows.append(row)
+    # runs do not span rows
+    return _RUN.sub(_compress_run, '\n'.join(rows)).replace('\n', '')
+
+
+def z64(data):
+    """Encode a raster in base64 of deflate (:Z64:data:crc)."""
+    encoded = base64.b64encode(zlib.compress(data))
+    return ':Z64:%s:%04X' % (
+        _str(encoded), binascii.crc_hqx(encoded, 0))
+
+
+def image_to_raster(image):
+    """Threshold and pack an image, one bit per dot (1 is black).
+
+    params:
+        image: PIL.Image (dithered like Image.convert('1'))
+    return: (bytes, bytes per row)
+    """
+    if image.mode != '1':
+        image = image.convert('1')
+    # rows are padded with white (0) bits
+    data = ImageChops.invert(image).tobytes()
+    return data, (image.size[0] + 7) // 8
+
+
+def image_to_gfa(image, compression=2):
+    """Return a ^GFA command drawing the image.
+
+    params:
+        image: PIL.Image
+        compression: 2 = ASCII hex (most compatible),
+            3 = base64 of deflate (smallest)
+    return: str
+    """
+    data, width = image_to_raster(image)
+    if compression == 3:
+        encoded = z64(data)
+    else:
+        encoded = ascii_hex(data, width)
+    return '^GFA,%s,%s,%s,,%s' % (len(data), len(data), width, encoded)
+
+
+def open_image(png, rotate=False):
+    """Open an image (bytes), rotated 90° if rotate."""
+    image = Image.open(BytesIO(png))
+    if rotate:
+        image = image.rotate(90, expand=True)
+    return image
@@ -13,8 +13,19 @@ setup(
     version=version,
     packages=find_packages(),
     install_requires=[
-        'lxml', 'Jinja2', 'requests', 'cerberus', 'zplgrf',
+        'lxml', 'Jinja2', 'requests', 'cerberus', 'Pillow',
         'unidecode'],
+    extras_require={
+        'aio': ['aiohttp'],
+    },
+    entry_points={
+        'roulier.carriers': [
+            'laposte = roulier.carriers.laposte.laposte:Laposte',
+            'dummy = roulier.carriers.dummy.dummy:Dummy',
+            'geodis = roulier.carriers.geodis.geodis:Geodis',
+            'dpd = roulier.carriers.dpd.dpd:Dpd',
+        ],
+    },
     author="Hparfr <https://github.com/hparfr>",
     author_email="roulier@hpar.fr",
     description="Label parcels without pain",